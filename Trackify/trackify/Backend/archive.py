@@ -0,0 +1,178 @@
+# archive.py
+"""Archival of approved timesheets from closed periods into timesheet_archive.
+
+The timesheet table only ever grows, and most of it is approved history that
+is never edited again. archive_timesheets moves approved rows dated before a
+cutoff into timesheet_archive, in batches of one transaction each. Listings
+keep finding them there (see crud.timesheet_sources). Rollups, listing versions
+and events are left alone: an archived timesheet keeps its status and hours.
+
+On MySQL, timesheet_archive is range-partitioned on TO_DAYS(date), one
+partition per month or year (TIMESHEET_ARCHIVE_PARTITION), so a date-bounded
+read only opens the partitions its range covers. Before each run the empty
+catch-all partition p_future is split to add the partitions the run needs.
+Other backends keep a single table whose (date, timesheet_id) primary key
+serves the same range scans.
+
+Run from the Backend directory, e.g. daily from cron:
+
+    python archive.py --horizon-days 365
+"""
+import argparse
+import json
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, func, insert, literal, select, text
+from sqlalchemy.orm import Session
+
+import models
+from config import TIMESHEET_ARCHIVE_HORIZON_DAYS, TIMESHEET_ARCHIVE_BATCH, TIMESHEET_ARCHIVE_PARTITION
+
+ARCHIVED_COLUMNS = (
+    "timesheet_id", "employee_id", "date", "description", "clock_in", "clock_out",
+    "total_hours", "status", "department_id", "submitted_at",
+)
+
+# MySQL's TO_DAYS('0001-01-01') is 366; Python's date(1, 1, 1).toordinal() is 1
+TO_DAYS_OFFSET = 365
+
+
+def archive_cutoff(horizon_days: int, today: date = None) -> date:
+    """Timesheets dated before this are archived."""
+    if horizon_days < 1:
+        raise ValueError("The archive horizon must be at least one day")
+    return (today or date.today()) - timedelta(days=horizon_days)
+
+
+# ---------- Partitions (MySQL) ----------
+def partition_start(day: date, granularity: str) -> date:
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "year":
+        return day.replace(month=1, day=1)
+    raise ValueError(f"Unsupported partition granularity {granularity!r}; use 'month' or 'year'")
+
+
+def next_partition_start(start: date, granularity: str) -> date:
+    if granularity == "year":
+        return start.replace(year=start.year + 1)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(start: date, granularity: str) -> str:
+    return f"p{start:%Y}" if granularity == "year" else f"p{start:%Y%m}"
+
+
+def missing_partitions(newest_bound, oldest_date: date, through: date, granularity: str) -> list:
+    """(name, exclusive upper bound) of the partitions to add so that every date up to through has its own.
+
+    newest_bound is the upper bound of the newest existing partition, None when
+    only p_future exists; then the first new partition is the one of oldest_date.
+    """
+    start = newest_bound if newest_bound is not None else partition_start(oldest_date, granularity)
+    partitions = []
+    while start <= through:
+        bound = next_partition_start(start, granularity)
+        partitions.append((partition_name(start, granularity), bound))
+        start = bound
+    return partitions
+
+
+def reorganize_statement(partitions) -> str:
+    """Split the empty p_future partition into the given partitions plus a new p_future."""
+    added = ", ".join(
+        f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{bound.isoformat()}'))" for name, bound in partitions
+    )
+    return (
+        "ALTER TABLE timesheet_archive REORGANIZE PARTITION p_future INTO "
+        f"({added}, PARTITION p_future VALUES LESS THAN MAXVALUE)"
+    )
+
+
+PARTITION_BOUNDS_QUERY = text(
+    "SELECT PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'timesheet_archive' AND PARTITION_NAME <> 'p_future'"
+)
+
+
+def ensure_partitions(db: Session, oldest_date: date, through: date, granularity: str = TIMESHEET_ARCHIVE_PARTITION) -> list:
+    """Add the partitions needed to archive rows dated up to through; returns what was added.
+
+    Only MySQL partitions the archive. The ALTER commits implicitly, so call this
+    outside the archive transactions.
+    """
+    if db.get_bind().dialect.name != "mysql":
+        return []
+    bounds = [date.fromordinal(int(value) - TO_DAYS_OFFSET) for (value,) in db.execute(PARTITION_BOUNDS_QUERY)]
+    partitions = missing_partitions(max(bounds, default=None), oldest_date, through, granularity)
+    if partitions:
+        db.execute(text(reorganize_statement(partitions)))
+    return partitions
+
+
+# ---------- Archival ----------
+def archivable_filters(cutoff: date):
+    return (models.Timesheet.status == models.StatusEnum.approved, models.Timesheet.date < cutoff)
+
+
+def archivable_ids_query(cutoff: date, limit: int):
+    """The next batch of archivable timesheets, locked until the batch commits (served by ix_timesheet_status_date)."""
+    return select(models.Timesheet.timesheet_id).where(*archivable_filters(cutoff)).order_by(
+        models.Timesheet.timesheet_id
+    ).limit(limit).with_for_update()
+
+
+def archive_batch_statements(cutoff: date, timesheet_ids, archived_at: datetime):
+    """INSERT ... SELECT into timesheet_archive, then DELETE from timesheet, for one batch."""
+    batch = (models.Timesheet.timesheet_id.in_(list(timesheet_ids)), *archivable_filters(cutoff))
+    copy = insert(models.TimesheetArchive).from_select(
+        [*ARCHIVED_COLUMNS, "archived_at"],
+        select(
+            *(getattr(models.Timesheet, column) for column in ARCHIVED_COLUMNS),
+            literal(archived_at, models.TimesheetArchive.archived_at.type),
+        ).where(*batch),
+    )
+    return copy, delete(models.Timesheet).where(*batch)
+
+
+def archive_timesheets(db: Session, cutoff: date, batch_size: int = TIMESHEET_ARCHIVE_BATCH,
+                       granularity: str = TIMESHEET_ARCHIVE_PARTITION) -> int:
+    """Move approved timesheets dated before cutoff into timesheet_archive; returns how many were moved.
+
+    Each batch of batch_size rows is copied and deleted in its own transaction,
+    so a run can be interrupted and resumed, and never holds locks for long.
+    """
+    oldest = db.execute(select(func.min(models.Timesheet.date)).where(*archivable_filters(cutoff))).scalar()
+    if oldest is None:
+        return 0
+    ensure_partitions(db, oldest, cutoff, granularity)
+    db.commit()
+
+    moved = 0
+    while True:
+        timesheet_ids = db.execute(archivable_ids_query(cutoff, batch_size)).scalars().all()
+        if not timesheet_ids:
+            return moved
+        for statement in archive_batch_statements(cutoff, timesheet_ids, datetime.utcnow()):
+            db.execute(statement)
+        db.commit()
+        moved += len(timesheet_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--horizon-days", type=int, default=TIMESHEET_ARCHIVE_HORIZON_DAYS,
+                        help="archive approved timesheets dated more than this many days ago")
+    parser.add_argument("--batch-size", type=int, default=TIMESHEET_ARCHIVE_BATCH, help="rows moved per transaction")
+    args = parser.parse_args()
+
+    from database import SessionLocal
+
+    cutoff = archive_cutoff(args.horizon_days)
+    with SessionLocal() as db:
+        moved = archive_timesheets(db, cutoff, args.batch_size)
+    print(json.dumps({"cutoff": cutoff.isoformat(), "archived": moved}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/admin_listing.py
+"""Per-row cost of the admin branch of GET /timesheets/, before and after the
+flat-column + orjson path.
+
+before: select (Timesheet, Employee) pairs, build a TimesheetWithEmployeeInfoResponse
+        per row, then validate and dump against the route's Union response_model
+        the way FastAPI does.
+after:  select timesheet_employee_columns() rows and encode them with fast_json.dump_rows.
+
+Runs against an in-memory SQLite database seeded with --rows timesheets, from the
+Backend directory:
+
+    python benchmarks/admin_listing.py --rows 20000 --page-size 500
+"""
+import argparse
+import json
+import os
+import sys
+import time as timer
+from datetime import date, time, timedelta
+from typing import Union
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+import models
+from crud import timesheet_employee_columns
+from database import Base
+from fast_json import dump_rows
+from schemas import TimesheetResponse, TimesheetWithEmployeeInfoResponse
+
+RESPONSE_ADAPTER = TypeAdapter(Union[list[TimesheetResponse], list[TimesheetWithEmployeeInfoResponse]])
+
+
+def seed(session: Session, rows: int, employees: int = 200):
+    session.execute(insert(models.Employee), [
+        {
+            "employee_id": f"E{i}",
+            "name": f"Name{i}",
+            "surname": f"Surname{i}",
+            "email": f"e{i}@example.com",
+            "email_normalized": f"e{i}@example.com",
+            "password_hash": "x",
+            "role": models.RoleEnum.employee,
+            "department_name": f"Dept{i % 10}",
+        }
+        for i in range(employees)
+    ])
+    start = date(2020, 1, 1)
+    session.execute(insert(models.Timesheet), [
+        {
+            "employee_id": f"E{i % employees}",
+            "date": start + timedelta(days=i // employees),
+            "clock_in": time(8, 0),
+            "clock_out": time(16, 30),
+            "total_hours": 8.5,
+            "status": models.StatusEnum.pending,
+            "description": "Benchmark entry",
+        }
+        for i in range(rows)
+    ])
+    session.commit()
+
+
+def before(session: Session, limit: int) -> bytes:
+    pairs = session.execute(
+        select(models.Timesheet, models.Employee)
+        .join(models.Employee, models.Timesheet.employee_id == models.Employee.employee_id)
+        .order_by(models.Timesheet.date.desc(), models.Timesheet.timesheet_id.desc())
+        .limit(limit)
+    ).all()
+    rows = [
+        TimesheetWithEmployeeInfoResponse(
+            timesheet_id=t.timesheet_id,
+            employee_id=t.employee_id,
+            employee_name=e.name,
+            employee_surname=e.surname,
+            employee_email=e.email,
+            employee_department=e.department_name,
+            date=t.date,
+            clock_in=t.clock_in,
+            clock_out=t.clock_out,
+            total_hours=float(t.total_hours) if t.total_hours is not None else None,
+            status=t.status.value if hasattr(t.status, "value") else str(t.status),
+            description=t.description,
+        )
+        for t, e in pairs
+    ]
+    return RESPONSE_ADAPTER.dump_json(RESPONSE_ADAPTER.validate_python(rows, from_attributes=True))
+
+
+def after(session: Session, limit: int) -> bytes:
+    rows = session.execute(
+        select(*timesheet_employee_columns())
+        .join(models.Employee, models.Timesheet.employee_id == models.Employee.employee_id)
+        .order_by(models.Timesheet.date.desc(), models.Timesheet.timesheet_id.desc())
+        .limit(limit)
+    ).all()
+    return dump_rows(rows)
+
+
+def measure(fn, session: Session, limit: int, repeat: int) -> dict:
+    fn(session, limit)  # warm up statement caches
+    timings = []
+    for _ in range(repeat):
+        session.expunge_all()
+        started = timer.perf_counter()
+        fn(session, limit)
+        timings.append(timer.perf_counter() - started)
+    best = min(timings)
+    return {"best_seconds": round(best, 6), "per_row_us": round(best / limit * 1e6, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="timesheets to seed")
+    parser.add_argument("--page-size", type=int, default=500, help="rows per listing page")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session, args.rows)
+        if json.loads(before(session, 5)) != json.loads(after(session, 5)):
+            raise SystemExit("before and after produce different JSON")
+        results = {
+            "rows": args.rows,
+            "page_size": args.page_size,
+            "before": measure(before, session, args.page_size, args.repeat),
+            "after": measure(after, session, args.page_size, args.repeat),
+        }
+    results["speedup"] = round(results["before"]["best_seconds"] / results["after"]["best_seconds"], 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+# benchmarks/load_test.py
+"""Load test for the Trackify API.
+
+Seeds a database with N employees in M departments (one manager each, plus an
+admin) and K timesheets, then drives the hot endpoints at a fixed concurrency
+and prints one JSON document with, per scenario: p50/p95/p99/max latency,
+throughput, status codes and SQL statements per request (read from the
+Server-Timing header the app adds to every response).
+
+By default the app runs in-process over httpx's ASGI transport against a fresh
+SQLite file, so runs are reproducible and statements can be counted. Point
+--database-url at a local MySQL to use it as the stand-in instead (the schema
+is created with `alembic upgrade head` and the tables must be empty), or pass
+--base-url to load a running server that already holds the seed.
+
+From the Backend directory:
+
+    python benchmarks/load_test.py --employees 200 --departments 10 --timesheets 20000 \\
+        --concurrency 16 --requests 400 --output baseline.json
+    python benchmarks/load_test.py --scenarios login,list_admin --requests 1000
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import date, time as clock, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "benchmark-password"
+SEED_START = date(2022, 1, 3)
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+# ---------- Statistics ----------
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(name, samples, wall_seconds):
+    latencies = sorted(sample["seconds"] for sample in samples)
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample["status"])] = statuses.get(str(sample["status"]), 0) + 1
+    queries = [sample["queries"] for sample in samples if sample["queries"] is not None]
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "scenario": name,
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample["status"] >= 400),
+        "status_codes": statuses,
+        "throughput_rps": round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 0.50)),
+            "p95": ms(percentile(latencies, 0.95)),
+            "p99": ms(percentile(latencies, 0.99)),
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "max": ms(latencies[-1]) if latencies else None,
+        },
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        "queries_total": sum(queries) if queries else None,
+    }
+
+
+# ---------- Database setup ----------
+def prepare_database(args):
+    """Point the app at the benchmark database before any app module is imported."""
+    if args.base_url:
+        return
+    if not args.database_url:
+        path = os.path.join(tempfile.mkdtemp(prefix="trackify-bench-"), "bench.db")
+        args.database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    command.upgrade(config, "head")
+
+
+def seed(args):
+    """Insert departments, employees and timesheets in bulk; returns the seeded identities."""
+    from sqlalchemy import insert, select
+    import hashing
+    import models
+    import rollups
+    from database import SessionLocal
+
+    password_hash = hashing._hash(PASSWORD)  # one hash shared by every seeded account
+    departments = [f"Dept{d:03d}" for d in range(args.departments)]
+    employees = [f"BE{i:06d}" for i in range(args.employees)]
+    managers = [f"BM{d:03d}" for d in range(args.departments)]
+
+    def employee_row(employee_id, role, department_name):
+        return {
+            "employee_id": employee_id,
+            "name": employee_id,
+            "surname": "Bench",
+            "email": f"{employee_id.lower()}@bench.example",
+            "email_normalized": f"{employee_id.lower()}@bench.example",
+            "password_hash": password_hash,
+            "role": role,
+            "department_name": department_name,
+        }
+
+    rows = [employee_row(e, models.RoleEnum.employee, departments[i % args.departments]) for i, e in enumerate(employees)]
+    rows += [employee_row(m, models.RoleEnum.manager, departments[d]) for d, m in enumerate(managers)]
+    rows.append(employee_row("BA000", models.RoleEnum.admin, None))
+
+    timesheets, deltas = [], rollups.RollupDeltas()
+    for i in range(args.timesheets):
+        employee_id = employees[i % args.employees]
+        day = SEED_START + timedelta(days=i // args.employees)
+        status = random.choice(list(models.StatusEnum))
+        timesheets.append({
+            "employee_id": employee_id,
+            "date": day,
+            "clock_in": clock(8, 0),
+            "clock_out": clock(16, 0),
+            "total_hours": 8,
+            "status": status,
+            "description": "Seeded by load_test",
+        })
+        deltas.add(employee_id, day, status, 8)
+
+    with SessionLocal() as db:
+        db.execute(insert(models.Department), [{"name": name} for name in departments])
+        department_ids = dict(db.execute(select(models.Department.name, models.Department.department_id)).all())
+        for row in rows:
+            row["department_id"] = department_ids.get(row["department_name"])
+        employee_departments = {row["employee_id"]: row["department_id"] for row in rows}
+        for row in timesheets:
+            row["department_id"] = employee_departments[row["employee_id"]]
+        db.execute(insert(models.Employee), rows)
+        for start in range(0, len(timesheets), 5000):
+            db.execute(insert(models.Timesheet), timesheets[start:start + 5000])
+        if deltas:
+            db.execute(rollups.upsert_statement(db.get_bind().dialect.name), deltas.params())
+        db.commit()
+
+    return {
+        "employees": employees,
+        "managers": managers,
+        "admin": "BA000",
+        "departments": departments,
+        "next_day": SEED_START + timedelta(days=args.timesheets // args.employees + 1),
+    }
+
+
+def server_timing_queries(response):
+    """Statement count from the Server-Timing header added by query_stats.QueryStatsMiddleware."""
+    match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+    return int(match.group(1)) if match else None
+
+
+# ---------- Scenarios ----------
+def build_scenarios(identities):
+    """name -> callable(i) returning (method, url, login identity or None, json body)."""
+    employees, managers = identities["employees"], identities["managers"]
+    employee_days = {employee_id: identities["next_day"] for employee_id in employees}
+
+    def new_timesheet(i):
+        employee_id = employees[i % len(employees)]
+        day = employee_days[employee_id]
+        employee_days[employee_id] = day + timedelta(days=1)
+        body = {"date": day.isoformat(), "clock_in": "08:00:00", "clock_out": "16:30:00", "description": "load test"}
+        return "POST", "/timesheets/", employee_id, body
+
+    def manager_bulk(i):
+        manager = managers[i % len(managers)]
+        department = managers.index(manager)
+        members = [e for n, e in enumerate(employees) if n % len(managers) == department][:5]
+        return "PUT", "/manager/timesheets/status", manager, {"status": "approved", "employee_ids": members}
+
+    def manager_employee_bulk(i):
+        manager = managers[i % len(managers)]
+        department = managers.index(manager)
+        members = [e for n, e in enumerate(employees) if n % len(managers) == department]
+        return "PUT", f"/manager/employees/{members[i % len(members)]}/timesheets/status", manager, {"status": "rejected"}
+
+    return {
+        "login": lambda i: ("POST", "/login", None, {
+            "email": f"{employees[i % len(employees)].lower()}@bench.example", "password": PASSWORD,
+        }),
+        "list_employee": lambda i: ("GET", "/timesheets/?limit=50", employees[i % len(employees)], None),
+        "list_manager": lambda i: ("GET", "/timesheets/?limit=100", managers[i % len(managers)], None),
+        "list_admin": lambda i: ("GET", "/timesheets/?limit=100", identities["admin"], None),
+        "create_timesheet": new_timesheet,
+        "manager_timesheets": lambda i: ("GET", "/manager/timesheets?status=pending", managers[i % len(managers)], None),
+        "bulk_status_manager": manager_bulk,
+        "bulk_status_manager_employee": manager_employee_bulk,
+        "bulk_status_admin": lambda i: ("PUT", "/admin/timesheets/status", identities["admin"], {
+            "status": "approved", "department_name": identities["departments"][i % len(identities["departments"])],
+        }),
+    }
+
+
+async def login_tokens(client, identities, needed):
+    tokens = {}
+    for employee_id in needed:
+        response = await client.post("/login", json={
+            "email": f"{employee_id.lower()}@bench.example", "password": PASSWORD,
+        })
+        response.raise_for_status()
+        tokens[employee_id] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return tokens
+
+
+async def run_scenario(client, name, make_request, tokens, requests, concurrency):
+    samples = []
+    counter = itertools.count()
+
+    async def worker():
+        while True:
+            i = next(counter)
+            if i >= requests:
+                return
+            method, url, identity, body = make_request(i)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body, headers=tokens.get(identity))
+                status, queries = response.status_code, server_timing_queries(response)
+            except Exception:
+                status, queries = 599, None
+            samples.append({"seconds": time.perf_counter() - started, "status": status, "queries": queries})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(name, samples, time.perf_counter() - started)
+
+
+async def run(args, identities):
+    import httpx
+
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        from main import app
+        transport, base_url = httpx.ASGITransport(app=app), "http://trackify.bench"
+
+    scenarios = build_scenarios(identities)
+    selected = args.scenarios.split(",") if args.scenarios else list(scenarios)
+    unknown = [name for name in selected if name not in scenarios]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+        needed = set(identities["managers"]) | {identities["admin"]}
+        needed |= set(identities["employees"][:args.token_employees])
+        tokens = await login_tokens(client, identities, sorted(needed))
+        # Employee scenarios cycle through the employees that hold a token
+        identities["employees"] = identities["employees"][:args.token_employees]
+        scenarios = build_scenarios(identities)
+
+        results = []
+        for name in selected:
+            results.append(await run_scenario(
+                client, name, scenarios[name], tokens, args.requests, args.concurrency
+            ))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trackify API load test")
+    parser.add_argument("--employees", type=int, default=200, help="N: employees to seed")
+    parser.add_argument("--departments", type=int, default=10, help="M: departments to seed, one manager each")
+    parser.add_argument("--timesheets", type=int, default=20000, help="K: timesheets to seed")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight per scenario")
+    parser.add_argument("--requests", type=int, default=400, help="requests per scenario")
+    parser.add_argument("--scenarios", help="comma-separated subset of scenarios to run")
+    parser.add_argument("--token-employees", type=int, default=50, help="employees that sign in up front")
+    parser.add_argument("--database-url", help="database to seed (default: a new SQLite file)")
+    parser.add_argument("--base-url", help="load a running server instead of the in-process app (no seeding)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the seeded statuses")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+    prepare_database(args)
+
+    seed_started = time.perf_counter()
+    if args.base_url:
+        # The server's database must already hold the load_test seed (run once without --base-url against it)
+        identities = {
+            "employees": [f"BE{i:06d}" for i in range(args.employees)],
+            "managers": [f"BM{d:03d}" for d in range(args.departments)],
+            "admin": "BA000",
+            "departments": [f"Dept{d:03d}" for d in range(args.departments)],
+            "next_day": SEED_START + timedelta(days=args.timesheets // args.employees + 1),
+        }
+    else:
+        identities = seed(args)
+    seed_seconds = time.perf_counter() - seed_started
+
+    results = asyncio.run(run(args, identities))
+    report = {
+        "config": {
+            "employees": args.employees,
+            "departments": args.departments,
+            "timesheets": args.timesheets,
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "target": args.base_url or args.database_url.split("://")[0],
+            "seed_seconds": round(seed_seconds, 3),
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
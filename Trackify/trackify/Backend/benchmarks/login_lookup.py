@@ -0,0 +1,112 @@
+# benchmarks/login_lookup.py
+"""Latency of the employee lookup behind POST /login, before and after the
+email_normalized column.
+
+before: WHERE lower(email) = :email, which no index on email can serve, so
+        every login scans the employee table.
+after:  WHERE email_normalized = :email, a seek on uq_employee_email_normalized.
+
+Runs against an in-memory SQLite database seeded with --employees accounts and
+prints p50/p95 per variant plus the query plan each one gets. From the Backend
+directory:
+
+    python benchmarks/login_lookup.py --employees 100000 --lookups 2000
+
+End-to-end /login latency (lookup plus password verification) at the same size
+comes from the load test:
+
+    python benchmarks/load_test.py --employees 100000 --timesheets 0 --scenarios login
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time as timer
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+import models
+from crud import normalize_email
+from database import Base
+
+
+def seed(session: Session, employees: int):
+    session.execute(insert(models.Employee), [
+        {
+            "employee_id": f"E{i:06d}",
+            "name": f"Name{i}",
+            "surname": f"Surname{i}",
+            "email": f"First.Last{i}@Example.com",
+            "email_normalized": normalize_email(f"First.Last{i}@Example.com"),
+            "password_hash": "x",
+            "role": models.RoleEnum.employee,
+            "department_name": f"Dept{i % 50}",
+        }
+        for i in range(employees)
+    ])
+    session.commit()
+
+
+def before(email: str):
+    return select(models.Employee).where(func.lower(models.Employee.email) == normalize_email(email))
+
+
+def after(email: str):
+    return select(models.Employee).where(models.Employee.email_normalized == normalize_email(email))
+
+
+def query_plan(session: Session, stmt) -> list:
+    compiled = stmt.compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+    return [row[-1] for row in session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")]
+
+
+def measure(build, session: Session, emails: list) -> dict:
+    session.execute(build(emails[0])).scalars().first()  # warm up statement caches
+    timings = []
+    for email in emails:
+        session.expunge_all()
+        started = timer.perf_counter()
+        user = session.execute(build(email)).scalars().first()
+        timings.append(timer.perf_counter() - started)
+        if user is None:
+            raise SystemExit(f"{email} was not found")
+    timings.sort()
+    ms = lambda value: round(value * 1000, 3)
+    return {
+        "p50_ms": ms(timings[len(timings) // 2]),
+        "p95_ms": ms(timings[int(len(timings) * 0.95) - 1]),
+        "plan": query_plan(session, build(emails[0])),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=100000, help="accounts to seed")
+    parser.add_argument("--lookups", type=int, default=2000, help="logins to time per variant")
+    parser.add_argument("--before-lookups", type=int, default=200,
+                        help="logins to time for the scanning variant, which is much slower")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    rng = random.Random(0)
+    # Logins arrive in whatever case the user typed
+    emails = [f" first.LAST{rng.randrange(args.employees)}@example.COM" for _ in range(args.lookups)]
+    with Session(engine) as session:
+        seed(session, args.employees)
+        results = {
+            "employees": args.employees,
+            "before": measure(before, session, emails[:args.before_lookups]),
+            "after": measure(after, session, emails),
+        }
+    results["speedup_p50"] = round(results["before"]["p50_ms"] / results["after"]["p50_ms"], 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# cache.py
+"""Read-through cache for departments and department membership.
+
+Department data changes rarely but is read on every admin listing and manager
+permission check. Entries expire after CACHE_TTL_SECONDS and are deleted
+explicitly by the crud functions that change them (create_department,
+create_employee, update_employee).
+
+Storage is pluggable. MemoryBackend keeps entries in the process; with several
+uvicorn workers each would only see its own invalidations, so a CacheBackend
+shared between workers (SqliteBackend on one host, or any network store
+implementing the same three methods) keeps them coherent.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import CACHE_TTL_SECONDS, CACHE_BACKEND
+
+
+class CacheBackend:
+    """Key/value storage for ReadThroughCache. Values are JSON-compatible."""
+
+    def get(self, key: str):
+        """The stored value, or None when missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: float):
+        raise NotImplementedError
+
+    def delete(self, keys):
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    MAX_ENTRIES = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key, value, ttl):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.MAX_ENTRIES:
+                self._entries = {k: e for k, e in self._entries.items() if e[0] > now}
+            self._entries[key] = (now + ttl, value)
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class SqliteBackend(CacheBackend):
+    """Entries in one SQLite file, shared by every worker process on the host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_entry (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM cache_entry WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entry (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl),
+            )
+
+    def delete(self, keys):
+        keys = list(keys)
+        if keys:
+            with self._connection() as conn:
+                conn.executemany("DELETE FROM cache_entry WHERE key = ?", [(key,) for key in keys])
+
+
+def make_backend(url: str) -> CacheBackend:
+    if url == "memory":
+        return MemoryBackend()
+    if url.startswith("sqlite:///"):
+        path = url[len("sqlite:///"):]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return SqliteBackend(path)
+    raise ValueError(f"Unsupported CACHE_BACKEND {url!r}; use 'memory' or 'sqlite:///path'")
+
+
+class ReadThroughCache:
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    # Values are wrapped so a cached None is distinguishable from a miss
+    def get_or_load(self, key: str, loader):
+        entry = self.backend.get(key)
+        if entry is None:
+            entry = {"value": loader()}
+            self.backend.set(key, entry, self.ttl)
+        return entry["value"]
+
+    async def aget_or_load(self, key: str, loader):
+        """Like get_or_load; loader is an async function."""
+        entry = self.backend.get(key)
+        if entry is None:
+            entry = {"value": await loader()}
+            self.backend.set(key, entry, self.ttl)
+        return entry["value"]
+
+    def invalidate(self, *keys):
+        self.backend.delete(keys)
+
+
+cache = ReadThroughCache(make_backend(CACHE_BACKEND), CACHE_TTL_SECONDS)
+
+DEPARTMENTS_KEY = "departments"
+
+
+def members_key(department_name: str) -> str:
+    return f"department:{department_name}:members"
+
+
+def employee_scope_key(employee_id: str) -> str:
+    return f"employee:{employee_id}:scope"
+
+
+def principal_key(employee_id: str) -> str:
+    """Role and department of an employee, checked against their token on every request (see security.py)."""
+    return f"employee:{employee_id}:principal"
+
+
+def invalidate_departments():
+    cache.invalidate(DEPARTMENTS_KEY)
+
+
+def invalidate_employee(employee_id: str, *department_names):
+    """Forget an employee's scope and the member lists of the departments it was or is in."""
+    cache.invalidate(employee_scope_key(employee_id), *(members_key(name) for name in department_names if name))
+
+
+def invalidate_employees(employee_ids, department_names):
+    """invalidate_employee for many employees in one backend call."""
+    cache.invalidate(
+        *(employee_scope_key(employee_id) for employee_id in employee_ids),
+        *(members_key(name) for name in set(department_names) if name),
+    )
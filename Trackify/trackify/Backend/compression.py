@@ -0,0 +1,168 @@
+# compression.py
+"""Response compression negotiated from Accept-Encoding: Brotli, then gzip.
+
+A pure ASGI middleware, so streaming responses (the CSV/NDJSON export) are
+compressed chunk by chunk, while small bodies, already-encoded bodies, partial
+responses and event streams are passed through untouched. It only relies on
+the ASGI message protocol, not on Starlette internals. Brotli is used when the
+brotli package is installed; without it clients get gzip.
+"""
+import asyncio
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional: fall back to gzip only
+    brotli = None
+
+
+def accepted_encodings(accept_encoding: str) -> dict:
+    """Map of coding -> q value from an Accept-Encoding header."""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: str):
+    """Best coding we can produce for the client: br, gzip or None for identity."""
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:  # ties keep the earlier (smaller output) coding
+            best, best_q = coding, q
+    return best
+
+
+# Already compressed, or must reach the client unbuffered
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "application/gzip", "application/zip", "image/", "audio/", "video/")
+# Chunks at least this large are compressed on a worker thread instead of the event loop
+THREAD_MINIMUM_SIZE = 128 * 1024
+
+
+class GzipCompressor:
+    content_encoding = "gzip"
+
+    def __init__(self, level: int = 6):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        if more_body:
+            return self.compressor.compress(body) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        return self.compressor.compress(body) + self.compressor.flush()
+
+
+class BrotliCompressor:
+    content_encoding = "br"
+
+    def __init__(self, quality: int = 4):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        if more_body:
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+
+class CompressingSend:
+    """The send callable of one response.
+
+    http.response.start is held back until the first body message shows whether
+    the response is worth compressing; compressor None only adds Vary.
+    """
+
+    def __init__(self, send, compressor, minimum_size: int):
+        self.send = send
+        self.compressor = compressor
+        self.minimum_size = minimum_size
+        self.start = None
+        self.passthrough = False
+        self.compressing = False
+
+    async def compress(self, body: bytes, more_body: bool) -> bytes:
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await asyncio.to_thread(self.compressor.compress, body, more_body)
+        return self.compressor.compress(body, more_body)
+
+    async def __call__(self, message):
+        if self.passthrough:
+            await self.send(message)
+        elif message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] == 206
+                or media_type.startswith(EXCLUDED_CONTENT_TYPES)
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start = message
+        elif message["type"] != "http.response.body":
+            if self.start is not None:  # e.g. pathsend: the body is not ours to compress
+                await self.send(self.start)
+                self.start = None
+            await self.send(message)
+        elif self.start is None:
+            # Remaining chunks of a streaming response
+            if self.compressing:
+                message = {**message, "body": await self.compress(message.get("body", b""), message.get("more_body", False))}
+            await self.send(message)
+        else:
+            start, self.start = self.start, None
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if more_body or len(body) >= self.minimum_size:
+                headers = MutableHeaders(scope=start)
+                headers.add_vary_header("Accept-Encoding")
+                if self.compressor is not None:
+                    self.compressing = True
+                    body = await self.compress(body, more_body)
+                    headers["Content-Encoding"] = self.compressor.content_encoding
+                    if more_body:
+                        del headers["Content-Length"]
+                    else:
+                        headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+            await self.send(start)
+            await self.send(message)
+
+
+class CompressionMiddleware:
+    """Compress responses of at least minimum_size bytes with the client's preferred coding."""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding == "br":
+            compressor = BrotliCompressor(self.brotli_quality)
+        elif encoding == "gzip":
+            compressor = GzipCompressor(self.gzip_level)
+        else:
+            compressor = None
+        await self.app(scope, receive, CompressingSend(send, compressor, self.minimum_size))
@@ -14,3 +14,66 @@ ALGORITHM = "HS256"
 # Token expiration in minutes
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+
+# How long an employee's cached role and department are trusted before the employee row is
+# re-checked. Kept in CACHE_BACKEND; with the per-process "memory" backend this is also how
+# long other workers may keep accepting a role or department that was changed.
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300"))
+
+# Timesheet listings are paginated; clients may ask for up to the max per page
+TIMESHEET_PAGE_SIZE = int(os.getenv("TIMESHEET_PAGE_SIZE", "100"))
+TIMESHEET_PAGE_SIZE_MAX = int(os.getenv("TIMESHEET_PAGE_SIZE_MAX", "500"))
+
+# Maximum number of entries accepted by POST /timesheets/batch
+TIMESHEET_BATCH_MAX = int(os.getenv("TIMESHEET_BATCH_MAX", "100"))
+
+# Rows fetched from the server-side cursor and written per chunk by GET /timesheets/export
+TIMESHEET_EXPORT_CHUNK_ROWS = int(os.getenv("TIMESHEET_EXPORT_CHUNK_ROWS", "1000"))
+
+# pbkdf2_sha256 rounds for new password hashes. A login whose stored hash uses other
+# rounds (or bcrypt) is rehashed, so changing this migrates users as they sign in.
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+
+# Worker processes that hash and verify passwords (0 = hash in the calling thread)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+# Hash jobs that may wait for a worker; beyond this callers get 503 instead of queueing
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+# Passwords hashed per pool job by bulk operations (POST /admin/employees/import)
+PASSWORD_HASH_CHUNK = int(os.getenv("PASSWORD_HASH_CHUNK", "32"))
+
+# Statements slower than this (milliseconds) are logged with their parameter shape
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+# Department list and membership cache: entry lifetime, and where entries live.
+# "memory" is per process; "sqlite:////path/cache.db" is shared by every worker on the host.
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+
+# Responses smaller than this (bytes) are sent uncompressed; larger ones use Brotli or gzip
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Timesheet event stream (GET /events/timesheets): events buffered per subscriber before
+# it is told to resync, and the keep-alive comment interval for idle connections
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+# POST /admin/employees/import: rows accepted per request, and rows inserted per transaction
+EMPLOYEE_IMPORT_MAX = int(os.getenv("EMPLOYEE_IMPORT_MAX", "10000"))
+EMPLOYEE_IMPORT_BATCH = int(os.getenv("EMPLOYEE_IMPORT_BATCH", "500"))
+
+# archive.py moves approved timesheets dated more than this many days ago into timesheet_archive,
+# TIMESHEET_ARCHIVE_BATCH rows per transaction. On MySQL the archive is range-partitioned by
+# TIMESHEET_ARCHIVE_PARTITION ("month" or "year") of the timesheet date.
+TIMESHEET_ARCHIVE_HORIZON_DAYS = int(os.getenv("TIMESHEET_ARCHIVE_HORIZON_DAYS", "365"))
+TIMESHEET_ARCHIVE_BATCH = int(os.getenv("TIMESHEET_ARCHIVE_BATCH", "5000"))
+TIMESHEET_ARCHIVE_PARTITION = os.getenv("TIMESHEET_ARCHIVE_PARTITION", "month")
+
+# snapshots.py writes closed months of timesheets as column files under this directory, and
+# GET /reports/analytics reads them. Timesheets submitted more than ANALYTICS_LATE_DAYS days
+# after their date count as late submissions unless the request asks for another threshold.
+ANALYTICS_SNAPSHOT_DIR = os.getenv("ANALYTICS_SNAPSHOT_DIR", "analytics_snapshots")
+ANALYTICS_LATE_DAYS = int(os.getenv("ANALYTICS_LATE_DAYS", "7"))
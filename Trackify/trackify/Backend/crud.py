@@ -1,53 +1,108 @@
 # crud.py
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from passlib.context import CryptContext
-from passlib.exc import UnknownHashError
+from sqlalchemy import func, and_, or_, select, insert, update, literal, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from pydantic import ValidationError
 import models
-from datetime import datetime
+import schemas
+import hashing
+import metrics
+import rollups
+import versions
+import events
+import steps
+from datetime import datetime, date
 from uuid import uuid4
+import hashlib
+from security import invalidate_principal
+from cache import cache, DEPARTMENTS_KEY, members_key, employee_scope_key, invalidate_departments, invalidate_employee
+from cache import invalidate_employees
+from config import TIMESHEET_PAGE_SIZE, EMPLOYEE_IMPORT_BATCH
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256", "bcrypt"], deprecated="auto")
+# Hashing runs on the bounded worker pool in hashing.py
+
+
+# ===================== Shared Operations =====================
+def run(db: Session, operation, *args):
+    """Carry out operation(dialect, *args), a generator of steps.py steps, on the session; returns its result."""
+    running = steps.Operation(operation(db.get_bind().dialect, *args))
+    step = running.resume()
+    while not running.done:
+        try:
+            value, error = perform(db, step), None
+        except Exception as e:
+            value, error = None, e
+        step = running.resume(value, error)
+    return running.result
+
+def perform(db: Session, step):
+    if isinstance(step, steps.Execute):
+        return db.execute(step.statement, step.params)
+    if isinstance(step, steps.Get):
+        return db.get(step.model, step.key)
+    if isinstance(step, steps.Commit):
+        return db.commit()
+    if isinstance(step, steps.Rollback):
+        return db.rollback()
+    if isinstance(step, steps.Refresh):
+        return db.refresh(step.instance)
+    if isinstance(step, steps.HashPasswords):
+        return hashing.hash_passwords(step.passwords)
+    if isinstance(step, steps.Departments):
+        return list_departments(db)
+    if isinstance(step, steps.DepartmentId):
+        return department_id_for(db, step.department_name)
+    if isinstance(step, steps.StageEvents):
+        return events.stage(db, step.changes, step.departments)
+    raise TypeError(f"Unknown step {step!r}")
 
 
 # ===================== User Authentication =====================
 def verify_password(plain_password, hashed_password):
-    try:
-        return pwd_context.verify(plain_password, hashed_password)
-    except UnknownHashError:
-        # Fallback for legacy plaintext or unknown formats
-        return plain_password == hashed_password
+    return hashing.verify_and_update(plain_password, hashed_password)[0]
 
 def get_password_hash(password):
-    # Use pbkdf2_sha256 for new hashes to avoid bcrypt's 72-byte input limit
-    try:
-        return pwd_context.hash(password, scheme="pbkdf2_sha256")
-    except Exception:
-        # Fallback to default behavior if explicit scheme fails
-        return pwd_context.hash(password)
+    return hashing.hash_password(password)
+
+def normalize_email(email) -> str:
+    return (email or "").strip().lower()
 
 def get_user_by_email(db: Session, email: str):
-    normalized = (email or "").strip().lower()
-    return db.query(models.Employee).filter(func.lower(models.Employee.email) == normalized).first()
+    # uq_employee_email_normalized makes this a single index seek
+    return db.query(models.Employee).filter(models.Employee.email_normalized == normalize_email(email)).first()
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = get_user_by_email(db, email)
-    if not user:
-        return None
-    
+def check_password(user, password: str):
+    """(verified, new_hash); new_hash is set when the stored hash uses outdated rounds or scheme."""
     # Prefer password_hash if available; fallback to legacy plain-text field if present
     stored_hash = getattr(user, "password_hash", None)
     if stored_hash:
         try:
-            if not verify_password(password, stored_hash):
-                return None
-        except Exception as e:
-            return None
-    else:
-        legacy_plain = getattr(user, "password", None)
-        if legacy_plain is None or legacy_plain != password:
-            return None
-    
+            return hashing.verify_and_update(password, stored_hash)
+        except hashing.HasherBusy:
+            raise
+        except Exception:
+            return False, None
+    return legacy_password_matches(user, password), None
+
+def legacy_password_matches(user, password: str) -> bool:
+    legacy_plain = getattr(user, "password", None)
+    return legacy_plain is not None and legacy_plain == password
+
+def authenticate_user(db: Session, email: str, password: str):
+    user = get_user_by_email(db, email)
+    if not user:
+        metrics.record_login("unknown_email")
+        return None
+    verified, new_hash = check_password(user, password)
+    if not verified:
+        metrics.record_login("wrong_password")
+        return None
+    metrics.record_login("success")
+    if new_hash:
+        # The password is known now, so move the stored hash to the current rounds/scheme
+        user.password_hash = new_hash
+        db.commit()
     return user
 
 
@@ -56,8 +111,10 @@ def get_employee_by_id(db: Session, employee_id: str):
     return db.query(models.Employee).filter(models.Employee.employee_id == employee_id).first()
 
 
-def create_employee(db: Session, employee):
-    hashed_password = get_password_hash(employee.password)
+def build_employee(employee, hashed_password: str = None) -> models.Employee:
+    """New Employee row for an EmployeeCreate, with the password hashed unless a hash is passed."""
+    if hashed_password is None:
+        hashed_password = get_password_hash(employee.password)
     # Coerce role to RoleEnum for DB integrity
     try:
         role_value = models.RoleEnum(employee.role) if not isinstance(employee.role, models.RoleEnum) else employee.role
@@ -67,66 +124,652 @@ def create_employee(db: Session, employee):
 
     # Generate an employee_id if missing/blank
     provided_id = getattr(employee, "employee_id", None)
-    employee_id = (provided_id or "").strip() or ("EMP" + uuid4().hex[:12].upper())
+    employee_id = (provided_id or "").strip() or new_employee_id()
 
-    db_employee = models.Employee(
+    return models.Employee(
         employee_id=employee_id,
         email=employee.email,
+        email_normalized=normalize_email(employee.email),
         password_hash=hashed_password,
         name=employee.name,
         surname=employee.surname,
         role=role_value,
-        department_name=employee.department_name
+        department_name=employee.department_name,
+        department_id=department_id_subquery(employee.department_name),
     )
+
+def new_employee_id() -> str:
+    return "EMP" + uuid4().hex[:12].upper()
+
+def department_id_subquery(department_name):
+    """department_id of the department named department_name, resolved by the database when the row is written."""
+    return select(models.Department.department_id).where(models.Department.name == department_name).scalar_subquery()
+
+def employee_department_id_subquery(employee_id: str):
+    return select(models.Employee.department_id).where(models.Employee.employee_id == employee_id).scalar_subquery()
+
+def move_employee_timesheets_queries(employee_id: str, department_name):
+    """Point an employee's timesheets, live and archived, at their (new) department."""
+    return tuple(
+        update(source).where(source.employee_id == employee_id).values(
+            department_id=department_id_subquery(department_name)
+        ).execution_options(synchronize_session=False)
+        for source in (models.Timesheet, models.TimesheetArchive)
+    )
+
+def attach_department_queries(department_name: str):
+    """Link employees (and their live and archived timesheets) that already carried a new department's name."""
+    members = select(models.Employee.employee_id).where(models.Employee.department_name == department_name)
+    return (
+        update(models.Employee).where(models.Employee.department_name == department_name)
+        .values(department_id=department_id_subquery(department_name)).execution_options(synchronize_session=False),
+        *(
+            update(source).where(source.employee_id.in_(members))
+            .values(department_id=department_id_subquery(department_name)).execution_options(synchronize_session=False)
+            for source in (models.Timesheet, models.TimesheetArchive)
+        ),
+    )
+
+def create_employee(db: Session, employee):
+    db_employee = build_employee(employee)
     db.add(db_employee)
+    bump_employee_versions(db, db_employee.employee_id, db_employee.department_name)
     db.commit()
     db.refresh(db_employee)
+    invalidate_employee(db_employee.employee_id, db_employee.department_name)
     return db_employee
 
-def update_employee(db: Session, employee_id: str, update_data):
-    emp = db.query(models.Employee).filter(models.Employee.employee_id == employee_id).first()
+def update_employee_steps(dialect, employee_id: str, update_data):
+    emp = yield steps.Get(models.Employee, employee_id)
     if not emp:
         raise ValueError("Employee not found")
+    previous_claims = (emp.role, emp.department_name)
     for key, value in update_data.dict(exclude_unset=True).items():
         setattr(emp, key, value)
-    db.commit()
-    db.refresh(emp)
+    emp.email_normalized = normalize_email(emp.email)
+    if emp.department_name != previous_claims[1]:
+        emp.department_id = department_id_subquery(emp.department_name)
+        for statement in move_employee_timesheets_queries(emp.employee_id, emp.department_name):
+            yield steps.Execute(statement)
+    # Timesheet listings carry employee details too. The department scopes cover the
+    # archive branch of those listings as well, so one bump per department suffices.
+    yield from bump_employee_versions_steps(dialect, emp.employee_id, previous_claims[1], emp.department_name)
+    yield steps.Commit()
+    yield steps.Refresh(emp)
+    invalidate_employee(emp.employee_id, previous_claims[1], emp.department_name)
+    # Tokens embed role and department; make the next request re-check them
+    if (emp.role, emp.department_name) != previous_claims:
+        invalidate_principal(emp.employee_id)
     return emp
 
+def update_employee(db: Session, employee_id: str, update_data):
+    return run(db, update_employee_steps, employee_id, update_data)
+
+
+# ===================== Listing Versions =====================
+def bump_versions_steps(dialect, scopes):
+    if scopes:
+        yield steps.Execute(versions.bump_statement(dialect.name), versions.bump_params(scopes))
+
+def bump_versions(db: Session, scopes):
+    """Increment the scope_version counters of scopes inside the current transaction."""
+    return run(db, bump_versions_steps, scopes)
+
+def employee_departments_steps(dialect, employee_ids):
+    if not employee_ids:
+        return {}
+    return dict((yield steps.Execute(versions.employee_departments_query(employee_ids))).all())
+
+def employee_departments(db: Session, employee_ids) -> dict:
+    """employee_id -> department_name for the given employees."""
+    return run(db, employee_departments_steps, employee_ids)
+
+def bump_employee_versions_steps(dialect, employee_id: str, *department_names):
+    yield from bump_versions_steps(dialect, {versions.EMPLOYEES} | versions.timesheet_scopes([employee_id], department_names))
+
+def bump_employee_versions(db: Session, employee_id: str, *department_names):
+    return run(db, bump_employee_versions_steps, employee_id, *department_names)
+
+def get_scope_version(db: Session, scope: str) -> int:
+    return db.execute(versions.version_query(scope)).scalar_one()
+
+
+# ===================== Employee Import =====================
+IMPORT_REQUIRED_FIELDS = ("email", "password", "name", "surname")
+
+def validate_employee_import(rows):
+    """Validate import rows (dicts from JSON or CSV) in one pass.
+
+    Returns (results, valid): one result dict per row in input order, and the
+    valid rows as (result, EmployeeImportItem) pairs with stripped values, a
+    role and an employee_id (generated when missing) filled in. Emails and IDs
+    repeated within the import are invalid after their first occurrence.
+    """
+    results, valid = [], []
+    seen_emails, seen_ids = set(), set()
+    roles = {role.value for role in models.RoleEnum}
+    for index, row in enumerate(rows):
+        result = {"index": index, "employee_id": None, "email": None, "result": None, "detail": None}
+        results.append(result)
+        try:
+            item = schemas.EmployeeImportItem.model_validate(row)
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            result.update(result="invalid", detail=f"{field}: {error['msg']}" if field else error["msg"])
+            continue
+        # Blank CSV cells count as missing; passwords are taken as given
+        values = {key: (value.strip() or None) if isinstance(value, str) and key != "password" else value
+                  for key, value in item.model_dump().items()}
+        values["role"] = values["role"] or models.RoleEnum.employee.value
+        item = schemas.EmployeeImportItem(**values)
+        result.update(employee_id=item.employee_id, email=item.email)
+
+        email_key = normalize_email(item.email)
+        missing = [field for field in IMPORT_REQUIRED_FIELDS if not getattr(item, field)]
+        if missing:
+            result.update(result="invalid", detail=f"Missing required fields: {', '.join(missing)}")
+        elif item.role not in roles:
+            result.update(result="invalid", detail=f"Invalid role {item.role!r}")
+        elif item.employee_id and len(item.employee_id) > models.Employee.employee_id.type.length:
+            result.update(result="invalid", detail="Employee ID is too long")
+        elif email_key in seen_emails:
+            result.update(result="invalid", detail=f"Email {item.email} appears more than once in the import")
+        elif item.employee_id and item.employee_id in seen_ids:
+            result.update(result="invalid", detail=f"Employee ID {item.employee_id} appears more than once in the import")
+        else:
+            item.employee_id = result["employee_id"] = item.employee_id or new_employee_id()
+            valid.append((result, item))
+        seen_emails.add(email_key)
+        seen_ids.add(item.employee_id)
+    return results, valid
+
+def existing_emails_query(emails):
+    """The given normalized emails that are already in use."""
+    return select(models.Employee.email_normalized).where(models.Employee.email_normalized.in_(list(emails)))
+
+def existing_employee_ids_query(employee_ids):
+    return select(models.Employee.employee_id).where(models.Employee.employee_id.in_(list(employee_ids)))
+
+def drop_existing_employees(valid, existing_emails, existing_ids):
+    """Mark valid rows whose email or ID is taken as duplicates; returns the rest."""
+    remaining = []
+    for result, item in valid:
+        if normalize_email(item.email) in existing_emails:
+            result.update(result="duplicate", detail="Email already in use")
+        elif item.employee_id in existing_ids:
+            result.update(result="duplicate", detail="Employee ID already exists")
+        else:
+            remaining.append((result, item))
+    return remaining
+
+def employee_import_rows(valid, password_hashes, department_ids: dict) -> list:
+    """INSERT parameter dicts for valid import rows; department_ids maps name -> department_id."""
+    return [
+        {
+            "employee_id": item.employee_id,
+            "email": item.email,
+            "email_normalized": normalize_email(item.email),
+            "password_hash": password_hash,
+            "name": item.name,
+            "surname": item.surname,
+            "role": models.RoleEnum(item.role),
+            "department_name": item.department_name,
+            "department_id": department_ids.get(item.department_name),
+        }
+        for (_, item), password_hash in zip(valid, password_hashes)
+    ]
+
+def import_employees_steps(dialect, rows):
+    results, valid = validate_employee_import(rows)
+    if valid:
+        emails = {normalize_email(item.email) for _, item in valid}
+        existing_emails = set((yield steps.Execute(existing_emails_query(emails))).scalars())
+        existing_ids = set((yield steps.Execute(existing_employee_ids_query({item.employee_id for _, item in valid}))).scalars())
+        valid = drop_existing_employees(valid, existing_emails, existing_ids)
+    if not valid:
+        return results
+
+    # Hash everything before writing, so a busy pool (HasherBusy) fails the import cleanly
+    password_hashes = yield steps.HashPasswords([item.password for _, item in valid])
+    department_ids = {d["name"]: d["department_id"] for d in (yield steps.Departments())}
+    params = employee_import_rows(valid, password_hashes, department_ids)
+    for start in range(0, len(valid), EMPLOYEE_IMPORT_BATCH):
+        batch, batch_params = valid[start:start + EMPLOYEE_IMPORT_BATCH], params[start:start + EMPLOYEE_IMPORT_BATCH]
+        try:
+            yield steps.Execute(insert(models.Employee), batch_params)
+            yield from bump_versions_steps(dialect, [versions.EMPLOYEES])
+            yield steps.Commit()
+        except IntegrityError:
+            yield steps.Rollback()
+            for pair, row in zip(batch, batch_params):
+                try:
+                    yield steps.Execute(insert(models.Employee), [row])
+                    yield from bump_versions_steps(dialect, [versions.EMPLOYEES])
+                    yield steps.Commit()
+                except IntegrityError:
+                    yield steps.Rollback()
+                    pair[0].update(result="duplicate", detail="Email or employee ID already exists")
+                else:
+                    pair[0]["result"] = "created"
+        else:
+            for result, _ in batch:
+                result["result"] = "created"
+
+    created = [item for result, item in valid if result["result"] == "created"]
+    invalidate_employees([item.employee_id for item in created], [item.department_name for item in created])
+    return results
+
+def import_employees(db: Session, rows):
+    """Create employees from import rows, returning one result per row.
+
+    Emails and IDs are checked against the database with one query each,
+    passwords are hashed in parallel on the hashing pool, and rows are inserted
+    EMPLOYEE_IMPORT_BATCH per transaction. A batch that hits a concurrent
+    insert is retried row by row so only the conflicting rows fail.
+    """
+    return run(db, import_employees_steps, rows)
+
 
 # ===================== Department CRUD =====================
 def create_department(db: Session, department):
     db_department = models.Department(name=department.name)
     db.add(db_department)
+    db.flush()
+    for statement in attach_department_queries(db_department.name):
+        db.execute(statement)
     db.commit()
     db.refresh(db_department)
+    invalidate_departments()
     return db_department
 
 def get_employees_by_department(db: Session, department_name: str):
     return db.query(models.Employee).filter(models.Employee.department_name == department_name).all()
 
 
+# ===================== Cached Department Reads =====================
+# Plain dicts, so any cache backend can store them; shaped like DepartmentResponse / EmployeeResponse
+def department_record(department) -> dict:
+    return {"department_id": department.department_id, "name": department.name}
+
+def employee_record(employee) -> dict:
+    return {
+        "employee_id": employee.employee_id,
+        "email": employee.email,
+        "name": employee.name,
+        "surname": employee.surname,
+        "role": models.RoleEnum(employee.role).value,
+        "department_name": employee.department_name,
+    }
+
+def employee_scope_record(employee):
+    """What permission checks need to know about an employee; None if it does not exist."""
+    if employee is None:
+        return None
+    return {"department_name": employee.department_name, "role": models.RoleEnum(employee.role).value}
+
+def filter_members(members: list, role=None) -> list:
+    if role is None:
+        return members
+    role = models.RoleEnum(role).value
+    return [member for member in members if member["role"] == role]
+
+def list_departments(db: Session) -> list:
+    return cache.get_or_load(
+        DEPARTMENTS_KEY, lambda: [department_record(d) for d in db.query(models.Department).all()]
+    )
+
+def department_exists(db: Session, department_name: str) -> bool:
+    return any(department["name"] == department_name for department in list_departments(db))
+
+def get_department_members(db: Session, department_name: str, role=None) -> list:
+    members = cache.get_or_load(
+        members_key(department_name),
+        lambda: [employee_record(e) for e in get_employees_by_department(db, department_name)],
+    )
+    return filter_members(members, role)
+
+def department_id_for(db: Session, department_name: str):
+    """department_id for a department name, from the cached department list; None if there is no such department."""
+    if not department_name:
+        return None
+    return next((d["department_id"] for d in list_departments(db) if d["name"] == department_name), None)
+
+def get_employee_scope(db: Session, employee_id: str):
+    return cache.get_or_load(
+        employee_scope_key(employee_id), lambda: employee_scope_record(get_employee_by_id(db, employee_id))
+    )
+
+
 # ===================== Timesheet CRUD =====================
-def create_timesheet(db: Session, employee_id: str, timesheet):
+def calculate_total_hours(day, clock_in, clock_out):
+    clock_in_datetime = datetime.combine(day, clock_in)
+    clock_out_datetime = datetime.combine(day, clock_out)
+    return (clock_out_datetime - clock_in_datetime).total_seconds() / 3600
+
+def apply_timesheet_changes_steps(dialect, deltas):
+    if deltas:
+        yield steps.Execute(rollups.upsert_statement(dialect.name), deltas.params())
+    departments = yield from employee_departments_steps(dialect, deltas.employee_ids)
+    yield from bump_versions_steps(dialect, versions.timesheet_scopes(deltas.employee_ids, departments.values()))
+    yield steps.StageEvents(deltas.changes, departments)
+    metrics.record_transitions(deltas.transitions)
+
+def apply_timesheet_changes(db: Session, deltas):
+    """Add a RollupDeltas to timesheet_hours_rollup and bump the listing versions
+    of the employees it touches, inside the current transaction. Status changes
+    are staged as events and published once the transaction commits."""
+    return run(db, apply_timesheet_changes_steps, deltas)
+
+def record_timesheet_change_steps(dialect, before, after, timesheet_id=None):
+    deltas = rollups.RollupDeltas()
+    deltas.change(before, after, timesheet_id)
+    yield from apply_timesheet_changes_steps(dialect, deltas)
+
+def record_timesheet_change(db: Session, before, after, timesheet_id=None):
+    """Roll up one timesheet moving between rollups.snapshot() states (None for created/deleted)."""
+    return run(db, record_timesheet_change_steps, before, after, timesheet_id)
+
+def build_timesheet(employee_id: str, timesheet) -> models.Timesheet:
     # Calculate total hours
-    clock_in_datetime = datetime.combine(timesheet.date, timesheet.clock_in)
-    clock_out_datetime = datetime.combine(timesheet.date, timesheet.clock_out)
-    total_hours = (clock_out_datetime - clock_in_datetime).total_seconds() / 3600
+    total_hours = calculate_total_hours(timesheet.date, timesheet.clock_in, timesheet.clock_out)
     
-    db_timesheet = models.Timesheet(
+    return models.Timesheet(
         employee_id=employee_id,
         date=timesheet.date,
         clock_in=timesheet.clock_in,
         clock_out=timesheet.clock_out,
         total_hours=total_hours,
         status=models.StatusEnum.pending,
-        description=timesheet.description
+        description=timesheet.description,
+        department_id=employee_department_id_subquery(employee_id),
+        submitted_at=datetime.utcnow(),
     )
+
+def create_timesheet(db: Session, employee_id: str, timesheet):
+    db_timesheet = build_timesheet(employee_id, timesheet)
     db.add(db_timesheet)
+    try:
+        db.flush()
+    except IntegrityError:
+        # uq_timesheet_employee_date: the employee already has a timesheet for this date
+        db.rollback()
+        raise
+    record_timesheet_change(db, None, rollups.snapshot(db_timesheet), db_timesheet.timesheet_id)
     db.commit()
     db.refresh(db_timesheet)
     return db_timesheet
 
+# ---------- Timesheet Submission ----------
+class TimesheetExists(ValueError):
+    """The employee already has a timesheet for the date and it is not rejected."""
+
+class IdempotencyKeyReused(ValueError):
+    """An Idempotency-Key came back with a different timesheet than it was first sent with."""
+
+def insert_skipping_duplicates(table, dialect_name: str, index_elements):
+    """INSERT that leaves out a row clashing with a unique key instead of failing,
+    so the transaction stays usable; rowcount tells whether the row went in."""
+    if dialect_name == "mysql":
+        # ON DUPLICATE KEY UPDATE with a no-op would count as 1 affected row under CLIENT_FOUND_ROWS
+        return mysql.insert(table).prefix_with("IGNORE")
+    # sqlite or postgresql; database.check_dialect refuses anything else at startup
+    stmt = (sqlite if dialect_name == "sqlite" else postgresql).insert(table)
+    return stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+def submission_values(employee_id: str, timesheet) -> dict:
+    return {
+        "employee_id": employee_id,
+        "date": timesheet.date,
+        "clock_in": timesheet.clock_in,
+        "clock_out": timesheet.clock_out,
+        "description": timesheet.description,
+        "total_hours": calculate_total_hours(timesheet.date, timesheet.clock_in, timesheet.clock_out),
+        "status": models.StatusEnum.pending,
+        "submitted_at": datetime.utcnow(),
+    }
+
+def submission_insert_statement(dialect_name: str, values: dict, returning: bool):
+    """Insert of a submitted timesheet that does nothing when the date is already taken,
+    in timesheet (uq_timesheet_employee_date) or in timesheet_archive."""
+    table = models.Timesheet.__table__
+    archived = select(models.TimesheetArchive.timesheet_id).where(
+        models.TimesheetArchive.employee_id == values["employee_id"],
+        models.TimesheetArchive.date == values["date"],
+    )
+    row = select(
+        *(literal(value, table.c[column].type) for column, value in values.items()),
+        employee_department_id_subquery(values["employee_id"]),
+    ).where(~archived.exists())
+    stmt = insert_skipping_duplicates(table, dialect_name, ["employee_id", "date"]).from_select(
+        [*values, "department_id"], row
+    )
+    return stmt.returning(table.c.timesheet_id) if returning else stmt
+
+def inserted_timesheet_id(result, returning: bool):
+    """The id of the row a submission_insert_statement added, or None when it added nothing."""
+    if returning:
+        return result.scalar()
+    return result.lastrowid if result.rowcount else None
+
+def reopen_statement(existing, values: dict):
+    """Overwrite a rejected timesheet with a new submission and set it back to pending.
+
+    existing is the row as read by existing_timesheets_query. The update only
+    applies while the row is still rejected with those hours, so the rollup
+    change computed from existing is exact; if a concurrent request approved,
+    re-opened or edited it in between, no row is updated.
+    """
+    return update(models.Timesheet).where(
+        models.Timesheet.timesheet_id == existing.timesheet_id,
+        models.Timesheet.status == models.StatusEnum.rejected,
+        models.Timesheet.total_hours.is_not_distinct_from(existing.total_hours),
+    ).values({key: value for key, value in values.items() if key not in ("employee_id", "date")})
+
+def is_rejected(existing) -> bool:
+    return existing is not None and models.StatusEnum(existing.status) == models.StatusEnum.rejected
+
+def timesheet_exists_error(day) -> TimesheetExists:
+    return TimesheetExists(f"Timesheet already exists for date {day}. Only one timesheet per day is allowed.")
+
+def submission_fingerprint(timesheet) -> str:
+    fields = (timesheet.date, timesheet.clock_in, timesheet.clock_out, timesheet.description)
+    return hashlib.sha256(repr(fields).encode()).hexdigest()
+
+def idempotency_claim(employee_id: str, key: str, timesheet) -> dict:
+    return {
+        "employee_id": employee_id,
+        "key": key,
+        "request_hash": submission_fingerprint(timesheet),
+        "created_at": datetime.utcnow(),
+    }
+
+def claim_idempotency_key_statement(dialect_name: str):
+    return insert_skipping_duplicates(models.IdempotencyKey.__table__, dialect_name, ["employee_id", "key"])
+
+def replayed_timesheet_id(record, claim: dict) -> int:
+    """The timesheet stored by the first request with this key, after checking the retry sent the same fields."""
+    if record.request_hash != claim["request_hash"]:
+        raise IdempotencyKeyReused("This Idempotency-Key was already used for a different timesheet")
+    return record.timesheet_id
+
+def replayed_timesheet_query(employee_id: str, day, timesheet_id: int):
+    """The timesheet a replayed submission returns, live or moved to timesheet_archive since.
+
+    Timesheets are never deleted, so exactly one branch has it. day is the
+    submitted date, which the request fingerprint guarantees is the original one.
+    """
+    return union_all(*(
+        select(
+            source.timesheet_id, source.employee_id, source.date, source.clock_in, source.clock_out,
+            source.total_hours, source.status, source.description,
+        ).where(source.employee_id == employee_id, source.date == day, source.timesheet_id == timesheet_id)
+        for source in (models.Timesheet, models.TimesheetArchive)
+    ))
+
+def complete_idempotency_key_statement(claim: dict, timesheet_id: int):
+    return update(models.IdempotencyKey).where(
+        models.IdempotencyKey.employee_id == claim["employee_id"],
+        models.IdempotencyKey.key == claim["key"],
+    ).values(timesheet_id=timesheet_id)
+
+def submit_timesheet_steps(dialect, employee_id: str, timesheet, idempotency_key=None):
+    claim = idempotency_claim(employee_id, idempotency_key, timesheet) if idempotency_key is not None else None
+    if claim is not None and not (yield steps.Execute(claim_idempotency_key_statement(dialect.name), claim)).rowcount:
+        record = yield steps.Get(models.IdempotencyKey, (employee_id, idempotency_key))
+        timesheet_id = replayed_timesheet_id(record, claim)
+        return (yield steps.Execute(replayed_timesheet_query(employee_id, timesheet.date, timesheet_id))).one(), "replayed"
+
+    values = submission_values(employee_id, timesheet)
+    returning = dialect.insert_returning
+    inserted = yield steps.Execute(submission_insert_statement(dialect.name, values, returning))
+    timesheet_id = inserted_timesheet_id(inserted, returning)
+    if timesheet_id is not None:
+        before, result = None, "created"
+    else:
+        existing = (yield steps.Execute(existing_timesheets_query(employee_id, [timesheet.date]))).first()
+        if not is_rejected(existing) or not (yield steps.Execute(reopen_statement(existing, values))).rowcount:
+            yield steps.Rollback()
+            raise timesheet_exists_error(timesheet.date)
+        before = (employee_id, existing.date, existing.status, existing.total_hours)
+        timesheet_id, result = existing.timesheet_id, "reopened"
+
+    after = (employee_id, timesheet.date, values["status"], values["total_hours"])
+    yield from record_timesheet_change_steps(dialect, before, after, timesheet_id)
+    if claim is not None:
+        yield steps.Execute(complete_idempotency_key_statement(claim, timesheet_id))
+    yield steps.Commit()
+    return models.Timesheet(timesheet_id=timesheet_id, **values), result
+
+def submit_timesheet(db: Session, employee_id: str, timesheet, idempotency_key=None):
+    """Create a timesheet, or re-open the employee's rejected timesheet for the same date.
+
+    The common case is one INSERT that skips a taken date instead of raising
+    (see insert_skipping_duplicates). Only then is the existing row read and,
+    if rejected, re-opened by reopen_statement. Concurrent submissions for one
+    date cannot both insert, and nothing is rolled back on the way.
+
+    With an idempotency_key the key is claimed first, in the same transaction:
+    a retry waits for the original request to commit and then gets its
+    timesheet back instead of submitting again.
+
+    Returns (timesheet, result) with result created, reopened or replayed.
+    Raises TimesheetExists when the date holds a timesheet that is not rejected,
+    and IdempotencyKeyReused when the key came with different fields before.
+    """
+    return run(db, submit_timesheet_steps, employee_id, timesheet, idempotency_key)
+
+def validate_timesheet_batch(entries):
+    """Validate batch entries in one pass.
+
+    Returns (results, valid): one result dict per entry in input order, and the
+    valid entries keyed by date as (result, entry) pairs.
+    """
+    results = [{"index": i, "date": e.date, "result": None, "detail": None, "timesheet": None}
+               for i, e in enumerate(entries)]
+    today = date.today()
+    seen = set()
+    valid = {}
+    for result, entry in zip(results, entries):
+        if entry.date > today:
+            result.update(result="invalid", detail="Cannot submit timesheet for a future date")
+        elif entry.clock_out <= entry.clock_in:
+            result.update(result="invalid", detail="Clock out time must be after clock in time")
+        elif entry.date in seen:
+            result.update(result="invalid", detail=f"Date {entry.date} appears more than once in the batch")
+        else:
+            valid[entry.date] = (result, entry)
+        seen.add(entry.date)
+    return results, valid
+
+def existing_timesheets_query(employee_id: str, dates):
+    """The employee's timesheets on the given dates, live or archived (archived ones are approved, so never re-opened)."""
+    return union_all(*(
+        select(source.timesheet_id, source.date, source.status, source.total_hours).where(
+            source.employee_id == employee_id,
+            source.date.in_(list(dates)),
+        )
+        for source in (models.Timesheet, models.TimesheetArchive)
+    ))
+
+def plan_timesheet_batch(employee_id: str, valid, existing):
+    """Split valid entries into INSERT rows and re-open (UPDATE by primary key) rows.
+
+    existing maps date -> row of existing_timesheets_query. Marks each result as
+    created, reopened or duplicate. Returns (inserts, reopens, rollup deltas).
+    """
+    inserts, reopens = [], []
+    deltas = rollups.RollupDeltas()
+    submitted_at = datetime.utcnow()
+    for entry_date, (result, entry) in valid.items():
+        values = {
+            "clock_in": entry.clock_in,
+            "clock_out": entry.clock_out,
+            "description": entry.description,
+            "total_hours": calculate_total_hours(entry.date, entry.clock_in, entry.clock_out),
+            "status": models.StatusEnum.pending,
+            "submitted_at": submitted_at,
+        }
+        row = existing.get(entry_date)
+        if row is None:
+            inserts.append({"employee_id": employee_id, "date": entry_date, **values})
+            deltas.change(None, (employee_id, entry_date, values["status"], values["total_hours"]))
+            result["result"] = "created"
+        elif models.StatusEnum(row.status) == models.StatusEnum.rejected:
+            reopens.append({"timesheet_id": row.timesheet_id, **values})
+            deltas.change((employee_id, entry_date, row.status, row.total_hours),
+                          (employee_id, entry_date, values["status"], values["total_hours"]), row.timesheet_id)
+            result["result"] = "reopened"
+        else:
+            result.update(result="duplicate", detail=f"Timesheet already exists for date {entry_date}")
+    return inserts, reopens, deltas
+
+def written_batch_dates(valid):
+    return [d for d, (result, _) in valid.items() if result["result"] in ("created", "reopened")]
+
+def create_timesheets_batch_steps(dialect, employee_id: str, entries):
+    results, valid = validate_timesheet_batch(entries)
+    if not valid:
+        return results
+
+    existing = {row.date: row for row in (yield steps.Execute(existing_timesheets_query(employee_id, valid)))}
+    inserts, reopens, deltas = plan_timesheet_batch(employee_id, valid, existing)
+
+    try:
+        if inserts:
+            yield steps.Execute(insert(models.Timesheet).values(department_id=employee_department_id_subquery(employee_id)), inserts)
+        if reopens:
+            yield steps.Execute(update(models.Timesheet), reopens)
+        yield from apply_timesheet_changes_steps(dialect, deltas)
+        yield steps.Commit()
+    except IntegrityError:
+        # A concurrent submission took one of the dates; nothing from this batch was stored
+        yield steps.Rollback()
+        raise
+
+    written = written_batch_dates(valid)
+    if written:
+        for ts in (yield steps.Execute(timesheets_for_dates_query(employee_id, written))).scalars():
+            valid[ts.date][0]["timesheet"] = ts
+    return results
+
+def create_timesheets_batch(db: Session, employee_id: str, entries):
+    """Create many timesheets for one employee in a single transaction.
+
+    Entries are validated in one pass, checked against existing rows with one
+    query, inserted with one executemany and re-opened (if previously rejected)
+    with one executemany. Returns one result dict per entry, in input order:
+    {"index", "date", "result", "detail", "timesheet"} where result is
+    created, reopened, duplicate or invalid.
+    """
+    return run(db, create_timesheets_batch_steps, employee_id, entries)
+
+def timesheets_for_dates_query(employee_id: str, dates):
+    return select(models.Timesheet).where(
+        models.Timesheet.employee_id == employee_id,
+        models.Timesheet.date.in_(list(dates)),
+    )
+
 def get_timesheet(db: Session, employee_id: str, date):
     return db.query(models.Timesheet).filter(
         models.Timesheet.employee_id == employee_id,
@@ -140,19 +783,364 @@ def update_timesheet(db: Session, employee_id: str, date, update_data):
     ).first()
     if not ts:
         raise ValueError("Timesheet not found")
+    before = rollups.snapshot(ts)
     for key, value in update_data.dict(exclude_unset=True).items():
         setattr(ts, key, value)
+    record_timesheet_change(db, before, rollups.snapshot(ts), ts.timesheet_id)
     db.commit()
     db.refresh(ts)
     return ts
 
-def get_all_timesheets(db: Session):
-    return db.query(models.Timesheet).all()
+def get_all_timesheets(db: Session, date_from=None, date_to=None):
+    return db.execute(timesheets_query(date_from=date_from, date_to=date_to)).all()
+
+def get_employee_timesheets(db: Session, employee_id: str, date_from=None, date_to=None):
+    return db.execute(timesheets_query(employee_id, date_from=date_from, date_to=date_to)).all()
+
+def get_mentor_department_timesheets(db: Session, department_name: str, date_from=None, date_to=None):
+    return db.execute(timesheets_query(
+        department_name=department_name, date_from=date_from, date_to=date_to,
+        department_id=department_id_for(db, department_name),
+    )).all()
+
+def timesheet_department_clause(department_name: str, department_id=None, source=models.Timesheet):
+    """WHERE clause for a department's timesheets.
+
+    With the department's id this is an integer match on Timesheet.department_id
+    (ix_timesheet_department_*). Employees whose department_name has no department
+    row have no id, so without one fall back to matching the name through employee.
+    source is models.Timesheet or models.TimesheetArchive.
+    """
+    if department_id is not None:
+        return source.department_id == department_id
+    return source.employee_id.in_(department_members_query(department_name))
+
+def department_members_query(department_name: str, department_id=None):
+    """employee_ids of a department: by Employee.department_id (ix_employee_department_id) when
+    the department's id is known, by name for employees whose department has no row."""
+    if department_id is not None:
+        return select(models.Employee.employee_id).where(models.Employee.department_id == department_id)
+    return select(models.Employee.employee_id).where(models.Employee.department_name == department_name)
+
+
+def timesheet_sources(status=None):
+    """The tables a timesheet listing reads: timesheet, and timesheet_archive unless
+    the status filter rules out approved rows (the only ones archived, see archive.py).
+
+    The listing's date bounds are applied to each table, so on MySQL only the
+    archive partitions covering the range are read.
+    """
+    if status is not None and models.StatusEnum(status) != models.StatusEnum.approved:
+        return (models.Timesheet,)
+    return (models.Timesheet, models.TimesheetArchive)
+
+def filter_timesheets(query, date_from=None, date_to=None, status=None, employee_id=None, source=models.Timesheet):
+    """Apply the optional listing filters to a Timesheet (or TimesheetArchive) query or select()."""
+    if date_from is not None:
+        query = query.filter(source.date >= date_from)
+    if date_to is not None:
+        query = query.filter(source.date <= date_to)
+    if status is not None:
+        query = query.filter(source.status == models.StatusEnum(status))
+    if employee_id is not None:
+        query = query.filter(source.employee_id == employee_id)
+    return query
+
+def timesheet_columns(source=models.Timesheet):
+    """The columns of TimesheetResponse."""
+    return (
+        source.timesheet_id,
+        source.employee_id,
+        source.date,
+        source.clock_in,
+        source.clock_out,
+        source.total_hours,
+        source.status,
+        source.description,
+    )
+
+def timesheet_employee_columns(source=models.Timesheet):
+    """Timesheet columns plus the employee columns of TimesheetWithEmployeeInfoResponse, as flat labels."""
+    return (
+        source.timesheet_id,
+        source.employee_id,
+        models.Employee.name.label("employee_name"),
+        models.Employee.surname.label("employee_surname"),
+        models.Employee.email.label("employee_email"),
+        models.Employee.department_name.label("employee_department"),
+        source.date,
+        source.clock_in,
+        source.clock_out,
+        source.total_hours,
+        source.status,
+        source.description,
+    )
+
+def timesheet_listing_branch(source, employee_id=None, department_name=None, with_employee=False,
+                             date_from=None, date_to=None, status=None, department_id=None):
+    """select() of the listing columns of one timesheet table, with the listing filters applied."""
+    if with_employee:
+        query = select(*timesheet_employee_columns(source)).join(
+            models.Employee, source.employee_id == models.Employee.employee_id
+        )
+    else:
+        query = select(*timesheet_columns(source))
+    if department_name is not None:
+        query = query.where(timesheet_department_clause(department_name, department_id, source))
+    return filter_timesheets(query, date_from, date_to, status, employee_id, source)
+
+def order_timesheets(query, columns, newest_first: bool, limit: int = None):
+    key = (columns.date, columns.timesheet_id)
+    query = query.order_by(*(column.desc() for column in key) if newest_first else key)
+    return query.limit(limit) if limit is not None else query
+
+def merge_timesheet_branches(branches, newest_first: bool, limit: int = None):
+    """One select() over the branches (one per timesheet_sources table), ordered by (date, timesheet_id).
+
+    With a limit every branch is ordered and limited on its own index first, so
+    reading the archive costs at most limit more rows before the merge.
+    """
+    if len(branches) == 1:
+        return order_timesheets(branches[0], branches[0].selected_columns, newest_first, limit)
+    if limit is not None:
+        branches = [order_timesheets(branch, branch.selected_columns, newest_first, limit) for branch in branches]
+    merged = union_all(*(select(branch.subquery()) for branch in branches)).subquery()
+    return order_timesheets(select(merged), merged.c, newest_first, limit)
+
+def timesheets_query(employee_id: str = None, department_name: str = None, with_employee: bool = False,
+                     date_from=None, date_to=None, status=None, department_id: int = None):
+    """select() of every matching timesheet, live and archived, oldest first."""
+    filters = dict(employee_id=employee_id, department_name=department_name, with_employee=with_employee,
+                   date_from=date_from, date_to=date_to, status=status, department_id=department_id)
+    branches = [timesheet_listing_branch(source, **filters) for source in timesheet_sources(status)]
+    return merge_timesheet_branches(branches, newest_first=False)
+
+def timesheets_page_query(employee_id: str = None, department_name: str = None, with_employee: bool = False,
+                          date_from=None, date_to=None, status=None, after=None, limit: int = TIMESHEET_PAGE_SIZE,
+                          department_id: int = None):
+    """select() for one page of timesheets, newest first, keyed on (date, timesheet_id).
+
+    after is the (date, timesheet_id) key of the last row of the previous page.
+    One extra row is fetched so split_timesheet_page can tell whether more follow.
+    """
+    branches = []
+    for source in timesheet_sources(status):
+        query = timesheet_listing_branch(source, employee_id, department_name, with_employee,
+                                         date_from, date_to, status, department_id)
+        if after is not None:
+            after_date, after_id = after
+            query = query.where(or_(
+                source.date < after_date,
+                and_(source.date == after_date, source.timesheet_id < after_id),
+            ))
+        branches.append(query)
+    return merge_timesheet_branches(branches, newest_first=True, limit=limit + 1)
+
+def split_timesheet_page(rows, limit: int):
+    """Returns (rows, next_key); next_key is None on the last page."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1].date, rows[-1].timesheet_id)
+
+def pending_queue_filters(department_name: str, department_id=None):
+    """Pending timesheets of the department's employees (role employee), as join + where clauses."""
+    return (
+        timesheet_department_clause(department_name, department_id),
+        models.Timesheet.status == models.StatusEnum.pending,
+        models.Employee.role == models.RoleEnum.employee,
+    )
+
+def pending_queue_query(department_name: str, after=None, limit: int = TIMESHEET_PAGE_SIZE, department_id: int = None):
+    """select() for one page of the pending-approval queue, oldest first, keyed on (date, timesheet_id).
+
+    Served by ix_timesheet_department_status_date: only the department's pending
+    rows are read, in date order, never approved history.
+    """
+    query = select(models.Timesheet).join(
+        models.Employee, models.Timesheet.employee_id == models.Employee.employee_id
+    ).where(*pending_queue_filters(department_name, department_id))
+    if after is not None:
+        after_date, after_id = after
+        query = query.where(or_(
+            models.Timesheet.date > after_date,
+            and_(models.Timesheet.date == after_date, models.Timesheet.timesheet_id > after_id),
+        ))
+    return query.order_by(models.Timesheet.date, models.Timesheet.timesheet_id).limit(limit + 1)
+
+def pending_counts_query(department_name: str, department_id: int = None):
+    """Pending timesheets and oldest pending date per employee of the department, longest waiting first."""
+    oldest = func.min(models.Timesheet.date)
+    return select(
+        models.Employee.employee_id, models.Employee.name, models.Employee.surname,
+        func.count(models.Timesheet.timesheet_id).label("pending"), oldest.label("oldest_date"),
+    ).join(
+        models.Employee, models.Timesheet.employee_id == models.Employee.employee_id
+    ).where(*pending_queue_filters(department_name, department_id)).group_by(
+        models.Employee.employee_id, models.Employee.name, models.Employee.surname
+    ).order_by(oldest, models.Employee.employee_id)
+
+def get_pending_queue(db: Session, department_name: str, after=None, limit: int = TIMESHEET_PAGE_SIZE):
+    """Returns (rows, next_key, per-employee counts) for one page of the pending-approval queue."""
+    department_id = department_id_for(db, department_name)
+    rows = db.execute(pending_queue_query(department_name, after, limit, department_id)).scalars().all()
+    rows, next_key = split_timesheet_page(rows, limit)
+    return rows, next_key, db.execute(pending_counts_query(department_name, department_id)).all()
+
+def get_timesheets_page(db: Session, employee_id: str = None, department_name: str = None, with_employee: bool = False,
+                        date_from=None, date_to=None, status=None, after=None, limit: int = TIMESHEET_PAGE_SIZE):
+    """Page through timesheets of one employee, one department, or everyone.
+
+    With with_employee=True rows are flat timesheet_employee_columns() rows instead of Timesheet objects.
+    """
+    query = timesheets_page_query(employee_id, department_name, with_employee, date_from, date_to, status, after, limit,
+                                  department_id_for(db, department_name))
+    return split_timesheet_page(db.execute(query).all(), limit)
+
+def timesheets_export_query(employee_id: str = None, department_name: str = None,
+                            date_from=None, date_to=None, status=None, department_id: int = None):
+    """Flat column rows for exports, oldest first; no ORM objects are built per row."""
+    return timesheets_query(employee_id, department_name, True, date_from, date_to, status, department_id)
+
+
+def bulk_status_scope(employee_ids=None, department_name: str = None, employee_role=None, department_id=None):
+    """WHERE clauses selecting the timesheets of a bulk status update.
+
+    department_id is the id of department_name (see department_id_for), None if it has no department row.
+    """
+    scope = []
+    if employee_ids is not None:
+        scope.append(models.Timesheet.employee_id.in_(list(employee_ids)))
+    if department_name is not None:
+        scope.append(timesheet_department_clause(department_name, department_id))
+        if employee_role is not None:
+            members = department_members_query(department_name, department_id)
+            scope.append(models.Timesheet.employee_id.in_(
+                members.where(models.Employee.role == models.RoleEnum(employee_role))
+            ))
+    if not scope:
+        raise ValueError("A bulk status update needs employee_ids or a department")
+    return scope
+
+def bulk_status_update_query(new_status, scope, from_statuses=None, returning: bool = False):
+    stmt = update(models.Timesheet).where(*scope, models.Timesheet.status != new_status)
+    if from_statuses is not None:
+        stmt = stmt.where(models.Timesheet.status.in_([models.StatusEnum(s) for s in from_statuses]))
+    stmt = stmt.values(status=new_status).execution_options(synchronize_session=False)
+    return stmt.returning(models.Timesheet.timesheet_id) if returning else stmt
+
+def bulk_status_rows_query(new_status, scope, from_statuses=None):
+    """The rows a bulk_status_update_query will change, locked for the rest of the transaction."""
+    query = select(
+        models.Timesheet.timesheet_id, models.Timesheet.employee_id, models.Timesheet.date,
+        models.Timesheet.status, models.Timesheet.total_hours,
+    ).where(*scope, models.Timesheet.status != new_status)
+    if from_statuses is not None:
+        query = query.where(models.Timesheet.status.in_([models.StatusEnum(s) for s in from_statuses]))
+    return query.with_for_update()
+
+def bulk_status_deltas(new_status, rows):
+    deltas = rollups.RollupDeltas()
+    for row in rows:
+        deltas.change(rollups.snapshot(row), (row.employee_id, row.date, new_status, row.total_hours), row.timesheet_id)
+    return deltas
+
+def status_counts_query(scope):
+    return select(models.Timesheet.status, func.count()).where(*scope).group_by(models.Timesheet.status)
+
+def summarize_status_counts(rows):
+    counts = {s.value: 0 for s in models.StatusEnum}
+    for row_status, count in rows:
+        counts[models.StatusEnum(row_status).value] = count
+    return counts
+
+def bulk_update_timesheet_status_steps(dialect, new_status, employee_ids=None, department_name: str = None,
+                                       from_statuses=None, employee_role=None):
+    new_status = models.StatusEnum(new_status)
+    department_id = yield steps.DepartmentId(department_name)
+    scope = bulk_status_scope(employee_ids, department_name, employee_role, department_id)
+    rows = (yield steps.Execute(bulk_status_rows_query(new_status, scope, from_statuses))).all()
+    deltas = bulk_status_deltas(new_status, rows)
+
+    timesheet_ids = None
+    if dialect.update_returning:
+        result = yield steps.Execute(bulk_status_update_query(new_status, scope, from_statuses, returning=True))
+        timesheet_ids = list(result.scalars())
+        updated = len(timesheet_ids)
+    else:
+        updated = (yield steps.Execute(bulk_status_update_query(new_status, scope, from_statuses))).rowcount
+    yield from apply_timesheet_changes_steps(dialect, deltas)
+
+    counts = summarize_status_counts((yield steps.Execute(status_counts_query(scope))).all())
+    yield steps.Commit()
+    return {"updated": updated, "status": new_status.value, "counts": counts, "timesheet_ids": timesheet_ids}
+
+def bulk_update_timesheet_status(db: Session, new_status, employee_ids=None, department_name: str = None,
+                                 from_statuses=None, employee_role=None):
+    """Move every matching timesheet to new_status with a single UPDATE ... WHERE.
+
+    Scope by employee_ids, department_name or both (their intersection); employee_role
+    narrows the department to employees with that role. from_statuses limits which
+    current states may transition. Returns the number of rows changed, their ids when
+    the database supports UPDATE ... RETURNING (None otherwise), and the timesheet
+    counts per status across the scope after the update.
+    """
+    return run(db, bulk_update_timesheet_status_steps, new_status, employee_ids, department_name,
+               from_statuses, employee_role)
+
+
+# ===================== Hours Reports =====================
+def hours_rollup_filters(period, date_from=None, date_to=None, employee_id=None, department_name=None, status=None,
+                         department_id=None):
+    """WHERE clauses over timesheet_hours_rollup; date bounds select whole periods by their start date.
+
+    department_id is the id of department_name (see department_id_for), None if it has no department row.
+    """
+    rollup = models.TimesheetHoursRollup
+    filters = [rollup.period == models.PeriodEnum(period), rollup.entry_count > 0]
+    if date_from is not None:
+        # The period containing date_from starts on or before it
+        filters.append(rollup.period_start >= dict(rollups.period_starts(date_from))[models.PeriodEnum(period)])
+    if date_to is not None:
+        filters.append(rollup.period_start <= date_to)
+    if employee_id is not None:
+        filters.append(rollup.employee_id == employee_id)
+    if department_name is not None:
+        filters.append(rollup.employee_id.in_(department_members_query(department_name, department_id)))
+    if status is not None:
+        filters.append(rollup.status == models.StatusEnum(status))
+    return filters
+
+def hours_rollup_query(**filters):
+    """One row per (employee, period, status), read straight from the rollup table."""
+    rollup = models.TimesheetHoursRollup
+    return select(
+        rollup.employee_id, rollup.period, rollup.period_start, rollup.status, rollup.total_hours, rollup.entry_count
+    ).where(*hours_rollup_filters(**filters)).order_by(
+        rollup.period_start.desc(), rollup.employee_id, rollup.status
+    )
+
+def department_hours_rollup_query(**filters):
+    """Rollup rows summed per (department, period, status)."""
+    rollup = models.TimesheetHoursRollup
+    return select(
+        models.Employee.department_name,
+        rollup.period,
+        rollup.period_start,
+        rollup.status,
+        func.sum(rollup.total_hours).label("total_hours"),
+        func.sum(rollup.entry_count).label("entry_count"),
+        func.count(rollup.employee_id).label("employee_count"),
+    ).join(models.Employee, models.Employee.employee_id == rollup.employee_id).where(
+        *hours_rollup_filters(**filters)
+    ).group_by(
+        models.Employee.department_name, rollup.period, rollup.period_start, rollup.status
+    ).order_by(rollup.period_start.desc(), models.Employee.department_name, rollup.status)
 
-def get_employee_timesheets(db: Session, employee_id: str):
-    return db.query(models.Timesheet).filter(models.Timesheet.employee_id == employee_id).all()
+def get_hours_rollup(db: Session, **filters):
+    department_id = department_id_for(db, filters.get("department_name"))
+    return db.execute(hours_rollup_query(department_id=department_id, **filters)).all()
 
-def get_mentor_department_timesheets(db: Session, department_name: str):
-    return db.query(models.Timesheet).join(models.Employee).filter(
-        models.Employee.department_name == department_name
-    ).all()
+def get_department_hours_rollup(db: Session, **filters):
+    department_id = department_id_for(db, filters.get("department_name"))
+    return db.execute(department_hours_rollup_query(department_id=department_id, **filters)).all()
@@ -0,0 +1,295 @@
+# crud_async.py
+"""AsyncSession versions of the crud.py functions.
+
+Queries, validation and row construction are shared with crud.py; only the
+database round trips differ. Multi-step writes are the crud.py operations
+themselves (see steps.py), carried out here by run.
+"""
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+import rollups
+import versions
+import events
+import hashing
+import metrics
+import steps
+from config import TIMESHEET_PAGE_SIZE
+from crud import (
+    normalize_email,
+    legacy_password_matches,
+    build_employee,
+    update_employee_steps,
+    bump_versions_steps,
+    employee_departments_steps,
+    bump_employee_versions_steps,
+    import_employees_steps,
+    attach_department_queries,
+    apply_timesheet_changes_steps,
+    record_timesheet_change_steps,
+    build_timesheet,
+    submit_timesheet_steps,
+    create_timesheets_batch_steps,
+    bulk_update_timesheet_status_steps,
+    timesheets_query,
+    timesheets_page_query,
+    split_timesheet_page,
+    pending_queue_query,
+    pending_counts_query,
+    hours_rollup_query,
+    department_hours_rollup_query,
+    department_record,
+    employee_record,
+    employee_scope_record,
+    filter_members,
+)
+from cache import cache, DEPARTMENTS_KEY, members_key, employee_scope_key, invalidate_departments, invalidate_employee
+
+
+# ===================== Shared Operations =====================
+async def run(db: AsyncSession, operation, *args):
+    """See crud.run."""
+    running = steps.Operation(operation(db.get_bind().dialect, *args))
+    step = running.resume()
+    while not running.done:
+        try:
+            value, error = await perform(db, step), None
+        except Exception as e:
+            value, error = None, e
+        step = running.resume(value, error)
+    return running.result
+
+async def perform(db: AsyncSession, step):
+    if isinstance(step, steps.Execute):
+        return await db.execute(step.statement, step.params)
+    if isinstance(step, steps.Get):
+        return await db.get(step.model, step.key)
+    if isinstance(step, steps.Commit):
+        return await db.commit()
+    if isinstance(step, steps.Rollback):
+        return await db.rollback()
+    if isinstance(step, steps.Refresh):
+        return await db.refresh(step.instance)
+    if isinstance(step, steps.HashPasswords):
+        return await hashing.ahash_passwords(step.passwords)
+    if isinstance(step, steps.Departments):
+        return await list_departments(db)
+    if isinstance(step, steps.DepartmentId):
+        return await department_id_for(db, step.department_name)
+    if isinstance(step, steps.StageEvents):
+        return events.stage(db, step.changes, step.departments)
+    raise TypeError(f"Unknown step {step!r}")
+
+
+# ===================== User Authentication =====================
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.Employee).where(models.Employee.email_normalized == normalize_email(email)))
+    return result.scalars().first()
+
+async def check_password(user, password: str):
+    """See crud.check_password."""
+    stored_hash = getattr(user, "password_hash", None)
+    if stored_hash:
+        try:
+            return await hashing.averify_and_update(password, stored_hash)
+        except hashing.HasherBusy:
+            raise
+        except Exception:
+            return False, None
+    return legacy_password_matches(user, password), None
+
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    user = await get_user_by_email(db, email)
+    if not user:
+        metrics.record_login("unknown_email")
+        return None
+    verified, new_hash = await check_password(user, password)
+    if not verified:
+        metrics.record_login("wrong_password")
+        return None
+    metrics.record_login("success")
+    if new_hash:
+        # The password is known now, so move the stored hash to the current rounds/scheme
+        user.password_hash = new_hash
+        await db.commit()
+    return user
+
+
+# ===================== Employee CRUD =====================
+async def get_employee_by_id(db: AsyncSession, employee_id: str):
+    return await db.get(models.Employee, employee_id)
+
+async def create_employee(db: AsyncSession, employee):
+    db_employee = build_employee(employee, await hashing.ahash_password(employee.password))
+    db.add(db_employee)
+    await bump_employee_versions(db, db_employee.employee_id, db_employee.department_name)
+    await db.commit()
+    await db.refresh(db_employee)
+    invalidate_employee(db_employee.employee_id, db_employee.department_name)
+    return db_employee
+
+async def update_employee(db: AsyncSession, employee_id: str, update_data):
+    return await run(db, update_employee_steps, employee_id, update_data)
+
+
+# ===================== Listing Versions =====================
+async def bump_versions(db: AsyncSession, scopes):
+    """See crud.bump_versions."""
+    return await run(db, bump_versions_steps, scopes)
+
+async def employee_departments(db: AsyncSession, employee_ids) -> dict:
+    return await run(db, employee_departments_steps, employee_ids)
+
+async def bump_employee_versions(db: AsyncSession, employee_id: str, *department_names):
+    return await run(db, bump_employee_versions_steps, employee_id, *department_names)
+
+async def get_scope_version(db: AsyncSession, scope: str) -> int:
+    return (await db.execute(versions.version_query(scope))).scalar_one()
+
+
+# ===================== Employee Import =====================
+async def import_employees(db: AsyncSession, rows):
+    """See crud.import_employees."""
+    return await run(db, import_employees_steps, rows)
+
+
+# ===================== Department CRUD =====================
+async def create_department(db: AsyncSession, department):
+    db_department = models.Department(name=department.name)
+    db.add(db_department)
+    await db.flush()
+    for statement in attach_department_queries(db_department.name):
+        await db.execute(statement)
+    await db.commit()
+    await db.refresh(db_department)
+    invalidate_departments()
+    return db_department
+
+async def get_employees_by_department(db: AsyncSession, department_name: str, role=None):
+    query = select(models.Employee).where(models.Employee.department_name == department_name)
+    if role is not None:
+        query = query.where(models.Employee.role == models.RoleEnum(role))
+    return (await db.execute(query)).scalars().all()
+
+
+# ===================== Cached Department Reads =====================
+async def list_departments(db: AsyncSession) -> list:
+    async def load():
+        return [department_record(d) for d in (await db.execute(select(models.Department))).scalars()]
+    return await cache.aget_or_load(DEPARTMENTS_KEY, load)
+
+async def get_department_members(db: AsyncSession, department_name: str, role=None) -> list:
+    async def load():
+        return [employee_record(e) for e in await get_employees_by_department(db, department_name)]
+    return filter_members(await cache.aget_or_load(members_key(department_name), load), role)
+
+async def department_id_for(db: AsyncSession, department_name: str):
+    """See crud.department_id_for."""
+    if not department_name:
+        return None
+    return next((d["department_id"] for d in await list_departments(db) if d["name"] == department_name), None)
+
+async def get_employee_scope(db: AsyncSession, employee_id: str):
+    async def load():
+        return employee_scope_record(await get_employee_by_id(db, employee_id))
+    return await cache.aget_or_load(employee_scope_key(employee_id), load)
+
+
+# ===================== Timesheet CRUD =====================
+async def apply_timesheet_changes(db: AsyncSession, deltas):
+    """See crud.apply_timesheet_changes."""
+    return await run(db, apply_timesheet_changes_steps, deltas)
+
+async def record_timesheet_change(db: AsyncSession, before, after, timesheet_id=None):
+    """See crud.record_timesheet_change."""
+    return await run(db, record_timesheet_change_steps, before, after, timesheet_id)
+
+async def create_timesheet(db: AsyncSession, employee_id: str, timesheet):
+    db_timesheet = build_timesheet(employee_id, timesheet)
+    db.add(db_timesheet)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # uq_timesheet_employee_date: the employee already has a timesheet for this date
+        await db.rollback()
+        raise
+    await record_timesheet_change(db, None, rollups.snapshot(db_timesheet), db_timesheet.timesheet_id)
+    await db.commit()
+    await db.refresh(db_timesheet)
+    return db_timesheet
+
+async def submit_timesheet(db: AsyncSession, employee_id: str, timesheet, idempotency_key=None):
+    """See crud.submit_timesheet."""
+    return await run(db, submit_timesheet_steps, employee_id, timesheet, idempotency_key)
+
+async def create_timesheets_batch(db: AsyncSession, employee_id: str, entries):
+    """See crud.create_timesheets_batch."""
+    return await run(db, create_timesheets_batch_steps, employee_id, entries)
+
+async def get_timesheet(db: AsyncSession, employee_id: str, date):
+    result = await db.execute(select(models.Timesheet).where(
+        models.Timesheet.employee_id == employee_id,
+        models.Timesheet.date == date
+    ))
+    return result.scalars().first()
+
+async def get_timesheet_by_id(db: AsyncSession, timesheet_id: int):
+    return await db.get(models.Timesheet, timesheet_id)
+
+async def update_timesheet(db: AsyncSession, employee_id: str, date, update_data):
+    ts = await get_timesheet(db, employee_id, date)
+    if not ts:
+        raise ValueError("Timesheet not found")
+    before = rollups.snapshot(ts)
+    for key, value in update_data.dict(exclude_unset=True).items():
+        setattr(ts, key, value)
+    await record_timesheet_change(db, before, rollups.snapshot(ts), ts.timesheet_id)
+    await db.commit()
+    await db.refresh(ts)
+    return ts
+
+async def get_all_timesheets(db: AsyncSession, date_from=None, date_to=None):
+    return (await db.execute(timesheets_query(date_from=date_from, date_to=date_to))).all()
+
+async def get_employee_timesheets(db: AsyncSession, employee_id: str, date_from=None, date_to=None):
+    return (await db.execute(timesheets_query(employee_id, date_from=date_from, date_to=date_to))).all()
+
+async def get_mentor_department_timesheets(db: AsyncSession, department_name: str, date_from=None, date_to=None):
+    return (await db.execute(timesheets_query(
+        department_name=department_name, date_from=date_from, date_to=date_to,
+        department_id=await department_id_for(db, department_name),
+    ))).all()
+
+async def get_timesheets_page(db: AsyncSession, employee_id: str = None, department_name: str = None, with_employee: bool = False,
+                              date_from=None, date_to=None, status=None, after=None, limit: int = TIMESHEET_PAGE_SIZE):
+    """See crud.get_timesheets_page."""
+    query = timesheets_page_query(employee_id, department_name, with_employee, date_from, date_to, status, after, limit,
+                                  await department_id_for(db, department_name))
+    return split_timesheet_page((await db.execute(query)).all(), limit)
+
+async def get_pending_queue(db: AsyncSession, department_name: str, after=None, limit: int = TIMESHEET_PAGE_SIZE):
+    """See crud.get_pending_queue."""
+    department_id = await department_id_for(db, department_name)
+    rows = (await db.execute(pending_queue_query(department_name, after, limit, department_id))).scalars().all()
+    rows, next_key = split_timesheet_page(rows, limit)
+    return rows, next_key, (await db.execute(pending_counts_query(department_name, department_id))).all()
+
+async def bulk_update_timesheet_status(db: AsyncSession, new_status, employee_ids=None, department_name: str = None,
+                                       from_statuses=None, employee_role=None):
+    """See crud.bulk_update_timesheet_status."""
+    return await run(db, bulk_update_timesheet_status_steps, new_status, employee_ids, department_name,
+                     from_statuses, employee_role)
+
+
+# ===================== Hours Reports =====================
+async def get_hours_rollup(db: AsyncSession, **filters):
+    """See crud.get_hours_rollup."""
+    department_id = await department_id_for(db, filters.get("department_name"))
+    return (await db.execute(hours_rollup_query(department_id=department_id, **filters))).all()
+
+async def get_department_hours_rollup(db: AsyncSession, **filters):
+    """See crud.get_department_hours_rollup."""
+    department_id = await department_id_for(db, filters.get("department_name"))
+    return (await db.execute(department_hours_rollup_query(department_id=department_id, **filters))).all()
@@ -0,0 +1,94 @@
+# db_pool.py
+"""Connection pools that record how long callers wait for a connection.
+
+database.py builds both engines with these pool classes; pool_snapshot()
+returns the live numbers served by GET /health/pool.
+"""
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolStats:
+    """Cumulative checkout counters and a wait-time histogram for one pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_sum = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)  # last bucket is +Inf
+
+    def observe_wait(self, seconds: float, timed_out: bool = False):
+        index = next((i for i, bound in enumerate(WAIT_BUCKETS) if seconds <= bound), len(WAIT_BUCKETS))
+        with self._lock:
+            self.wait_seconds_sum += seconds
+            self.wait_buckets[index] += 1
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            buckets = list(self.wait_buckets)
+            result = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_sum": round(self.wait_seconds_sum, 6),
+            }
+        # Cumulative, Prometheus-style: each bucket counts waits <= its bound
+        histogram, running = {}, 0
+        for bound, count in zip(list(WAIT_BUCKETS) + ["+Inf"], buckets):
+            running += count
+            histogram[str(bound)] = running
+        result["wait_seconds_buckets"] = histogram
+        return result
+
+
+class _WaitTimingMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        # QueuePool._do_get blocks until a connection is free (or pool_timeout expires)
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.observe_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.observe_wait(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_snapshot(pool) -> dict:
+    """Current occupancy of a pool plus its cumulative wait statistics, if instrumented."""
+    snapshot = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        snapshot.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            # QueuePool counts overflow from -pool_size; only connections beyond pool_size are overflow
+            "overflow": max(pool.overflow(), 0),
+            "timeout": pool.timeout(),
+        })
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        snapshot.update(stats.snapshot())
+    return snapshot
@@ -0,0 +1,149 @@
+# events.py
+"""Timesheet change notifications for the SSE endpoint (routers/events.py).
+
+apply_timesheet_changes stages one event per status change on the session
+(db.info); they are published when that session commits and dropped when it
+rolls back, so subscribers never hear about writes that did not happen.
+
+Events go to channels by audience:
+- employee:<id>          the employee whose timesheet changed
+- department:<name>      managers of that employee's department
+- all                    admins
+
+The broker is pluggable. InMemoryBroker only reaches subscribers connected
+to the same process; with several uvicorn workers, an EventBroker over a
+shared pub/sub (Redis, Postgres LISTEN/NOTIFY, ...) implementing publish and
+subscribe takes its place via set_broker.
+"""
+import asyncio
+import itertools
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import EVENTS_QUEUE_SIZE
+
+PENDING_KEY = "timesheet_events"
+
+
+def employee_channel(employee_id: str) -> str:
+    return f"employee:{employee_id}"
+
+
+def department_channel(department_name) -> str:
+    return f"department:{department_name}"
+
+
+ALL_CHANNEL = "all"
+
+
+class Subscription:
+    """One subscriber's bounded queue. A full queue drops events and flags the loss."""
+
+    def __init__(self, channels, maxsize: int):
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.lost = False
+
+    def _put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.lost = True
+
+    def deliver(self, item):
+        # Publishers may run on a threadpool worker (sync endpoints); hand over to the subscriber's loop
+        self.loop.call_soon_threadsafe(self._put, item)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class EventBroker:
+    def publish(self, channels, item: dict):
+        raise NotImplementedError
+
+    def subscribe(self, channels) -> Subscription:
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription: Subscription):
+        raise NotImplementedError
+
+
+class InMemoryBroker(EventBroker):
+    def __init__(self, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def publish(self, channels, item):
+        with self._lock:
+            subscribers = {s for c in channels for s in self._channels.get(c, ())}
+        for subscription in subscribers:
+            subscription.deliver(item)
+
+    def subscribe(self, channels):
+        subscription = Subscription(channels, self.queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                members = self._channels.get(channel)
+                if members is not None:
+                    members.discard(subscription)
+                    if not members:
+                        del self._channels[channel]
+
+
+broker: EventBroker = InMemoryBroker()
+_event_ids = itertools.count(1)
+
+
+def set_broker(new_broker: EventBroker):
+    global broker
+    broker = new_broker
+
+
+def subscriber_channels(principal) -> list:
+    """Channels a user may listen to: their own, their department's (managers) or all (admins)."""
+    role = principal.role.value if hasattr(principal.role, "value") else str(principal.role)
+    if role in ("admin", "administrator"):
+        return [ALL_CHANNEL]
+    if role == "manager":
+        return [department_channel(principal.department_name)] if principal.department_name else []
+    return [employee_channel(principal.employee_id)]
+
+
+def event_type(change: dict) -> str:
+    return "timesheet.created" if change["from_status"] == "none" else "timesheet.status"
+
+
+def stage(db, changes, departments: dict):
+    """Queue RollupDeltas.changes on the session; departments maps employee_id -> department_name."""
+    if not changes:
+        return
+    pending = db.info.setdefault(PENDING_KEY, [])
+    for change in changes:
+        department_name = departments.get(change["employee_id"])
+        channels = [employee_channel(change["employee_id"]), ALL_CHANNEL]
+        if department_name:
+            channels.append(department_channel(department_name))
+        pending.append((channels, {"type": event_type(change), "department_name": department_name, **change}))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_staged(session):
+    for channels, item in session.info.pop(PENDING_KEY, ()):
+        broker.publish(channels, {"id": next(_event_ids), **item})
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_staged(session):
+    session.info.pop(PENDING_KEY, None)
+
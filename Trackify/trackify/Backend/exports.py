@@ -0,0 +1,83 @@
+# exports.py
+"""Encoders for GET /timesheets/export.
+
+Rows arrive in chunks from a server-side cursor (see timesheets_export_query
+in crud.py); each chunk is encoded to one bytes block so the response can be
+streamed without holding the whole export in memory.
+"""
+import csv
+import io
+import json
+
+EXPORT_FIELDS = (
+    "timesheet_id",
+    "employee_id",
+    "employee_name",
+    "employee_surname",
+    "employee_email",
+    "employee_department",
+    "date",
+    "clock_in",
+    "clock_out",
+    "total_hours",
+    "status",
+    "description",
+)
+
+
+def export_values(row) -> tuple:
+    """Plain JSON/CSV-friendly values of one export row, in EXPORT_FIELDS order."""
+    return (
+        row.timesheet_id,
+        row.employee_id,
+        row.employee_name,
+        row.employee_surname,
+        row.employee_email,
+        row.employee_department,
+        row.date.isoformat() if row.date is not None else None,
+        row.clock_in.isoformat() if row.clock_in is not None else None,
+        row.clock_out.isoformat() if row.clock_out is not None else None,
+        float(row.total_hours) if row.total_hours is not None else None,
+        row.status.value if hasattr(row.status, "value") else row.status,
+        row.description,
+    )
+
+
+class CsvEncoder:
+    media_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writerow(EXPORT_FIELDS)
+        return self._drain()
+
+    def encode(self, rows) -> bytes:
+        self._writer.writerows(export_values(row) for row in rows)
+        return self._drain()
+
+
+class NdjsonEncoder:
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, rows) -> bytes:
+        return "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, export_values(row))), separators=(",", ":")) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+ENCODERS = {"csv": CsvEncoder, "ndjson": NdjsonEncoder}
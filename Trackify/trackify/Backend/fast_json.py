@@ -0,0 +1,65 @@
+# fast_json.py
+"""orjson encoding for listing endpoints that return flat column rows.
+
+Handlers that return a Response built here skip FastAPI's response_model
+validation and its jsonable_encoder pass; the rows go straight from the
+database driver to JSON bytes. orjson handles date, time and Enum values
+natively; DECIMAL columns are written as floats.
+
+The columnar shape writes one array per column instead of one object per
+row, and moves repeated per-employee values into a dictionary keyed by
+employee_id:
+
+    {"count": 2,
+     "columns": {"timesheet_id": [7, 8], "employee_id": ["E1", "E1"], ...},
+     "employees": {"E1": {"name": ..., "surname": ..., "email": ..., "department": ...}}}
+"""
+from decimal import Decimal
+
+import orjson
+from fastapi import Response
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dump_rows(rows) -> bytes:
+    """JSON array of objects keyed by the rows' column labels."""
+    if not rows:
+        return b"[]"
+    fields = tuple(rows[0]._fields)
+    return orjson.dumps([dict(zip(fields, row)) for row in rows], default=_default)
+
+
+def rows_response(rows, headers: dict = None) -> Response:
+    return Response(content=dump_rows(rows), media_type="application/json", headers=headers)
+
+
+def dump_columns(rows, fields, prefix: str = "employee_", key: str = "employee_id") -> bytes:
+    """Columnar JSON of rows (result rows or ORM objects) for the given fields.
+
+    Fields starting with prefix (other than key itself) go to the employees
+    dictionary under key, once per employee, with the prefix stripped; the rest
+    become column arrays.
+    """
+    employee_fields = [f for f in fields if f.startswith(prefix) and f != key]
+    column_fields = [f for f in fields if f not in employee_fields]
+    payload = {
+        "count": len(rows),
+        "columns": {f: [getattr(row, f) for row in rows] for f in column_fields},
+    }
+    if employee_fields:
+        employees = {}
+        for row in rows:
+            employee_id = getattr(row, key)
+            if employee_id not in employees:
+                employees[employee_id] = {f[len(prefix):]: getattr(row, f) for f in employee_fields}
+        payload["employees"] = employees
+    return orjson.dumps(payload, default=_default)
+
+
+def columns_response(rows, fields, headers: dict = None) -> Response:
+    return Response(content=dump_columns(rows, fields), media_type="application/json", headers=headers)
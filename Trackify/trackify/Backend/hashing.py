@@ -0,0 +1,180 @@
+# hashing.py
+"""Password hashing and verification on a bounded process pool.
+
+pbkdf2/bcrypt burn tens of milliseconds of CPU per call. Running them in the
+request threads lets a burst of logins starve every other endpoint, so the
+work goes to PASSWORD_HASH_WORKERS processes instead. At most
+PASSWORD_HASH_MAX_PENDING jobs may be queued or running; further callers get
+HasherBusy straight away (served as 503 by main.py) rather than piling up.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from passlib.context import CryptContext
+from passlib.exc import UnknownHashError
+
+from config import PASSWORD_HASH_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_CHUNK
+
+# min/max rounds equal to the default make needs_update() flag hashes made with other rounds
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256", "bcrypt"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__max_rounds=PASSWORD_HASH_ROUNDS,
+)
+
+
+class HasherBusy(Exception):
+    """Every hashing slot is taken; the caller should retry later."""
+
+
+# ---------- Worker functions (run inside the pool processes) ----------
+def _hash(password: str) -> str:
+    # Use pbkdf2_sha256 for new hashes to avoid bcrypt's 72-byte input limit
+    try:
+        return pwd_context.hash(password, scheme="pbkdf2_sha256")
+    except Exception:
+        # Fallback to default behavior if explicit scheme fails
+        return pwd_context.hash(password)
+
+
+def _hash_many(passwords: list) -> list:
+    return [_hash(password) for password in passwords]
+
+
+def _verify_and_update(password: str, stored_hash: str):
+    """(verified, new_hash); new_hash is set when the stored hash should be replaced."""
+    try:
+        return pwd_context.verify_and_update(password, stored_hash)
+    except UnknownHashError:
+        # Legacy plaintext or unknown formats: compare directly and upgrade on success
+        if password == stored_hash:
+            return True, _hash(password)
+        return False, None
+
+
+# ---------- Pool ----------
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max(max_pending, 1)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the API process is multi-threaded by the time the first login arrives
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _claim(self):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy("Too many password operations in progress")
+
+    @contextmanager
+    def _slot(self):
+        self._claim()
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def submit(self, fn, *args):
+        self._claim()
+        try:
+            future = self._pool().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        if self.workers <= 0:
+            # Without a pool the same slots still bound the work in progress
+            with self._slot():
+                return fn(*args)
+        return self.submit(fn, *args).result()
+
+    async def arun(self, fn, *args):
+        if self.workers <= 0:
+            # hashlib's pbkdf2 releases the GIL, so a worker thread keeps the event loop free
+            with self._slot():
+                return await asyncio.to_thread(fn, *args)
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    # Bulk work runs as chunks of items per job, with no more chunks in flight than there
+    # are workers, so single hashes (logins) still get a slot between chunks.
+    @property
+    def parallelism(self) -> int:
+        return self.workers if self.workers > 0 else min(os.cpu_count() or 1, self.max_pending)
+
+    def run_chunked(self, fn, items: list, chunk_size: int) -> list:
+        """fn(list) -> list over items in chunks; results in input order."""
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        if self.workers <= 0:
+            with ThreadPoolExecutor(self.parallelism) as pool:
+                return [result for part in pool.map(lambda chunk: self.run(fn, chunk), chunks) for result in part]
+        results, in_flight = [], deque()
+        for chunk in chunks:
+            if len(in_flight) >= self.parallelism:
+                results.extend(in_flight.popleft().result())
+            in_flight.append(self.submit(fn, chunk))
+        while in_flight:
+            results.extend(in_flight.popleft().result())
+        return results
+
+    async def arun_chunked(self, fn, items: list, chunk_size: int) -> list:
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        limit = asyncio.Semaphore(self.parallelism)
+
+        async def run_chunk(chunk):
+            async with limit:
+                return await self.arun(fn, chunk)
+
+        parts = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        return [result for part in parts for result in part]
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+
+def hash_password(password: str) -> str:
+    return hasher.run(_hash, password)
+
+
+async def ahash_password(password: str) -> str:
+    return await hasher.arun(_hash, password)
+
+
+def hash_passwords(passwords) -> list:
+    """Hashes of many passwords, spread over the pool; same order as passwords."""
+    return hasher.run_chunked(_hash_many, list(passwords), PASSWORD_HASH_CHUNK)
+
+
+async def ahash_passwords(passwords) -> list:
+    return await hasher.arun_chunked(_hash_many, list(passwords), PASSWORD_HASH_CHUNK)
+
+
+def verify_and_update(password: str, stored_hash: str):
+    return hasher.run(_verify_and_update, password, stored_hash)
+
+
+async def averify_and_update(password: str, stored_hash: str):
+    return await hasher.arun(_verify_and_update, password, stored_hash)
@@ -1,21 +1,29 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, Header, Path, Body
+from fastapi import FastAPI, Depends, HTTPException, Query, Header, Path, Body, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from jose import jwt, JWTError
-from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from jose import jwt, JWTError
 
 import os
 
-from database import engine, Base, get_db
-import models, schemas, crud
+from database import engine, async_engine, get_db, get_async_db
+from db_pool import pool_snapshot
+from query_stats import QueryStatsMiddleware, instrument
+from compression import CompressionMiddleware
+import metrics
+import models, schemas, crud, crud_async
+import versions
+from hashing import HasherBusy
 from schemas import LoginRequest, TokenResponse, LogoutResponse
 from schemas import DepartmentResponse, DepartmentCreate, EmployeeResponse, TimesheetResponse
+from schemas import EmployeeUpdate
 
-from routers import auth, timesheet, manager, department, employee
-from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
-from models import StatusEnum as TimesheetStatusEnum
+from routers import auth, timesheet, manager, department, employee, reports, events
+from security import Principal, get_current_user, create_access_token
+from pagination import encode_cursor, decode_cursor
+from config import TIMESHEET_PAGE_SIZE, TIMESHEET_PAGE_SIZE_MAX, COMPRESSION_MIN_BYTES, GZIP_LEVEL, BROTLI_QUALITY
+from models import Employee as EmployeeModel, Department as DepartmentModel
 
 # ------------------------------------------------------------
 # FastAPI App Initialization
@@ -38,8 +46,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],         # Allow all HTTP methods (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],         # Allow all headers
+    expose_headers=["X-Next-Cursor", "Server-Timing", "ETag", "Idempotent-Replayed"],  # Let the frontend read pagination cursors, timings, ETags and replays
 )
 
+# ------------------------------------------------------------
+# SQL statistics per request (Server-Timing header + trackify.request log lines)
+# ------------------------------------------------------------
+instrument(engine, async_engine.sync_engine)
+app.add_middleware(QueryStatsMiddleware)
+
+# ------------------------------------------------------------
+# Prometheus metrics (served by GET /metrics)
+# ------------------------------------------------------------
+metrics.register_pools({"sync": engine.pool, "async": async_engine.sync_engine.pool})
+app.add_middleware(metrics.MetricsMiddleware)
+
+# ------------------------------------------------------------
+# Brotli / gzip for large responses (listings and exports)
+# ------------------------------------------------------------
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_BYTES,
+                   gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY)
+
+# ------------------------------------------------------------
+# Backpressure from the password hashing pool
+# ------------------------------------------------------------
+@app.exception_handler(HasherBusy)
+async def hasher_busy_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many sign-ins in progress, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
 # ------------------------------------------------------------
 # Include Routers
 # ------------------------------------------------------------
@@ -48,33 +86,18 @@ app.include_router(timesheet.router)
 app.include_router(manager.router, prefix="/manager", tags=["manager"])
 app.include_router(department.router, prefix="/admin", tags=["admin"])
 app.include_router(employee.router)
+app.include_router(reports.router)
+app.include_router(events.router)
 
 # ------------------------------------------------------------
-# Create Tables
+# Tables
 # ------------------------------------------------------------
-Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic: run `alembic upgrade head` (see migrations/README).
 
 # ------------------------------------------------------------
-# JWT: Get Current User Dependency
+# Auth Dependencies (get_current_user lives in security.py)
 # ------------------------------------------------------------
-def get_current_user(Authorization: str = Header(...), db: Session = Depends(get_db)):
-    if not Authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
-    
-    token = Authorization.removeprefix("Bearer ").strip()
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-    except (JWTError, ValueError, KeyError):
-        raise HTTPException(status_code=401, detail="Invalid authentication token")
-    
-    user = db.query(EmployeeModel).filter(EmployeeModel.employee_id == str(user_id)).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    
-    return user
-
-def admin_or_mentor_required(current_user: EmployeeModel = Depends(get_current_user)):
+def admin_or_mentor_required(current_user: Principal = Depends(get_current_user)):
     if current_user.role not in ["admin", "manager"]:
         raise HTTPException(status_code=403, detail="Only admins and mentors can perform this action")
     return current_user
@@ -84,7 +107,7 @@ def admin_or_mentor_required(current_user: EmployeeModel = Depends(get_current_u
 def add_employee(
     employee: schemas.EmployeeCreate,
     db: Session = Depends(get_db),
-    current_user: EmployeeModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can add employees")
@@ -97,14 +120,13 @@ def add_employee(
 
 # ---------- Authentication Endpoints ----------
 @app.post("/login")
-def login(request: LoginRequest, db: Session = Depends(get_db)):
-    user = crud.authenticate_user(db, request.email, request.password)
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    # Verification runs on the hashing pool; the event loop keeps serving other requests meanwhile
+    user = await crud_async.authenticate_user(db, request.email, request.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode = {"sub": user.employee_id, "exp": expire}  # employee_id is string
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = create_access_token(user)
 
     return {
         "access_token": encoded_jwt,
@@ -120,26 +142,47 @@ def logout():
     # In stateless JWT, logout is client-side (token delete). Return success msg.
     return LogoutResponse(message="Logged out successfully. Please discard your token on the client.")
 
+# ---------- Health Endpoints ----------
+@app.get("/health/pool")
+def get_pool_health():
+    """Connection pool occupancy and checkout wait statistics for both engines."""
+    return {
+        "sync": pool_snapshot(engine.pool),
+        "async": pool_snapshot(async_engine.sync_engine.pool),
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition of request, login, pool and timesheet metrics."""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
 # ---------- Department Endpoints ----------
 @app.post("/departments/", response_model=DepartmentResponse)
 def create_department(
     department: DepartmentCreate,
     db: Session = Depends(get_db),
-    current_user: EmployeeModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    db_department = DepartmentModel(name=department.name)
-    db.add(db_department)
-    db.commit()
-    db.refresh(db_department)
-    return db_department
+    return crud.create_department(db, department)
 
 @app.get("/departments/", response_model=list[DepartmentResponse])
-def get_departments(db: Session = Depends(get_db), current_user: EmployeeModel = Depends(get_current_user)):
-    return db.query(DepartmentModel).all()
+def get_departments(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    return crud.list_departments(db)
 
 # --- Endpoints to get employees for admin ---
 @app.get("/admin/employees", response_model=list[schemas.EmployeeResponse])
-def get_all_employees_for_admin(db: Session = Depends(get_db), current_user: EmployeeModel = Depends(get_current_user)):
+def get_all_employees_for_admin(
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    etag = versions.make_etag(versions.EMPLOYEES, crud.get_scope_version(db, versions.EMPLOYEES), request.url.query)
+    if versions.etag_matches(if_none_match, etag):
+        return versions.not_modified(etag)
+    response.headers["ETag"] = etag
     return db.query(EmployeeModel).all()
 
 # ---------- Employee Update Endpoint ----------
@@ -148,7 +191,7 @@ def update_employee_details(
     employee_id: str,
     employee_update: EmployeeUpdate,
     db: Session = Depends(get_db),
-    current_user: EmployeeModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Update employee details - anyone can update any employee."""
     try:
@@ -158,50 +201,13 @@ def update_employee_details(
 
 # Department-specific employee endpoint removed - use /mentor/employees instead
 
-# ---------- Mentor's Department Employees ----------
-@app.get("/manager/employees", response_model=list[schemas.EmployeeResponse])
-def get_mentor_employees(
-    role: str = Query(None, description="Filter by employee role (employee, manager, admin)"),
-    db: Session = Depends(get_db),
-    current_user: EmployeeModel = Depends(get_current_user)
-):
-    """Get employees in mentor's department, optionally filtered by role."""
-    if current_user.role != "manager":
-        raise HTTPException(status_code=403, detail="Only managers can access this endpoint")
-    
-    # Get employees in the mentor's department
-    employees = crud.get_employees_by_department(db, current_user.department_name)
-    
-    # Filter by role if provided
-    if role:
-        employees = [emp for emp in employees if emp.role == role]
-    
-    return employees
-
 # ---------- Timesheet Endpoints ----------
-@app.post("/timesheets/", response_model=TimesheetResponse)
-def create_timesheet(
-    timesheet: TimesheetCreate,
-    db: Session = Depends(get_db),
-    current_user: EmployeeModel = Depends(get_current_user)
-):
-    """Create a timesheet entry - employees can create their own timesheets."""
-    if current_user.role != "employee":
-        raise HTTPException(status_code=403, detail="Only employees can create timesheets")
-    from datetime import date as dtdate
-    if timesheet.date > dtdate.today():
-        raise HTTPException(status_code=400, detail="Cannot submit timesheet for a future date")
-    try:
-        return crud.create_timesheet(db, current_user.employee_id, timesheet)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
 @app.get("/timesheets/{employee_id}/{date}", response_model=TimesheetResponse)
 def get_timesheet(
     employee_id: str,
     date: str,
     db: Session = Depends(get_db),
-    current_user: EmployeeModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get a specific timesheet entry."""
     # Check permissions
@@ -209,8 +215,8 @@ def get_timesheet(
         raise HTTPException(status_code=403, detail="Employees can only view their own timesheets")
     elif current_user.role == "manager":
         # Check if employee is in mentor's department
-        employee = db.query(EmployeeModel).filter(EmployeeModel.employee_id == employee_id).first()
-        if not employee or employee.department_name != current_user.department_name:
+        employee = crud.get_employee_scope(db, employee_id)
+        if not employee or employee["department_name"] != current_user.department_name:
             raise HTTPException(status_code=403, detail="Managers can only view timesheets from their department")
     
     timesheet = crud.get_timesheet(db, employee_id, date)
@@ -218,79 +224,55 @@ def get_timesheet(
         raise HTTPException(status_code=404, detail="Timesheet not found")
     return timesheet
 
-@app.put("/timesheets/{timesheet_id}", response_model=TimesheetResponse)
-def update_timesheet(
-    timesheet_id: int,
-    timesheet_update: TimesheetUpdate,
-    db: Session = Depends(get_db),
-    current_user: EmployeeModel = Depends(get_current_user)
-):
-    """Update a timesheet entry - employees can edit their own timesheets only, mentors/admins with permissions."""
-    timesheet = db.query(TimesheetModel).filter(TimesheetModel.timesheet_id == timesheet_id).first()
-    if not timesheet:
-        raise HTTPException(status_code=404, detail="Timesheet not found")
-    # Permissions:
-    if current_user.role == "employee":
-        if timesheet.employee_id != current_user.employee_id:
-            raise HTTPException(status_code=403, detail="Employees can only edit their own timesheets")
-    elif current_user.role == "manager":
-        # Check that timesheet employee is in mentor's department
-        employee = db.query(EmployeeModel).filter(EmployeeModel.employee_id == timesheet.employee_id).first()
-        if not employee or employee.department_name != current_user.department_name:
-            raise HTTPException(status_code=403, detail="Manager can only edit timesheets from their department")
-    # If passed, update
-    try:
-        return crud.update_timesheet(db, timesheet.employee_id, timesheet.date, timesheet_update)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-@app.get("/timesheets/", response_model=list[TimesheetResponse])
-def get_timesheets(
-    db: Session = Depends(get_db),
-    current_user: EmployeeModel = Depends(get_current_user)
-):
-    """Get timesheets based on user role."""
-    if current_user.role == "admin":
-        # Administrators can view all timesheets
-        return crud.get_all_timesheets(db)
-    elif current_user.role == "manager":
-        # Mentors can view timesheets from their department
-        return crud.get_mentor_department_timesheets(db, current_user.department_name)
-    else:
-        # Employees can only view their own timesheets
-        return crud.get_employee_timesheets(db, current_user.employee_id)
-
 @app.get("/manager/timesheets", response_model=list[TimesheetResponse])
 def get_manager_timesheets(
+    request: Request,
+    response: Response,
+    limit: int = Query(TIMESHEET_PAGE_SIZE, ge=1, le=TIMESHEET_PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
     status: Optional[str] = Query(None, description="Filter by status: pending, approved, rejected"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: EmployeeModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Return timesheets for employees in the manager's department, optional status filter."""
+    """One page of timesheets of the manager's department, newest first, optionally by status.
+
+    When more rows exist, the X-Next-Cursor response header holds the cursor for the next page.
+    For working through pending timesheets, GET /manager/queue is the cheaper listing.
+    """
     if current_user.role != "manager":
         raise HTTPException(status_code=403, detail="Only managers can access this endpoint")
+    if not current_user.department_name:
+        # Without a department the listing query would not be scoped at all
+        raise HTTPException(status_code=400, detail="Manager has no department assigned")
+    normalized = str(status).lower() if status is not None else None
+    if normalized is not None and normalized not in ("pending", "approved", "rejected"):
+        raise HTTPException(status_code=400, detail="Invalid status value. Use pending, approved, or rejected")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    query = db.query(TimesheetModel).join(EmployeeModel, EmployeeModel.employee_id == TimesheetModel.employee_id).filter(
-        EmployeeModel.department_name == current_user.department_name
-    )
-
-    if status is not None:
-        normalized = str(status).lower()
-        valid = {"pending", "approved", "rejected"}
-        if normalized not in valid:
-            raise HTTPException(status_code=400, detail="Invalid status value. Use pending, approved, or rejected")
-        # Compare against Enum value to avoid string/enum mismatch
-        enum_value = TimesheetStatusEnum(normalized)
-        query = query.filter(TimesheetModel.status == enum_value)
+    scope = versions.department_scope(current_user.department_name)
+    etag = versions.make_etag(scope, crud.get_scope_version(db, scope), request.url.query)
+    if versions.etag_matches(if_none_match, etag):
+        return versions.not_modified(etag)
+    response.headers["ETag"] = etag
 
-    return query.all()
+    # Live and archived timesheets; the archive is skipped unless approved ones are wanted
+    rows, next_key = crud.get_timesheets_page(
+        db, department_name=current_user.department_name, status=normalized, after=after, limit=limit
+    )
+    if next_key is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_key)
+    return rows
 
 @app.put("/employees/{employee_id}/status", response_model=schemas.EmployeeResponse)
 def update_employee_status(
     employee_id: str,
     status_data: dict = Body(...),
     db: Session = Depends(get_db),
-    current_user: EmployeeModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Allows MANAGERS and ADMINS to update employee status.
@@ -321,7 +303,7 @@ def update_all_timesheets_status_for_employee(
     employee_id: str,
     payload: dict = Body(...),
     db: Session = Depends(get_db),
-    current_user: EmployeeModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Bulk update: Approve/Reject/Pending all timesheets for an employee.
@@ -333,10 +315,10 @@ def update_all_timesheets_status_for_employee(
 
     # If manager, ensure employee is in same department
     if current_user.role == "manager":
-        emp = db.query(EmployeeModel).filter(EmployeeModel.employee_id == employee_id).first()
+        emp = crud.get_employee_scope(db, employee_id)
         if not emp:
             raise HTTPException(status_code=404, detail="Employee not found")
-        if emp.department_name != current_user.department_name:
+        if emp["department_name"] != current_user.department_name:
             raise HTTPException(status_code=403, detail="Managers can only update timesheets within their department")
 
     # Validate status
@@ -346,21 +328,13 @@ def update_all_timesheets_status_for_employee(
         raise HTTPException(status_code=400, detail="Invalid status value. Use approved/rejected/pending.")
     new_status = str(new_status).lower()
 
-    # Update all timesheets for employee
-    timesheets = db.query(TimesheetModel).filter(TimesheetModel.employee_id == employee_id).all()
-    if not timesheets:
-        return {"updated": 0}
-
-    for ts in timesheets:
-        ts.status = new_status  # SQLAlchemy Enum will coerce if necessary
-    db.commit()
-
-    return {"updated": len(timesheets)}
+    # Update all timesheets for employee in one statement
+    return crud.bulk_update_timesheet_status(db, new_status, employee_ids=[employee_id])
 
 @app.get("/employees/approved", response_model=list[schemas.EmployeeResponse])
 def get_approved_employees(
     db: Session = Depends(get_db),
-    current_user: EmployeeModel = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can view approved employees")
@@ -0,0 +1,126 @@
+# metrics.py
+"""Prometheus metrics served by GET /metrics.
+
+Label values are kept to small fixed sets so the number of series stays
+bounded at any request rate:
+- routes are reported by their template (/timesheets/{timesheet_id}), and
+  requests that match no route share the "unmatched" label
+- status codes are grouped into classes (2xx, 4xx, ...)
+- methods outside the usual verbs become OTHER
+"""
+import time
+
+from prometheus_client import Counter, Histogram, CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily, HistogramMetricFamily
+
+from db_pool import pool_snapshot
+from query_stats import route_template
+
+KNOWN_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+
+REQUEST_LATENCY = Histogram(
+    "trackify_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status_class"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+LOGIN_ATTEMPTS = Counter(
+    "trackify_login_attempts_total",
+    "Sign-in attempts by outcome (success, unknown_email, wrong_password)",
+    ["outcome"],
+)
+
+TIMESHEET_TRANSITIONS = Counter(
+    "trackify_timesheet_transitions_total",
+    "Timesheet status changes; from_status none means the timesheet was created",
+    ["from_status", "to_status"],
+)
+
+
+def record_login(outcome: str):
+    LOGIN_ATTEMPTS.labels(outcome).inc()
+
+
+def record_transitions(transitions):
+    """Count the (from_status, to_status) -> n mapping of a rollups.RollupDeltas."""
+    for (from_status, to_status), count in transitions.items():
+        TIMESHEET_TRANSITIONS.labels(from_status, to_status).inc(count)
+
+
+# ---------- Connection pools ----------
+class PoolCollector:
+    """Reads pool occupancy and checkout waits at scrape time (see db_pool.pool_snapshot)."""
+
+    def __init__(self, pools: dict):
+        self.pools = pools
+
+    def collect(self):
+        gauges = {
+            "size": GaugeMetricFamily("trackify_db_pool_size", "Configured pool size", labels=["engine"]),
+            "checked_out": GaugeMetricFamily("trackify_db_pool_checked_out", "Connections in use", labels=["engine"]),
+            "checked_in": GaugeMetricFamily("trackify_db_pool_checked_in", "Idle connections", labels=["engine"]),
+            "overflow": GaugeMetricFamily("trackify_db_pool_overflow", "Connections open beyond the pool size", labels=["engine"]),
+        }
+        saturation = GaugeMetricFamily(
+            "trackify_db_pool_saturation", "Connections in use / (pool size + max overflow)", labels=["engine"]
+        )
+        timeouts = CounterMetricFamily("trackify_db_pool_checkout_timeouts", "Checkouts that hit pool_timeout", labels=["engine"])
+        waits = HistogramMetricFamily("trackify_db_pool_checkout_wait_seconds", "Time spent waiting for a connection", labels=["engine"])
+
+        for name, pool in self.pools.items():
+            snapshot = pool_snapshot(pool)
+            if "size" in snapshot:
+                for key, family in gauges.items():
+                    family.add_metric([name], snapshot[key])
+                capacity = snapshot["size"] + max(getattr(pool, "_max_overflow", 0), 0)
+                if capacity:
+                    saturation.add_metric([name], snapshot["checked_out"] / capacity)
+            if "wait_seconds_buckets" in snapshot:
+                timeouts.add_metric([name], snapshot["timeouts"])
+                buckets = [(bound, count) for bound, count in snapshot["wait_seconds_buckets"].items()]
+                waits.add_metric([name], buckets=buckets, sum_value=snapshot["wait_seconds_sum"])
+
+        yield from gauges.values()
+        yield saturation
+        yield timeouts
+        yield waits
+
+
+def register_pools(pools: dict):
+    """Expose the given {"engine label": pool} mapping; call once at startup."""
+    REGISTRY.register(PoolCollector(pools))
+
+
+def render():
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+# ---------- Request latency ----------
+class MetricsMiddleware:
+    """Pure ASGI middleware observing REQUEST_LATENCY once the route is known."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            method = scope["method"] if scope["method"] in KNOWN_METHODS else "OTHER"
+            REQUEST_LATENCY.labels(
+                method, route_template(scope) or "unmatched", f"{status_code // 100}xx"
+            ).observe(time.perf_counter() - started)
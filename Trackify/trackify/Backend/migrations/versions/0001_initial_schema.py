@@ -0,0 +1,64 @@
+"""Initial schema: department, employee, timesheet
+
+Matches the tables main.py used to create with Base.metadata.create_all.
+Databases created that way already have them, so each table is only
+created when missing and `alembic upgrade head` works on both.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "department" not in existing:
+        op.create_table(
+            "department",
+            sa.Column("department_id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("name", sa.String(100), nullable=False, unique=True),
+        )
+    if "employee" not in existing:
+        op.create_table(
+            "employee",
+            sa.Column("employee_id", sa.String(20), primary_key=True, nullable=False),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("surname", sa.String(100), nullable=False),
+            sa.Column("email", sa.String(100), nullable=False, unique=True),
+            sa.Column("password_hash", sa.String(255), nullable=False),
+            sa.Column("role", sa.Enum("employee", "manager", "admin", "administrator", name="roleenum"), nullable=False),
+            sa.Column("department_name", sa.String(100)),
+        )
+    if "timesheet" not in existing:
+        op.create_table(
+            "timesheet",
+            sa.Column("timesheet_id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("employee_id", sa.String(20), sa.ForeignKey("employee.employee_id")),
+            sa.Column("date", sa.Date()),
+            sa.Column("description", sa.Text()),
+            sa.Column("clock_in", sa.Time()),
+            sa.Column("clock_out", sa.Time()),
+            sa.Column("total_hours", sa.DECIMAL(5, 2)),
+            sa.Column("status", sa.Enum("pending", "approved", "rejected", name="statusenum")),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("timesheet")
+    op.drop_table("employee")
+    op.drop_table("department")
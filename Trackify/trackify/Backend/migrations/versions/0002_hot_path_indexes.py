@@ -0,0 +1,49 @@
+"""Indexes for the hot timesheet and employee predicates
+
+- uq_timesheet_employee_date: one timesheet per employee per day, and the
+  access path for get_timesheet(employee_id, date)
+- ix_timesheet_status_date: manager status filters
+- ix_employee_department_name: department scoping joins
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The unique index cannot be built over existing duplicates; make the operator resolve them first
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT employee_id, date, COUNT(*) FROM timesheet "
+        "GROUP BY employee_id, date HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicates:
+        sample = ", ".join(f"{employee_id} on {day}" for employee_id, day, _ in duplicates[:10])
+        raise RuntimeError(
+            f"{len(duplicates)} employee/date pairs have more than one timesheet ({sample}). "
+            "Remove the extra rows, then rerun the migration."
+        )
+
+    op.create_index("uq_timesheet_employee_date", "timesheet", ["employee_id", "date"], unique=True)
+    op.create_index("ix_timesheet_status_date", "timesheet", ["status", "date"])
+    op.create_index("ix_employee_department_name", "employee", ["department_name"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_employee_department_name", table_name="employee")
+    op.drop_index("ix_timesheet_status_date", table_name="timesheet")
+    op.drop_index("uq_timesheet_employee_date", table_name="timesheet")
@@ -0,0 +1,68 @@
+"""Hours rollup per employee, ISO week / month and status
+
+timesheet_hours_rollup is maintained incrementally by the timesheet write
+paths (see rollups.py); this revision creates it and backfills it from the
+existing timesheets.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import rollups
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 5000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "timesheet_hours_rollup",
+        sa.Column("employee_id", sa.String(length=20), sa.ForeignKey("employee.employee_id"), nullable=False),
+        sa.Column("period", sa.Enum("week", "month", name="periodenum"), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("status", sa.Enum("pending", "approved", "rejected", name="statusenum"), nullable=False),
+        sa.Column("total_hours", sa.DECIMAL(precision=10, scale=2), nullable=False, server_default="0"),
+        sa.Column("entry_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("employee_id", "period", "period_start", "status"),
+    )
+    op.create_index("ix_timesheet_hours_rollup_period", "timesheet_hours_rollup", ["period", "period_start"])
+
+    # Week boundaries are not portable SQL; aggregate the timesheets here instead
+    bind = op.get_bind()
+    timesheet = sa.table(
+        "timesheet",
+        sa.column("employee_id", sa.String),
+        sa.column("date", sa.Date),
+        sa.column("status", sa.String),
+        sa.column("total_hours", sa.DECIMAL(10, 2)),
+    )
+    deltas = rollups.RollupDeltas()
+    rows = bind.execution_options(yield_per=BACKFILL_BATCH).execute(
+        sa.select(timesheet).where(timesheet.c.date.is_not(None))
+    )
+    for row in rows:
+        deltas.add(row.employee_id, row.date, row.status, row.total_hours)
+
+    params = deltas.params()
+    statement = rollups.upsert_statement(bind.dialect.name)
+    for start in range(0, len(params), BACKFILL_BATCH):
+        bind.execute(statement, params[start:start + BACKFILL_BATCH])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_timesheet_hours_rollup_period", table_name="timesheet_hours_rollup")
+    op.drop_table("timesheet_hours_rollup")
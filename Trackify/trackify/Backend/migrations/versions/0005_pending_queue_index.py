@@ -0,0 +1,32 @@
+"""Index for the pending-approval queue
+
+ix_timesheet_employee_status_date lets GET /manager/queue read only the
+pending rows of a department's employees (found through
+ix_employee_department_name), in date order per employee.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_timesheet_employee_status_date", "timesheet", ["employee_id", "status", "date"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_timesheet_employee_status_date", table_name="timesheet")
@@ -0,0 +1,81 @@
+"""Integer department_id on employee and (denormalized) on timesheet
+
+employee.department_id references the department named by
+employee.department_name; timesheet.department_id copies its employee's, so
+department listings are an integer index range scan with no join to
+employee. The crud write paths keep both in step from now on; this revision
+adds the columns and backfills them.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 5000
+
+department = sa.table("department", sa.column("department_id", sa.Integer), sa.column("name", sa.String))
+employee = sa.table(
+    "employee",
+    sa.column("employee_id", sa.String),
+    sa.column("department_name", sa.String),
+    sa.column("department_id", sa.Integer),
+)
+timesheet = sa.table(
+    "timesheet",
+    sa.column("timesheet_id", sa.Integer),
+    sa.column("employee_id", sa.String),
+    sa.column("department_id", sa.Integer),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("employee") as batch_op:
+        batch_op.add_column(sa.Column("department_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key("fk_employee_department_id", "department", ["department_id"], ["department_id"])
+        batch_op.create_index("ix_employee_department_id", ["department_id"])
+    with op.batch_alter_table("timesheet") as batch_op:
+        batch_op.add_column(sa.Column("department_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key("fk_timesheet_department_id", "department", ["department_id"], ["department_id"])
+        batch_op.create_index("ix_timesheet_department_date", ["department_id", "date"])
+        batch_op.create_index("ix_timesheet_department_status_date", ["department_id", "status", "date"])
+
+    bind = op.get_bind()
+    bind.execute(employee.update().values(department_id=(
+        sa.select(department.c.department_id).where(department.c.name == employee.c.department_name).scalar_subquery()
+    )))
+
+    # Timesheets in primary key ranges, so no single statement locks the whole table
+    employee_department = (
+        sa.select(employee.c.department_id).where(employee.c.employee_id == timesheet.c.employee_id).scalar_subquery()
+    )
+    last_id = bind.execute(sa.select(sa.func.max(timesheet.c.timesheet_id))).scalar() or 0
+    for start in range(0, last_id, BACKFILL_BATCH):
+        bind.execute(timesheet.update().where(
+            timesheet.c.timesheet_id > start, timesheet.c.timesheet_id <= start + BACKFILL_BATCH
+        ).values(department_id=employee_department))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("timesheet") as batch_op:
+        batch_op.drop_index("ix_timesheet_department_status_date")
+        batch_op.drop_index("ix_timesheet_department_date")
+        batch_op.drop_constraint("fk_timesheet_department_id", type_="foreignkey")
+        batch_op.drop_column("department_id")
+    with op.batch_alter_table("employee") as batch_op:
+        batch_op.drop_index("ix_employee_department_id")
+        batch_op.drop_constraint("fk_employee_department_id", type_="foreignkey")
+        batch_op.drop_column("department_id")
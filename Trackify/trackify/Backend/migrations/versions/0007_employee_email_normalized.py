@@ -0,0 +1,55 @@
+"""Normalized email column for index-backed, case-insensitive lookups
+
+employee.email_normalized holds lower(trim(email)) under a unique index, so
+login and the uniqueness checks of employee creation are an index seek
+instead of a scan over lower(email). The crud write paths fill it from now
+on; this revision adds and backfills it.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+employee = sa.table("employee", sa.column("email", sa.String), sa.column("email_normalized", sa.String))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("employee", sa.Column("email_normalized", sa.String(length=100), nullable=True))
+
+    bind = op.get_bind()
+    normalized = sa.func.lower(sa.func.trim(employee.c.email))
+    # The unique index cannot be built over accounts whose emails differ only in case or spacing
+    duplicates = bind.execute(
+        sa.select(normalized, sa.func.count()).group_by(normalized).having(sa.func.count() > 1)
+    ).fetchall()
+    if duplicates:
+        sample = ", ".join(email for email, _ in duplicates[:10])
+        raise RuntimeError(
+            f"{len(duplicates)} emails are used by more than one employee when compared case-insensitively "
+            f"({sample}). Merge or rename those accounts, then rerun the migration."
+        )
+    bind.execute(employee.update().values(email_normalized=normalized))
+
+    with op.batch_alter_table("employee") as batch_op:
+        batch_op.alter_column("email_normalized", existing_type=sa.String(length=100), nullable=False)
+        batch_op.create_index("uq_employee_email_normalized", ["email_normalized"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("employee") as batch_op:
+        batch_op.drop_index("uq_employee_email_normalized")
+        batch_op.drop_column("email_normalized")
@@ -0,0 +1,56 @@
+"""Archive table for approved timesheets of closed periods
+
+timesheet_archive has the columns of timesheet, keyed by (date,
+timesheet_id) and without foreign keys. archive.py moves approved timesheets
+older than a horizon into it. On MySQL it is range-partitioned on
+TO_DAYS(date), starting with the single catch-all partition p_future, which
+archive.py splits into monthly or yearly partitions as it goes.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "timesheet_archive",
+        sa.Column("timesheet_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("employee_id", sa.String(length=20), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("clock_in", sa.Time(), nullable=True),
+        sa.Column("clock_out", sa.Time(), nullable=True),
+        sa.Column("total_hours", sa.DECIMAL(precision=5, scale=2), nullable=True),
+        sa.Column("status", sa.Enum("pending", "approved", "rejected", name="statusenum"), nullable=False),
+        sa.Column("department_id", sa.Integer(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("date", "timesheet_id"),
+    )
+    op.create_index("ix_timesheet_archive_employee_date", "timesheet_archive", ["employee_id", "date"])
+    op.create_index("ix_timesheet_archive_department_date", "timesheet_archive", ["department_id", "date"])
+    if op.get_bind().dialect.name == "mysql":
+        op.execute(
+            "ALTER TABLE timesheet_archive PARTITION BY RANGE (TO_DAYS(date)) "
+            "(PARTITION p_future VALUES LESS THAN MAXVALUE)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_timesheet_archive_department_date", table_name="timesheet_archive")
+    op.drop_index("ix_timesheet_archive_employee_date", table_name="timesheet_archive")
+    op.drop_table("timesheet_archive")
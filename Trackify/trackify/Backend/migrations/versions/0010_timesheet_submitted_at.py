@@ -0,0 +1,36 @@
+"""Submission time of timesheets
+
+timesheet.submitted_at (and its copy in timesheet_archive) records when the
+employee last submitted the timesheet, so analytics can count late
+submissions. Existing timesheets keep NULL: their submission time is unknown.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, Sequence[str], None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("timesheet", sa.Column("submitted_at", sa.DateTime(), nullable=True))
+    op.add_column("timesheet_archive", sa.Column("submitted_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("timesheet_archive") as batch_op:
+        batch_op.drop_column("submitted_at")
+    with op.batch_alter_table("timesheet") as batch_op:
+        batch_op.drop_column("submitted_at")
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Enum, Date, Time, DECIMAL, Text, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Enum, Date, DateTime, Time, DECIMAL, Text, ForeignKey, Index
+from sqlalchemy import PrimaryKeyConstraint
 from database import Base
 import enum
 
@@ -15,6 +16,10 @@ class StatusEnum(str, enum.Enum):
     approved = "approved"
     rejected = "rejected"
 
+class PeriodEnum(str, enum.Enum):
+    week = "week"    # ISO week, keyed by its Monday
+    month = "month"  # keyed by the first of the month
+
 
 # ---------- DEPARTMENT ----------
 class Department(Base):
@@ -30,9 +35,17 @@ class Employee(Base):
     name = Column(String(100), nullable=False)
     surname = Column(String(100), nullable=False)
     email = Column(String(100), nullable=False, unique=True)
+    # lower(trim(email)); logins and uniqueness checks look users up by it (see crud.normalize_email)
+    email_normalized = Column(String(100), nullable=False)
     password_hash = Column(String(255), nullable=False)
     role = Column(Enum(RoleEnum), nullable=False)
-    department_name = Column(String(100))  # Non-FK, links by name only
+    department_name = Column(String(100), index=True)  # Non-FK, links by name only
+    # The department row named department_name (NULL when no such department exists)
+    department_id = Column(Integer, ForeignKey("department.department_id", name="fk_employee_department_id"), index=True)
+
+    __table_args__ = (
+        Index("uq_employee_email_normalized", "email_normalized", unique=True),
+    )
    
 # ---------- TIMESHEET ----------
 class Timesheet(Base):
@@ -45,3 +58,80 @@ class Timesheet(Base):
     clock_out = Column(Time)
     total_hours = Column(DECIMAL(5, 2))
     status = Column(Enum(StatusEnum), default=StatusEnum.pending)
+    # Copy of the employee's department_id, so department listings need no join to employee
+    department_id = Column(Integer, ForeignKey("department.department_id", name="fk_timesheet_department_id"))
+    # When the employee last submitted (or re-submitted) it; NULL for timesheets from before it was recorded
+    submitted_at = Column(DateTime)
+
+    __table_args__ = (
+        # One timesheet per employee per day; also serves the (employee_id, date) lookups
+        Index("uq_timesheet_employee_date", "employee_id", "date", unique=True),
+        Index("ix_timesheet_status_date", "status", "date"),
+        # Per-employee status filters (GET /timesheets/?status=, bulk status updates)
+        Index("ix_timesheet_employee_status_date", "employee_id", "status", "date"),
+        # Department listings (newest first) and the pending-approval queue (oldest first)
+        Index("ix_timesheet_department_date", "department_id", "date"),
+        Index("ix_timesheet_department_status_date", "department_id", "status", "date"),
+    )
+
+
+# ---------- TIMESHEET ARCHIVE ----------
+class TimesheetArchive(Base):
+    """Approved timesheets older than the archive horizon, moved out of timesheet by archive.py.
+
+    Same columns as Timesheet. Keyed by (date, timesheet_id) so MySQL can range-partition
+    it by date; partitioned InnoDB tables cannot have foreign keys, hence none here.
+    """
+    __tablename__ = "timesheet_archive"
+    timesheet_id = Column(Integer, nullable=False, autoincrement=False)
+    employee_id = Column(String(20), nullable=False)
+    date = Column(Date, nullable=False)
+    description = Column(Text)
+    clock_in = Column(Time)
+    clock_out = Column(Time)
+    total_hours = Column(DECIMAL(5, 2))
+    status = Column(Enum(StatusEnum), nullable=False)
+    department_id = Column(Integer)
+    submitted_at = Column(DateTime)
+    archived_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("date", "timesheet_id"),
+        Index("ix_timesheet_archive_employee_date", "employee_id", "date"),
+        Index("ix_timesheet_archive_department_date", "department_id", "date"),
+    )
+
+
+# ---------- TIMESHEET HOURS ROLLUP ----------
+class TimesheetHoursRollup(Base):
+    """Hours per employee, period and status, maintained incrementally (see rollups.py)."""
+    __tablename__ = "timesheet_hours_rollup"
+    employee_id = Column(String(20), ForeignKey("employee.employee_id"), primary_key=True)
+    period = Column(Enum(PeriodEnum), primary_key=True)
+    period_start = Column(Date, primary_key=True)
+    status = Column(Enum(StatusEnum), primary_key=True)
+    total_hours = Column(DECIMAL(10, 2), nullable=False, default=0)
+    entry_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_timesheet_hours_rollup_period", "period", "period_start"),
+    )
+
+
+# ---------- LISTING VERSIONS ----------
+class ScopeVersion(Base):
+    """Modification counter per listing scope, used as the ETag of conditional GETs (see versions.py)."""
+    __tablename__ = "scope_version"
+    scope = Column(String(150), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+# ---------- IDEMPOTENCY KEYS ----------
+class IdempotencyKey(Base):
+    """Idempotency-Key sent with a timesheet submission; a retry with the same key replays the stored result."""
+    __tablename__ = "idempotency_key"
+    employee_id = Column(String(20), ForeignKey("employee.employee_id"), primary_key=True)
+    key = Column(String(100), primary_key=True)
+    request_hash = Column(String(64), nullable=False)  # sha256 of the submitted fields (see crud.submission_fingerprint)
+    timesheet_id = Column(Integer)
+    created_at = Column(DateTime, nullable=False)
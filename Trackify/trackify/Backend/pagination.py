@@ -0,0 +1,21 @@
+# pagination.py
+"""Opaque cursors for keyset pagination over (date, timesheet_id)."""
+import base64
+import json
+from datetime import date
+
+
+def encode_cursor(key: tuple) -> str:
+    row_date, timesheet_id = key
+    raw = json.dumps([row_date.isoformat(), int(timesheet_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Return the (date, timesheet_id) key encoded in cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        row_date, timesheet_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return date.fromisoformat(row_date), int(timesheet_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid pagination cursor")
@@ -0,0 +1,148 @@
+# query_stats.py
+"""Per-request SQL statistics.
+
+SQLAlchemy cursor events on the app's engines add every statement to the stats
+of the request in flight (a context variable set by QueryStatsMiddleware).
+When the response starts the middleware adds a Server-Timing header, and when
+the request finishes it writes one JSON log line on the "trackify.request"
+logger. Statements slower than SLOW_QUERY_MS are logged on "trackify.sql"
+with the shape of their parameters, never the values.
+"""
+import contextvars
+import json
+import logging
+import time
+
+from sqlalchemy import event
+
+from config import SLOW_QUERY_MS
+
+request_logger = logging.getLogger("trackify.request")
+sql_logger = logging.getLogger("trackify.sql")
+
+STATEMENT_LOG_CHARS = 500
+
+
+class QueryStats:
+    __slots__ = ("count", "db_seconds", "slowest_seconds", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+
+_current = contextvars.ContextVar("query_stats", default=None)
+
+
+def current_stats():
+    """Stats of the request in flight, or None outside a request."""
+    return _current.get()
+
+
+def parameter_shape(parameters, executemany: bool):
+    """Types (not values) of the bound parameters, e.g. {"rows": 40, "each": ["str", "date"]}."""
+    def types(params):
+        if isinstance(params, dict):
+            return {key: type(value).__name__ for key, value in params.items()}
+        if isinstance(params, (list, tuple)):
+            return [type(value).__name__ for value in params]
+        return type(params).__name__
+
+    if executemany and isinstance(parameters, (list, tuple)):
+        return {"rows": len(parameters), "each": types(parameters[0]) if parameters else None}
+    return types(parameters)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    seconds = time.perf_counter() - started
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        sql_logger.warning(json.dumps({
+            "event": "slow_query",
+            "duration_ms": round(seconds * 1000, 3),
+            "statement": statement[:STATEMENT_LOG_CHARS],
+            "parameters": parameter_shape(parameters, executemany),
+        }, default=str))
+
+
+def instrument(*engines):
+    """Attach the statement timers to sync engines (use async_engine.sync_engine for async ones)."""
+    for target in engines:
+        if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+            event.listen(target, "before_cursor_execute", _before_cursor_execute)
+            event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_template(scope):
+    """Path template of the matched route, e.g. /timesheets/{timesheet_id}; None if nothing matched."""
+    # Routes from included routers keep their unprefixed path on scope["route"];
+    # FastAPI records the prefixed one on its effective route context
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    return getattr(context, "path", None) or getattr(scope.get("route"), "path", None)
+
+
+def server_timing(stats: QueryStats, elapsed: float) -> str:
+    return (
+        f'db;dur={stats.db_seconds * 1000:.3f};desc="{stats.count} queries", '
+        f"db-slowest;dur={stats.slowest_seconds * 1000:.3f}, "
+        f"app;dur={elapsed * 1000:.3f}"
+    )
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware, so the context variable reaches the endpoint and streaming bodies."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(stats, time.perf_counter() - started).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            request_logger.info(json.dumps({
+                "event": "request",
+                "method": scope["method"],
+                "route": route_template(scope),
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "queries": stats.count,
+                "db_ms": round(stats.db_seconds * 1000, 3),
+                "slowest_ms": round(stats.slowest_seconds * 1000, 3),
+                "slowest_statement": (stats.slowest_statement or "")[:STATEMENT_LOG_CHARS] or None,
+            }))
@@ -0,0 +1,119 @@
+# rollups.py
+"""Incremental maintenance of the timesheet_hours_rollup table.
+
+Every timesheet contributes its hours to two rollup rows: its ISO week and its
+month, under its current status. Writers describe a change as before/after
+contributions; the difference is applied with one upsert executemany, so the
+rollup stays in the same transaction as the timesheet write.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+import models
+
+TWO_PLACES = Decimal("0.01")
+
+
+def period_starts(day):
+    """(period, period_start) pairs a date rolls up into: Monday of its ISO week and first of its month."""
+    return (
+        (models.PeriodEnum.week, day - timedelta(days=day.weekday())),
+        (models.PeriodEnum.month, day.replace(day=1)),
+    )
+
+
+def to_hours(value) -> Decimal:
+    if value is None:
+        return Decimal("0.00")
+    return Decimal(str(value)).quantize(TWO_PLACES)
+
+
+class RollupDeltas:
+    """Accumulates signed (hours, count) changes per rollup key."""
+
+    def __init__(self):
+        self._deltas = defaultdict(lambda: [Decimal("0.00"), 0])
+        # (from_status, to_status) -> timesheets; "none" stands for created/deleted
+        self.transitions = defaultdict(int)
+        # Employees whose timesheets changed, for the listing versions (see versions.py)
+        self.employee_ids = set()
+        # Status changes of individual timesheets, for the event stream (see events.py)
+        self.changes = []
+
+    def add(self, employee_id, day, status, hours, sign: int = 1):
+        if employee_id is None or day is None or status is None:
+            return
+        status = models.StatusEnum(status)
+        hours = to_hours(hours)
+        for period, start in period_starts(day):
+            delta = self._deltas[(employee_id, period, start, status)]
+            delta[0] += sign * hours
+            delta[1] += sign
+
+    def remove(self, employee_id, day, status, hours):
+        self.add(employee_id, day, status, hours, sign=-1)
+
+    def change(self, before, after, timesheet_id=None):
+        """Record a timesheet moving from one (employee_id, date, status, hours) state to another."""
+        from_status = models.StatusEnum(before[2]).value if before is not None else "none"
+        to_status = models.StatusEnum(after[2]).value if after is not None else "none"
+        if from_status != to_status:
+            self.transitions[(from_status, to_status)] += 1
+            state = after if after is not None else before
+            self.changes.append({
+                "timesheet_id": timesheet_id,
+                "employee_id": state[0],
+                "date": state[1],
+                "from_status": from_status,
+                "to_status": to_status,
+            })
+        self.employee_ids.update(state[0] for state in (before, after) if state is not None)
+        if before is not None:
+            self.remove(*before)
+        if after is not None:
+            self.add(*after)
+
+    def params(self) -> list:
+        return [
+            {
+                "employee_id": employee_id,
+                "period": period,
+                "period_start": start,
+                "status": status,
+                "total_hours": hours,
+                "entry_count": count,
+            }
+            for (employee_id, period, start, status), (hours, count) in self._deltas.items()
+            if hours or count
+        ]
+
+    def __bool__(self):
+        return any(hours or count for hours, count in self._deltas.values())
+
+
+def snapshot(ts):
+    """The rollup-relevant state of a Timesheet row or result row."""
+    return (ts.employee_id, ts.date, ts.status, ts.total_hours)
+
+
+def upsert_statement(dialect_name: str):
+    """INSERT that adds to an existing rollup row instead of failing on its primary key."""
+    table = models.TimesheetHoursRollup.__table__
+    if dialect_name == "mysql":
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(
+            total_hours=table.c.total_hours + stmt.inserted.total_hours,
+            entry_count=table.c.entry_count + stmt.inserted.entry_count,
+        )
+    # sqlite or postgresql; database.check_dialect refuses anything else at startup
+    stmt = (sqlite if dialect_name == "sqlite" else postgresql).insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[c.name for c in table.primary_key.columns],
+        set_={
+            "total_hours": table.c.total_hours + stmt.excluded.total_hours,
+            "entry_count": table.c.entry_count + stmt.excluded.entry_count,
+        },
+    )
@@ -23,3 +23,9 @@
     #access_token = create_access_token(data={"sub": user.email})
     #return {"access_token": access_token, "token_type": "bearer"}
 
+
+# Login/logout currently live in main.py and token handling in security.py;
+# this router is kept so main.py can mount auth routes here later.
+from fastapi import APIRouter
+
+router = APIRouter(tags=["Auth"])
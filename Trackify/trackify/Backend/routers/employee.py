@@ -1,36 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+import csv
+import io
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from jose import jwt, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
-from config import SECRET_KEY, ALGORITHM
+from database import get_db, get_async_db
+from security import Principal, get_current_user
+from config import EMPLOYEE_IMPORT_MAX
 import models
 import schemas
 import crud
+import crud_async
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
-def get_current_user(Authorization: str = Header(...), db: Session = Depends(get_db)):
-    if not Authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
-    token = Authorization.removeprefix("Bearer ").strip()
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-    except (JWTError, ValueError, KeyError):
-        raise HTTPException(status_code=401, detail="Invalid authentication token")
-    user = db.query(models.Employee).filter(models.Employee.employee_id == str(user_id)).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
-
-
 @router.post("/employees", response_model=schemas.EmployeeResponse, status_code=status.HTTP_201_CREATED)
 def create_employee_admin(
     employee: schemas.EmployeeCreate,
     db: Session = Depends(get_db),
-    current_user: models.Employee = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Create a new employee. Admin-only."""
     role_value = current_user.role.value if hasattr(current_user.role, "value") else str(current_user.role)
@@ -58,3 +49,76 @@ def create_employee_admin(
         raise HTTPException(status_code=500, detail=f"Failed to create employee: {str(e)}")
 
 
+def parse_import_body(content_type: str, body: bytes) -> list:
+    """Import rows from a JSON array (or {"employees": [...]}) or a CSV with a header row."""
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        try:
+            reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+            if not reader.fieldnames:
+                raise HTTPException(status_code=400, detail="CSV import needs a header row")
+            reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+            return list(reader)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid CSV: {e}")
+    if media_type in ("application/json", ""):
+        try:
+            payload = orjson.loads(body)
+        except orjson.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+        if isinstance(payload, dict):
+            payload = payload.get("employees")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Send a JSON array of employees or {\"employees\": [...]}")
+        return payload
+    raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Use application/json or text/csv")
+
+
+@router.post("/employees/import", response_model=schemas.EmployeeImportResult)
+async def import_employees_admin(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Create many employees at once. Admin-only.
+
+    The body is a JSON array of employee objects (the fields of POST /admin/employees;
+    role defaults to employee and employee_id is generated when omitted), or CSV
+    (Content-Type: text/csv) with those fields as header. The response reports every
+    row as created, duplicate or invalid; valid rows are stored even if others fail.
+    """
+    role_value = current_user.role.value if hasattr(current_user.role, "value") else str(current_user.role)
+    if role_value not in ("admin", "administrator"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can create employees")
+
+    rows = parse_import_body(request.headers.get("content-type", ""), await request.body())
+    if len(rows) > EMPLOYEE_IMPORT_MAX:
+        raise HTTPException(status_code=400, detail=f"An import can contain at most {EMPLOYEE_IMPORT_MAX} rows")
+
+    items = await crud_async.import_employees(db, rows)
+    created = sum(1 for item in items if item["result"] == "created")
+    return {"created": created, "failed": len(items) - created, "items": items}
+
+
+@router.put("/timesheets/status", response_model=schemas.BulkTimesheetStatusResult)
+def update_timesheets_status_admin(
+    status_update: schemas.BulkTimesheetStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Set the status of all timesheets of the given employees and/or department. Admin-only."""
+    role_value = current_user.role.value if hasattr(current_user.role, "value") else str(current_user.role)
+    if role_value not in ("admin", "administrator"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can change timesheet statuses")
+
+    if status_update.status not in ("pending", "approved", "rejected"):
+        raise HTTPException(status_code=400, detail="Invalid status value. Use approved/rejected/pending.")
+    if status_update.employee_ids is None and status_update.department_name is None:
+        raise HTTPException(status_code=400, detail="Provide employee_ids and/or department_name")
+
+    return crud.bulk_update_timesheet_status(
+        db,
+        status_update.status,
+        employee_ids=status_update.employee_ids,
+        department_name=status_update.department_name,
+    )
@@ -0,0 +1,59 @@
+# routers/events.py
+import asyncio
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+import events
+from security import Principal, get_current_user
+from config import EVENTS_HEARTBEAT_SECONDS
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+def sse_message(event_type: str, data: dict, event_id=None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event_type}\ndata: ".encode() + orjson.dumps(data) + b"\n\n"
+
+
+async def event_stream(channels):
+    # Subscribed once the response starts streaming: a client gone before then never holds a subscription
+    subscription = events.broker.subscribe(channels)
+    try:
+        # Sent at once so clients know the subscription is live, then refetch their listing (cheap with ETags)
+        yield sse_message("ready", {"channels": sorted(subscription.channels)})
+        while True:
+            try:
+                item = await asyncio.wait_for(subscription.get(), EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if subscription.lost:
+                # The client fell behind and events were dropped; it has to refetch
+                subscription.lost = False
+                yield sse_message("resync", {})
+            yield sse_message(item["type"], item, item["id"])
+    finally:
+        events.broker.unsubscribe(subscription)
+
+
+@router.get("/timesheets")
+async def timesheet_events(current_user: Principal = Depends(get_current_user)):
+    """Server-sent events for timesheet changes the caller can see:
+    - employee: status changes of their own timesheets
+    - manager: new pending entries and status changes in their department
+    - admin/administrator: everything
+
+    Events are timesheet.created and timesheet.status, with timesheet_id, employee_id,
+    department_name, date, from_status and to_status. A resync event means some
+    events were dropped and the client should refetch.
+    """
+    channels = events.subscriber_channels(current_user)
+    if not channels:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Manager has no department assigned")
+    return StreamingResponse(
+        event_stream(channels),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,53 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from database import get_async_db
 import models
 import schemas
-from jose import JWTError, jwt
-from config import SECRET_KEY, ALGORITHM
-from fastapi import Header
-from typing import Optional
+import crud_async
+from security import Principal, get_current_user
+from pagination import encode_cursor, decode_cursor
+from config import TIMESHEET_PAGE_SIZE, TIMESHEET_PAGE_SIZE_MAX
 
 router = APIRouter()
 
-def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    token = authorization.split(" ")[1]
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        employee_id: str = payload.get("sub")
-        if employee_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-    except JWTError:
+@router.get("/queue", response_model=schemas.PendingQueueResponse)
+async def get_pending_queue(
+    response: Response,
+    limit: int = Query(TIMESHEET_PAGE_SIZE, ge=1, le=TIMESHEET_PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Pending timesheets of the manager's department awaiting review, oldest first,
+    with the pending count and oldest pending date of each employee.
+
+    When more rows exist, the X-Next-Cursor response header holds the cursor for the next page.
+    """
+    if current_user.role != models.RoleEnum.manager:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only managers can view the approval queue"
         )
-    
-    user = db.query(models.Employee).filter(models.Employee.employee_id == employee_id).first()
-    if user is None:
+    if not current_user.department_name:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Manager has no department assigned"
         )
-    return user
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    rows, next_key, counts = await crud_async.get_pending_queue(db, current_user.department_name, after, limit)
+    if next_key is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_key)
+    return {
+        "pending": sum(row.pending for row in counts),
+        "employees": [row._asdict() for row in counts],
+        "items": rows,
+    }
 
 @router.get("/employees", response_model=list[schemas.EmployeeResponse])
-def get_department_employees(
-    db: Session = Depends(get_db),
-    current_user: models.Employee = Depends(get_current_user)
+async def get_department_employees(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     # Check if user is a manager
     role_str = str(current_user.role)
@@ -66,19 +70,18 @@ def get_department_employees(
         )
     
     # Get employees from the same department with role 'employee'
-    employees = db.query(models.Employee).filter(
-        models.Employee.department_name == current_user.department_name,
-        models.Employee.role == "employee"
-    ).all()
+    employees = await crud_async.get_department_members(
+        db, current_user.department_name, role=models.RoleEnum.employee
+    )
     
     return employees
 
 @router.put("/employees/{employee_id}/timesheets/status")
-def update_employee_timesheets_status(
+async def update_employee_timesheets_status(
     employee_id: str,
     status_update: schemas.TimesheetStatusUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.Employee = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     # Check if user is a manager
     if current_user.role != models.RoleEnum.manager:
@@ -95,13 +98,10 @@ def update_employee_timesheets_status(
         )
     
     # Verify the employee belongs to the manager's department
-    employee = db.query(models.Employee).filter(
-        models.Employee.employee_id == employee_id,
-        models.Employee.department_name == current_user.department_name,
-        models.Employee.role == models.RoleEnum.employee
-    ).first()
+    employee = await crud_async.get_employee_scope(db, employee_id)
     
-    if not employee:
+    if (not employee or employee["department_name"] != current_user.department_name
+            or employee["role"] != models.RoleEnum.employee.value):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Employee not found in your department"
@@ -115,18 +115,48 @@ def update_employee_timesheets_status(
             detail="Status must be 'approved' or 'rejected'"
         )
     
-    # Get all pending timesheets for this employee
-    timesheets = db.query(models.Timesheet).filter(
-        models.Timesheet.employee_id == employee_id,
-        models.Timesheet.status == models.StatusEnum.pending
-    ).all()
+    # Move all pending timesheets for this employee in one statement
+    result = await crud_async.bulk_update_timesheet_status(
+        db, new_status, employee_ids=[employee_id], from_statuses=[models.StatusEnum.pending]
+    )
+    updated_count = result["updated"]
     
-    # Update their status
-    updated_count = 0
-    for timesheet in timesheets:
-        timesheet.status = models.StatusEnum(new_status)
-        updated_count += 1
-    
-    db.commit()
+    return {**result, "message": f"Updated {updated_count} timesheet(s) to {new_status}"}
+
+@router.put("/timesheets/status", response_model=schemas.BulkTimesheetStatusResult)
+async def update_department_timesheets_status(
+    status_update: schemas.BulkTimesheetStatusUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Approve or reject pending timesheets of several employees, or of the whole department when employee_ids is omitted."""
+    if current_user.role != models.RoleEnum.manager:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only managers can update timesheet statuses"
+        )
+    if not current_user.department_name:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Manager has no department assigned"
+        )
+    if status_update.department_name not in (None, current_user.department_name):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Managers can only update timesheets within their department"
+        )
+    if status_update.status not in ["approved", "rejected"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Status must be 'approved' or 'rejected'"
+        )
     
-    return {"updated": updated_count, "message": f"Updated {updated_count} timesheet(s) to {new_status}"}
+    # Employees outside the department are filtered out by the department scope
+    return await crud_async.bulk_update_timesheet_status(
+        db,
+        status_update.status,
+        employee_ids=status_update.employee_ids,
+        department_name=current_user.department_name,
+        from_statuses=[models.StatusEnum.pending],
+        employee_role=models.RoleEnum.employee,
+    )
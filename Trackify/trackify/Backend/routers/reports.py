@@ -0,0 +1,131 @@
+# routers/reports.py
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Optional
+
+from database import get_async_db
+from schemas import HoursRollupResponse, DepartmentHoursRollupResponse, AnalyticsResponse, AnalyticsRow
+from crud_async import get_hours_rollup, get_department_hours_rollup
+from security import Principal, get_current_user
+from config import ANALYTICS_SNAPSHOT_DIR, ANALYTICS_LATE_DAYS
+import snapshots
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+
+def report_filters(current_user: Principal, period: str, date_from, date_to, status_filter, department_name=None):
+    """Validate the query and scope it to what the caller may see."""
+    if period not in ("week", "month"):
+        raise HTTPException(status_code=400, detail="Invalid period value. Use week or month")
+    if status_filter is not None and status_filter not in ("pending", "approved", "rejected"):
+        raise HTTPException(status_code=400, detail="Invalid status value. Use pending, approved, or rejected")
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+
+    department_name = report_scope(current_user, department_name)
+    return dict(period=period, date_from=date_from, date_to=date_to, status=status_filter, department_name=department_name)
+
+
+def report_scope(current_user: Principal, department_name=None):
+    """The department the caller may report on: their own for managers, any (or all) for admins."""
+    role_value = current_user.role.value if hasattr(current_user.role, "value") else str(current_user.role)
+    if role_value == "manager":
+        if not current_user.department_name:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Manager has no department assigned")
+        if department_name not in (None, current_user.department_name):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Managers can only view their own department")
+        department_name = current_user.department_name
+    elif role_value not in ("admin", "administrator"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only managers and admins can view hour reports")
+    return department_name
+
+
+@router.get("/hours", response_model=list[HoursRollupResponse])
+async def hours_report(
+    period: str = Query("week", description="week (ISO, starting Monday) or month"),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    employee_id: Optional[str] = Query(None),
+    department_name: Optional[str] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status", description="pending, approved or rejected"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Hours per employee, period and status, newest period first.
+
+    Managers see their department, admins see everyone. Served from the
+    timesheet_hours_rollup table, so the cost follows the number of groups
+    returned rather than the number of timesheets.
+    """
+    filters = report_filters(current_user, period, date_from, date_to, status_filter, department_name)
+    rows = await get_hours_rollup(db, employee_id=employee_id, **filters)
+    return [
+        HoursRollupResponse(
+            employee_id=row.employee_id,
+            period=row.period.value,
+            period_start=row.period_start,
+            status=row.status.value,
+            total_hours=float(row.total_hours),
+            entry_count=row.entry_count,
+        )
+        for row in rows
+    ]
+
+
+@router.get("/hours/departments", response_model=list[DepartmentHoursRollupResponse])
+async def department_hours_report(
+    period: str = Query("week", description="week (ISO, starting Monday) or month"),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    department_name: Optional[str] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status", description="pending, approved or rejected"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Hours per department, period and status, summed from the rollup table."""
+    filters = report_filters(current_user, period, date_from, date_to, status_filter, department_name)
+    rows = await get_department_hours_rollup(db, **filters)
+    return [
+        DepartmentHoursRollupResponse(
+            department_name=row.department_name,
+            period=row.period.value,
+            period_start=row.period_start,
+            status=row.status.value,
+            total_hours=float(row.total_hours or 0),
+            entry_count=int(row.entry_count or 0),
+            employee_count=row.employee_count,
+        )
+        for row in rows
+    ]
+
+
+@router.get("/analytics", response_model=AnalyticsResponse)
+async def analytics_report(
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    group_by: str = Query("department_month", description="department_month, department or month"),
+    department_name: Optional[str] = Query(None),
+    late_after_days: int = Query(ANALYTICS_LATE_DAYS, ge=0, description="submissions later than this many days after the timesheet date are late"),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Hours, approval rates and late submissions of closed months, per department and/or month.
+
+    Served from the column snapshots written by snapshots.py rather than the
+    database, so it covers the months snapshotted so far and never the current
+    one. Managers see their department, admins see everyone.
+    """
+    if group_by not in snapshots.GROUP_BYS:
+        raise HTTPException(status_code=400, detail="Invalid group_by value. Use department_month, department or month")
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    department_name = report_scope(current_user, department_name)
+    if snapshots.np is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Analytics are not available on this server")
+
+    months, rows = await asyncio.to_thread(
+        snapshots.analytics, ANALYTICS_SNAPSHOT_DIR, date_from, date_to, group_by, department_name, late_after_days
+    )
+    return AnalyticsResponse(months=months, late_after_days=late_after_days, rows=[AnalyticsRow(**row) for row in rows])
@@ -1,98 +1,186 @@
 # routers/timesheet.py
-from fastapi import APIRouter, Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, time, datetime
 from typing import Optional, Union
-from jose import jwt, JWTError
-from sqlalchemy.orm import joinedload
 
-from database import get_db
+from database import get_async_db, AsyncSessionLocal
 from schemas import TimesheetCreate, TimesheetResponse, TimesheetWithEmployeeInfoResponse, TimesheetUpdate
+from schemas import TimesheetBatchCreate, TimesheetBatchResult
 
-from crud import (create_timesheet,get_timesheet,get_employee_timesheets,get_mentor_department_timesheets,get_all_timesheets,)
+from crud_async import (submit_timesheet,get_timesheet,get_timesheet_by_id,get_timesheets_page,create_timesheets_batch,record_timesheet_change,get_scope_version,department_id_for,)
+from rollups import snapshot
+import versions
+from crud import timesheets_export_query, TimesheetExists, IdempotencyKeyReused
+from exports import ENCODERS
+from fast_json import rows_response, columns_response
 from models import Employee, Timesheet, StatusEnum
-from config import SECRET_KEY, ALGORITHM
+from security import Principal, get_current_user
+from pagination import encode_cursor, decode_cursor
+from config import TIMESHEET_PAGE_SIZE, TIMESHEET_PAGE_SIZE_MAX, TIMESHEET_BATCH_MAX, TIMESHEET_EXPORT_CHUNK_ROWS
 
 router = APIRouter(prefix="/timesheets", tags=["Timesheets"])
 
 
-def get_current_user(Authorization: str = Header(...), db: Session = Depends(get_db)):
-    """Get current user from JWT token"""
-    if not Authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
-    token = Authorization.removeprefix("Bearer ").strip()
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-    except (JWTError, ValueError, KeyError):
-        raise HTTPException(status_code=401, detail="Invalid authentication token")
-    user = db.query(Employee).filter(Employee.employee_id == str(user_id)).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
-
-
 @router.get("/", response_model=Union[list[TimesheetResponse], list[TimesheetWithEmployeeInfoResponse]])
-def list_timesheets(
-    db: Session = Depends(get_db),
-    current_user: Employee = Depends(get_current_user)
+async def list_timesheets(
+    request: Request,
+    response: Response,
+    limit: int = Query(TIMESHEET_PAGE_SIZE, ge=1, le=TIMESHEET_PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status", description="pending, approved or rejected"),
+    employee_id: Optional[str] = Query(None),
+    shape: str = Query("rows", description="rows, or columnar for column arrays plus an employees dictionary"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Return timesheets based on role:
+    """Return one page of timesheets based on role, newest first:
     - employee: only their own timesheets
     - manager: all timesheets in their department
     - admin/administrator: all timesheets with employee info
+
+    When more rows exist, the X-Next-Cursor response header holds the cursor for the next page.
+    Responses carry an ETag; a request whose If-None-Match still matches gets 304 without the listing query.
+    shape=columnar returns the page as column arrays (see fast_json.dump_columns).
     """
     role_value = current_user.role.value if hasattr(current_user.role, "value") else str(current_user.role)
 
+    if status_filter is not None and status_filter not in ("pending", "approved", "rejected"):
+        raise HTTPException(status_code=400, detail="Invalid status value. Use pending, approved, or rejected")
+    if shape not in ("rows", "columnar"):
+        raise HTTPException(status_code=400, detail="Invalid shape. Use rows or columnar")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filters = dict(date_from=date_from, date_to=date_to, status=status_filter, after=after, limit=limit)
+
     if role_value == "employee":
-        return get_employee_timesheets(db, current_user.employee_id)
-    if role_value == "manager":
+        if employee_id is not None and employee_id != current_user.employee_id:
+            raise HTTPException(status_code=403, detail="Employees can only view their own timesheets")
+        scope = versions.employee_scope(current_user.employee_id)
+    elif role_value == "manager":
         if not current_user.department_name:
             return []
-        return get_mentor_department_timesheets(db, current_user.department_name)
+        scope = versions.department_scope(current_user.department_name)
+    elif role_value in ("admin", "administrator"):
+        scope = "timesheets:all"
+    else:
+        # Default: no access
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Role not authorized to view timesheets")
+
+    etag = versions.make_etag(scope, await get_scope_version(db, scope), request.url.query)
+    if versions.etag_matches(if_none_match, etag):
+        return versions.not_modified(etag)
+
+    if role_value == "employee":
+        rows, next_key = await get_timesheets_page(db, employee_id=current_user.employee_id, **filters)
+    elif role_value == "manager":
+        rows, next_key = await get_timesheets_page(db, employee_id=employee_id, department_name=current_user.department_name, **filters)
+    else:
+        # Admin: flat timesheet + employee columns, encoded straight to JSON (no per-row models)
+        rows, next_key = await get_timesheets_page(db, employee_id=employee_id, with_employee=True, **filters)
+
+    headers = {"ETag": etag}
+    if next_key is not None:
+        headers["X-Next-Cursor"] = encode_cursor(next_key)
+    if shape == "columnar":
+        model = TimesheetWithEmployeeInfoResponse if role_value in ("admin", "administrator") else TimesheetResponse
+        return columns_response(rows, list(model.model_fields), headers=headers)
     if role_value in ("admin", "administrator"):
-        # Admin: Join employee table and add info
-        results = (
-            db.query(Timesheet, Employee)
-            .join(Employee, Timesheet.employee_id == Employee.employee_id)
-            .all()
-        )
-        return [
-            TimesheetWithEmployeeInfoResponse(
-                timesheet_id=t.timesheet_id,
-                employee_id=t.employee_id,
-                employee_name=e.name,
-                employee_surname=e.surname,
-                employee_email=e.email,
-                employee_department=e.department_name,
-                date=t.date,
-                clock_in=t.clock_in,
-                clock_out=t.clock_out,
-                total_hours=float(t.total_hours) if t.total_hours is not None else None,
-                status=t.status.value if hasattr(t.status,'value') else str(t.status),
-                description=t.description,
-            )
-            for t, e in results
-        ]
-
-    # Default: no access
-    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Role not authorized to view timesheets")
+        return rows_response(rows, headers=headers)
+
+    response.headers.update(headers)
+    return rows
+
+
+@router.get("/export")
+async def export_timesheets(
+    export_format: str = Query("csv", alias="format", description="csv or ndjson"),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    status_filter: Optional[str] = Query(None, alias="status", description="pending, approved or rejected"),
+    employee_id: Optional[str] = Query(None),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Stream timesheets with employee info as CSV or NDJSON, oldest first.
+
+    Scoped like GET /timesheets/: employees get their own rows, managers their
+    department, admins everything. Rows are read through a server-side cursor
+    and written in chunks, so memory stays flat however large the export is.
+    """
+    encoder_class = ENCODERS.get(export_format)
+    if encoder_class is None:
+        raise HTTPException(status_code=400, detail="Invalid format value. Use csv or ndjson")
+    if status_filter is not None and status_filter not in ("pending", "approved", "rejected"):
+        raise HTTPException(status_code=400, detail="Invalid status value. Use pending, approved, or rejected")
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+
+    role_value = current_user.role.value if hasattr(current_user.role, "value") else str(current_user.role)
+    department_name = None
+    if role_value == "employee":
+        if employee_id is not None and employee_id != current_user.employee_id:
+            raise HTTPException(status_code=403, detail="Employees can only export their own timesheets")
+        employee_id = current_user.employee_id
+    elif role_value == "manager":
+        if not current_user.department_name:
+            raise HTTPException(status_code=400, detail="Manager has no department assigned")
+        department_name = current_user.department_name
+    elif role_value not in ("admin", "administrator"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Role not authorized to export timesheets")
+
+    encoder = encoder_class()
+
+    async def body():
+        yield encoder.header()
+        # The session lives as long as the stream, independent of the request's dependencies
+        async with AsyncSessionLocal() as session:
+            department_id = await department_id_for(session, department_name)
+            query = timesheets_export_query(employee_id, department_name, date_from, date_to, status_filter, department_id)
+            result = await session.stream(query.execution_options(yield_per=TIMESHEET_EXPORT_CHUNK_ROWS))
+            async for rows in result.partitions():
+                yield encoder.encode(rows)
+
+    filename = "timesheets"
+    if date_from:
+        filename += f"-from-{date_from.isoformat()}"
+    if date_to:
+        filename += f"-to-{date_to.isoformat()}"
+    return StreamingResponse(
+        body(),
+        media_type=encoder.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{encoder.extension}"'},
+    )
 
 
 @router.post("/", response_model=TimesheetResponse)
-def create_timesheet_entry(
+async def create_timesheet_entry(
     timesheet_data: TimesheetCreate,
-    db: Session = Depends(get_db),
-    current_user: Employee = Depends(get_current_user)
+    response: Response,
+    idempotency_key: Optional[str] = Header(
+        None, min_length=1, max_length=100,
+        description="Client-chosen key; retrying with the same key returns the first result instead of submitting again",
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Create a new timesheet entry for the authenticated user.
     
     Validations:
     - Only employees can create timesheets
-    - Only one timesheet per day per employee
+    - Only one timesheet per day per employee (enforced by uq_timesheet_employee_date);
+      a rejected timesheet for the date is re-opened with the new times instead
     - clock_out must be after clock_in
     - Automatically calculates total_hours
+
+    A response replayed for a repeated Idempotency-Key carries Idempotent-Replayed: true.
     """
     
     # Check if user is an employee
@@ -103,43 +191,6 @@ def create_timesheet_entry(
             detail="Only employees can create timesheets"
         )
     
-    # Check if timesheet already exists for this date and employee
-    existing_timesheet = get_timesheet(db, current_user.employee_id, timesheet_data.date)
-    if existing_timesheet:
-        # Check if the existing timesheet is rejected
-        existing_status = existing_timesheet.status.value if hasattr(existing_timesheet.status, 'value') else str(existing_timesheet.status)
-        
-        # If rejected, allow update by updating the existing timesheet
-        if existing_status == "rejected":
-            # Validate clock_out is after clock_in
-            if timesheet_data.clock_out <= timesheet_data.clock_in:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Clock out time must be after clock in time"
-                )
-            
-            # Calculate total hours
-            clock_in_datetime = datetime.combine(timesheet_data.date, timesheet_data.clock_in)
-            clock_out_datetime = datetime.combine(timesheet_data.date, timesheet_data.clock_out)
-            total_hours = (clock_out_datetime - clock_in_datetime).total_seconds() / 3600
-            
-            # Update the rejected timesheet
-            existing_timesheet.clock_in = timesheet_data.clock_in
-            existing_timesheet.clock_out = timesheet_data.clock_out
-            existing_timesheet.description = timesheet_data.description
-            existing_timesheet.total_hours = total_hours
-            existing_timesheet.status = StatusEnum.pending  # Reset to pending for review
-            
-            db.commit()
-            db.refresh(existing_timesheet)
-            return existing_timesheet
-        else:
-            # If not rejected, prevent duplicate
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Timesheet already exists for date {timesheet_data.date}. Only one timesheet per day is allowed."
-            )
-    
     # Validate clock_out is after clock_in
     if timesheet_data.clock_out <= timesheet_data.clock_in:
         raise HTTPException(
@@ -147,30 +198,70 @@ def create_timesheet_entry(
             detail="Clock out time must be after clock in time"
         )
     
-    # Calculate total hours
-    clock_in_datetime = datetime.combine(timesheet_data.date, timesheet_data.clock_in)
-    clock_out_datetime = datetime.combine(timesheet_data.date, timesheet_data.clock_out)
-    total_hours = (clock_out_datetime - clock_in_datetime).total_seconds() / 3600
-    
-    # Create timesheet entry
     try:
-        timesheet = create_timesheet(db, current_user.employee_id, timesheet_data)
-        return timesheet
-    except Exception as e:
+        timesheet, result = await submit_timesheet(db, current_user.employee_id, timesheet_data, idempotency_key)
+    except TimesheetExists as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(e))
+    if result == "replayed":
+        response.headers["Idempotent-Replayed"] = "true"
+    return timesheet
+
+
+@router.post("/batch", response_model=TimesheetBatchResult)
+async def create_timesheet_batch(
+    batch: TimesheetBatchCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Submit many days at once (e.g. a week or a month) for the authenticated employee.
+
+    Each entry is validated like POST /timesheets/; previously rejected days are
+    re-opened as pending. Everything is stored in one transaction and the response
+    reports the outcome of every entry.
+    """
+    user_role = current_user.role.value if hasattr(current_user.role, 'value') else str(current_user.role)
+    if user_role != 'employee':
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create timesheet: {str(e)}"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only employees can create timesheets"
+        )
+    if len(batch.entries) > TIMESHEET_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can contain at most {TIMESHEET_BATCH_MAX} entries"
         )
+
+    try:
+        items = await create_timesheets_batch(db, current_user.employee_id, batch.entries)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another submission for some of these dates was stored concurrently; retry the batch"
+        )
+
+    created = sum(1 for item in items if item["result"] == "created")
+    reopened = sum(1 for item in items if item["result"] == "reopened")
+    return {
+        "created": created,
+        "reopened": reopened,
+        "failed": len(items) - created - reopened,
+        "items": items,
+    }
+
+
 @router.put("/{timesheet_id}", response_model=TimesheetResponse)
-def update_timesheet_entry(
+async def update_timesheet_entry(
     timesheet_id: int,
     update_data: TimesheetUpdate,
-    db: Session = Depends(get_db),
-    current_user: Employee = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
 
 # Fetch the timesheet
-    ts = db.query(Timesheet).filter(Timesheet.timesheet_id == timesheet_id).first()
+    ts = await get_timesheet_by_id(db, timesheet_id)
     if not ts:
         raise HTTPException(status_code=404, detail="Timesheet not found")
 
@@ -186,6 +277,7 @@ def update_timesheet_entry(
             raise HTTPException(status_code=400, detail="Clock out time must be after clock in time")
 
     # Update fields safely
+    before = snapshot(ts)
     if update_data.clock_in:
         ts.clock_in = update_data.clock_in
     if update_data.clock_out:
@@ -212,7 +304,8 @@ def update_timesheet_entry(
         ts.total_hours = (clock_out_datetime - clock_in_datetime).total_seconds() / 3600
 
     # Commit changes
-    db.commit()
-    db.refresh(ts)
+    await record_timesheet_change(db, before, snapshot(ts), ts.timesheet_id)
+    await db.commit()
+    await db.refresh(ts)
 
     return ts
\ No newline at end of file
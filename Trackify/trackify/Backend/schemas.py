@@ -37,6 +37,28 @@ class EmployeeCreate(UserBase):
     role: str
     department_name: Optional[str]
 
+class EmployeeImportItem(BaseModel):
+    # All optional so a bad row is reported in the import result instead of failing the request
+    employee_id: Optional[str] = None
+    email: Optional[str] = None
+    password: Optional[str] = None
+    name: Optional[str] = None
+    surname: Optional[str] = None
+    role: Optional[str] = None
+    department_name: Optional[str] = None
+
+class EmployeeImportItemResult(BaseModel):
+    index: int
+    employee_id: Optional[str] = None
+    email: Optional[str] = None
+    result: str  # created, duplicate or invalid
+    detail: Optional[str] = None
+
+class EmployeeImportResult(BaseModel):
+    created: int
+    failed: int
+    items: list[EmployeeImportItemResult]
+
 class EmployeeResponse(UserBase):
     employee_id: str
     name: str
@@ -81,6 +103,9 @@ class TimesheetCreate(BaseModel):
     clock_out: time
     description: Optional[str]
 
+class TimesheetBatchCreate(BaseModel):
+    entries: list[TimesheetCreate]
+
 class TimesheetUpdate(BaseModel):
     clock_in: Optional[time]
     clock_out: Optional[time]
@@ -89,7 +114,7 @@ class TimesheetUpdate(BaseModel):
 
 class TimesheetResponse(BaseModel):
     timesheet_id: int
-    employee_id: int
+    employee_id: str
     date: date
     clock_in: time
     clock_out: time
@@ -104,6 +129,81 @@ class TimesheetStatusUpdate(BaseModel):
     status: str
 
 
+class TimesheetBatchItemResult(BaseModel):
+    index: int
+    date: date
+    result: str  # created, reopened, duplicate or invalid
+    detail: Optional[str] = None
+    timesheet: Optional[TimesheetResponse] = None
+
+class TimesheetBatchResult(BaseModel):
+    created: int
+    reopened: int
+    failed: int
+    items: list[TimesheetBatchItemResult]
+
+
+class PendingQueueEmployee(BaseModel):
+    employee_id: str
+    name: str
+    surname: str
+    pending: int
+    oldest_date: date
+
+class PendingQueueResponse(BaseModel):
+    pending: int
+    employees: list[PendingQueueEmployee]
+    items: list[TimesheetResponse]
+
+
+class BulkTimesheetStatusUpdate(BaseModel):
+    status: str
+    employee_ids: Optional[list[str]] = None
+    department_name: Optional[str] = None
+
+class BulkTimesheetStatusResult(BaseModel):
+    updated: int
+    status: str
+    counts: dict[str, int]
+    timesheet_ids: Optional[list[int]] = None
+
+
+# ===================== Reports =====================
+class HoursRollupResponse(BaseModel):
+    employee_id: str
+    period: str
+    period_start: date
+    status: str
+    total_hours: float
+    entry_count: int
+
+class DepartmentHoursRollupResponse(BaseModel):
+    department_name: Optional[str]
+    period: str
+    period_start: date
+    status: str
+    total_hours: float
+    entry_count: int
+    employee_count: int
+
+class AnalyticsRow(BaseModel):
+    month: Optional[str]  # YYYY-MM, None when not grouped by month
+    department_name: Optional[str]
+    total_hours: float
+    entry_count: int
+    approved: int
+    rejected: int
+    pending: int
+    approval_rate: Optional[float]  # approved / (approved + rejected); None while nothing was reviewed
+    late_submissions: int
+    unknown_submission_time: int
+
+class AnalyticsResponse(BaseModel):
+    months: list[str]  # the closed months the snapshots covered
+    late_after_days: int
+    rows: list[AnalyticsRow]
+
+
 class TimesheetWithEmployeeInfoResponse(BaseModel):
     timesheet_id: int
     employee_id: str
@@ -0,0 +1,125 @@
+# security.py
+"""Shared JWT authentication for the app and every router.
+
+Tokens carry the caller's role and department as signed claims, so permission
+checks read them straight from the token. Every request checks those claims
+against the employee's cached role and department; the employee row is only
+read when that entry is missing, i.e. on first use, after
+PRINCIPAL_CACHE_TTL_SECONDS, or after crud.update_employee changed the role or
+department and invalidated it.
+
+The entries live in the CACHE_BACKEND of cache.py. With a backend shared by
+all workers (sqlite:///...), a demoted or moved employee is rejected by every
+worker on their next request. The default "memory" backend is per process:
+other workers keep the old role until the TTL runs out, so deployments with
+several workers should configure a shared backend.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, status
+from jose import jwt, JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from config import (
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    PRINCIPAL_CACHE_TTL_SECONDS,
+)
+from database import get_async_db
+from cache import ReadThroughCache, cache, principal_key
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller. Exposes the Employee attributes used in permission checks."""
+    employee_id: str
+    role: models.RoleEnum
+    department_name: Optional[str]
+
+    @classmethod
+    def from_employee(cls, employee: models.Employee) -> "Principal":
+        return cls(
+            employee_id=employee.employee_id,
+            role=models.RoleEnum(employee.role),
+            department_name=employee.department_name,
+        )
+
+    @classmethod
+    def from_record(cls, employee_id: str, record: dict) -> "Principal":
+        return cls(employee_id=employee_id, role=models.RoleEnum(record["role"]), department_name=record["department_name"])
+
+    def record(self) -> dict:
+        """JSON-compatible form stored in the principal cache."""
+        return {"role": self.role.value, "department_name": self.department_name}
+
+
+# One entry per employee in the cache backend of cache.py, so an invalidation reaches
+# every worker sharing that backend; tokens are checked against it on every request
+principal_cache = ReadThroughCache(cache.backend, PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def invalidate_principal(employee_id: str):
+    principal_cache.invalidate(principal_key(str(employee_id)))
+
+
+# ===================== Tokens =====================
+def create_access_token(employee: models.Employee) -> str:
+    role = employee.role.value if hasattr(employee.role, "value") else str(employee.role)
+    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode = {
+        "sub": employee.employee_id,  # employee_id is string
+        "exp": expire,
+        "role": role,
+        "department_name": employee.department_name,
+    }
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def _credentials_error(detail: str = "Could not validate credentials"):
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def decode_access_token(authorization: Optional[str]) -> dict:
+    if not authorization or not authorization.startswith("Bearer "):
+        raise _credentials_error("Missing or invalid Authorization header")
+    token = authorization.removeprefix("Bearer ").strip()
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise _credentials_error("Invalid authentication token")
+    if payload.get("sub") is None or payload.get("exp") is None:
+        raise _credentials_error("Invalid authentication token")
+    return payload
+
+
+def _claims_match(payload: dict, principal: Principal) -> bool:
+    return payload.get("role") == principal.role.value and payload.get("department_name") == principal.department_name
+
+
+# ===================== Dependencies =====================
+async def get_current_user(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    payload = decode_access_token(authorization)
+    subject = str(payload["sub"])
+
+    async def load_principal():
+        result = await db.execute(select(models.Employee).where(models.Employee.employee_id == subject))
+        user = result.scalars().first()
+        if user is None:
+            raise _credentials_error("User not found")
+        return Principal.from_employee(user).record()
+
+    principal = Principal.from_record(subject, await principal_cache.aget_or_load(principal_key(subject), load_principal))
+
+    # Tokens issued before role/department claims existed are trusted for their remaining lifetime
+    if "role" in payload and not _claims_match(payload, principal):
+        raise _credentials_error("Role or department changed, please sign in again")
+    return principal
@@ -0,0 +1,295 @@
+# snapshots.py
+"""Columnar snapshots of closed months of timesheets, for GET /reports/analytics.
+
+Year-over-year questions (hours per department and month, approval rates, late
+submissions) touch every timesheet ever written. Closed months hardly change,
+so write_snapshots stores each one as a directory of NumPy column files:
+
+    department  int16  index into the month's department names, -1 for none
+    status      int8   index into STATUSES
+    hours       int32  total hours in hundredths
+    day         int8   day of the month
+    lag_days    int16  days from the timesheet date to its submission, -1 when unknown
+
+index.json maps each month (YYYY-MM) to its directory, row count, department
+names and a fingerprint of its hours rollups. A month is only rewritten when
+that fingerprint changes (an approval, an edit, an employee changing
+department); the new directory is written first and index.json replaced in one
+rename, so readers never see half a month. The current month is never
+snapshotted: /reports/hours serves it from the rollup table.
+
+Readers memory-map the column files and aggregate them with bincount, so a
+ten-year report reads a few megabytes of page cache instead of the database.
+
+Run from the Backend directory, e.g. nightly from cron (one run at a time):
+
+    python snapshots.py
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session
+
+try:
+    import numpy as np
+except ImportError:  # optional: without it snapshots are neither written nor read
+    np = None
+
+import models
+from config import ANALYTICS_SNAPSHOT_DIR, ANALYTICS_LATE_DAYS
+
+STATUSES = tuple(models.StatusEnum)
+COLUMNS = {"department": "int16", "status": "int8", "hours": "int32", "day": "int8", "lag_days": "int16"}
+INDEX_FILE = "index.json"
+GROUP_BYS = ("department_month", "department", "month")
+
+
+def month_key(month: date) -> str:
+    return f"{month:%Y-%m}"
+
+
+def next_month(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+# ---------- Writing ----------
+def month_fingerprints(db: Session, before: date) -> dict:
+    """{first of month: fingerprint} of every month before the given one that has timesheets.
+
+    Hashes the monthly rollups per department and status, which change with
+    every status change, hours edit or employee department move in that month.
+    """
+    rollup = models.TimesheetHoursRollup
+    rows = db.execute(
+        select(
+            rollup.period_start, models.Employee.department_name, rollup.status,
+            func.sum(rollup.entry_count), func.sum(rollup.total_hours),
+        )
+        .join(models.Employee, models.Employee.employee_id == rollup.employee_id)
+        .where(rollup.period == models.PeriodEnum.month, rollup.period_start < before, rollup.entry_count > 0)
+        .group_by(rollup.period_start, models.Employee.department_name, rollup.status)
+    ).all()
+    groups = {}
+    for month, department_name, status, entries, hours in rows:
+        groups.setdefault(month, []).append(repr((department_name, status.value, int(entries), str(hours))))
+    return {
+        month: hashlib.sha1("\n".join(sorted(lines)).encode()).hexdigest()
+        for month, lines in sorted(groups.items())
+    }
+
+
+def snapshot_rows_query(start: date, end: date):
+    """Every timesheet dated in [start, end), live or archived, with its employee's department."""
+    rows = union_all(*(
+        select(source.employee_id, source.date, source.status, source.total_hours, source.submitted_at)
+        .where(source.date >= start, source.date < end)
+        for source in (models.Timesheet, models.TimesheetArchive)
+    )).subquery()
+    return select(
+        rows.c.date, rows.c.status, rows.c.total_hours, rows.c.submitted_at, models.Employee.department_name
+    ).outerjoin(models.Employee, models.Employee.employee_id == rows.c.employee_id)
+
+
+def encode_rows(rows):
+    """(column arrays, department names) of the rows of snapshot_rows_query."""
+    departments = {}
+    columns = {name: [] for name in COLUMNS}
+    for day, status, hours, submitted_at, department_name in rows:
+        if department_name is None:
+            columns["department"].append(-1)
+        else:
+            columns["department"].append(departments.setdefault(department_name, len(departments)))
+        columns["status"].append(STATUSES.index(status))
+        columns["hours"].append(round((hours or 0) * 100))
+        columns["day"].append(day.day)
+        if submitted_at is None:
+            columns["lag_days"].append(-1)
+        else:
+            columns["lag_days"].append(min(max((submitted_at.date() - day).days, 0), np.iinfo(np.int16).max))
+    arrays = {name: np.array(values, dtype=COLUMNS[name]) for name, values in columns.items()}
+    return arrays, list(departments)
+
+
+def write_month(directory: str, month: date, rows, fingerprint: str) -> dict:
+    """Write one month into a new directory; returns its index.json entry."""
+    arrays, departments = encode_rows(rows)
+    path = tempfile.mkdtemp(prefix=month_key(month) + "-", dir=directory)
+    for name, values in arrays.items():
+        np.save(os.path.join(path, name + ".npy"), values)
+    return {
+        "path": os.path.basename(path),
+        "rows": len(arrays["status"]),
+        "departments": departments,
+        "fingerprint": fingerprint,
+        "written_at": datetime.utcnow().isoformat(timespec="seconds"),
+    }
+
+
+def save_index(directory: str, index: dict):
+    staging = os.path.join(directory, INDEX_FILE + ".tmp")
+    with open(staging, "w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(staging, os.path.join(directory, INDEX_FILE))
+
+
+def remove_unreferenced(directory: str, index: dict):
+    """Delete month directories index.json no longer points to (replaced, or left by an interrupted run)."""
+    referenced = {entry["path"] for entry in index.values()}
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name not in referenced and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def write_snapshots(db: Session, directory: str = ANALYTICS_SNAPSHOT_DIR, today: date = None,
+                    rebuild: bool = False) -> list:
+    """Snapshot every closed month that changed since its last snapshot; returns the months written or dropped."""
+    if np is None:
+        raise RuntimeError("Analytics snapshots need numpy")
+    os.makedirs(directory, exist_ok=True)
+    fingerprints = month_fingerprints(db, (today or date.today()).replace(day=1))
+    index = load_index(directory)
+    changed = []
+    for month, fingerprint in fingerprints.items():
+        key = month_key(month)
+        if not rebuild and index.get(key, {}).get("fingerprint") == fingerprint:
+            continue
+        rows = db.execute(snapshot_rows_query(month, next_month(month))).all()
+        index[key] = write_month(directory, month, rows, fingerprint)
+        changed.append(key)
+    for key in set(index) - {month_key(month) for month in fingerprints}:
+        del index[key]
+        changed.append(key)
+    save_index(directory, index)
+    remove_unreferenced(directory, index)
+    return sorted(changed)
+
+
+# ---------- Reading ----------
+def load_index(directory: str) -> dict:
+    try:
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def load_columns(directory: str, entry: dict) -> dict:
+    """The month's columns, memory-mapped (numpy cannot map the empty files of a month without rows)."""
+    if entry["rows"] == 0:
+        return {name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+    return {
+        name: np.load(os.path.join(directory, entry["path"], name + ".npy"), mmap_mode="r")
+        for name in COLUMNS
+    }
+
+
+def month_totals(columns: dict, selected, department_count: int, late_after_days: int) -> dict:
+    """Per-department totals of one month's selected rows, as arrays indexed by department code + 1."""
+    codes = columns["department"][selected].astype(np.intp) + 1
+    statuses = columns["status"][selected]
+    lag_days = columns["lag_days"][selected]
+    size = department_count + 1
+
+    def count(mask=None):
+        return np.bincount(codes if mask is None else codes[mask], minlength=size)
+
+    totals = {
+        "hours": np.bincount(codes, weights=columns["hours"][selected], minlength=size),
+        "entries": count(),
+        "late": count(lag_days > late_after_days),
+        "unknown": count(lag_days < 0),
+    }
+    for code, status in enumerate(STATUSES):
+        totals[status.value] = count(statuses == code)
+    return totals
+
+
+def month_selection(columns: dict, month: date, departments: list, date_from, date_to, department_name):
+    """Rows of the month within the date range and department, as a mask (a full slice when unfiltered)."""
+    mask = None
+
+    def narrow(condition):
+        return condition if mask is None else mask & condition
+
+    if date_from and month < date_from:
+        mask = narrow(columns["day"] >= date_from.day)
+    if date_to and next_month(month) > date_to:
+        mask = narrow(columns["day"] <= date_to.day)
+    if department_name is not None:
+        mask = narrow(columns["department"] == departments.index(department_name))
+    return slice(None) if mask is None else mask
+
+
+def analytics(directory: str = ANALYTICS_SNAPSHOT_DIR, date_from: date = None, date_to: date = None,
+              group_by: str = "department_month", department_name: str = None,
+              late_after_days: int = ANALYTICS_LATE_DAYS):
+    """(months read, rows) aggregated from the snapshots of the months overlapping [date_from, date_to].
+
+    Each row holds the month and/or department it groups (None when not grouped
+    by it) and its hours, entries, counts per status, late and unknown submissions.
+    """
+    if group_by not in GROUP_BYS:
+        raise ValueError(f"Unsupported group_by {group_by!r}")
+    index = load_index(directory)
+    first = date_from.replace(day=1) if date_from else None
+    months = sorted(key for key in index if (not first or key >= month_key(first)) and (not date_to or key <= month_key(date_to)))
+
+    groups = {}
+    for key in months:
+        entry = index[key]
+        departments = entry["departments"]
+        if department_name is not None and department_name not in departments:
+            continue
+        month = datetime.strptime(key, "%Y-%m").date()
+        columns = load_columns(directory, entry)
+        selected = month_selection(columns, month, departments, date_from, date_to, department_name)
+        totals = month_totals(columns, selected, len(departments), late_after_days)
+        for code in np.flatnonzero(totals["entries"]):
+            group = (
+                key if group_by != "department" else None,
+                (departments[code - 1] if code else None) if group_by != "month" else None,
+            )
+            row = groups.setdefault(group, dict.fromkeys(("hours", "entries", "late", "unknown", *(s.value for s in STATUSES)), 0))
+            for name, values in totals.items():
+                row[name] += values[code]
+
+    rows = []
+    for (key, name), row in sorted(groups.items(), key=lambda item: (item[0][0] or "", item[0][1] or "")):
+        approved, rejected = int(row["approved"]), int(row["rejected"])
+        rows.append({
+            "month": key,
+            "department_name": name,
+            "total_hours": round(float(row["hours"]) / 100, 2),
+            "entry_count": int(row["entries"]),
+            "approved": approved,
+            "rejected": rejected,
+            "pending": int(row["pending"]),
+            "approval_rate": round(approved / (approved + rejected), 4) if approved + rejected else None,
+            "late_submissions": int(row["late"]),
+            "unknown_submission_time": int(row["unknown"]),
+        })
+    return months, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--directory", default=ANALYTICS_SNAPSHOT_DIR, help="where the snapshots are kept")
+    parser.add_argument("--rebuild", action="store_true", help="rewrite every month, changed or not")
+    args = parser.parse_args()
+
+    from database import SessionLocal
+
+    with SessionLocal() as db:
+        changed = write_snapshots(db, args.directory, rebuild=args.rebuild)
+    print(json.dumps({"directory": args.directory, "months_written": changed}))
+
+
+if __name__ == "__main__":
+    main()
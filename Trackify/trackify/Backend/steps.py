@@ -0,0 +1,78 @@
+# steps.py
+"""Multi-step database operations written once for crud.py and crud_async.py.
+
+An operation is a generator taking the session's dialect first. It yields the
+steps below and is sent each step's result, so claims, replays, rollup deltas,
+version bumps and cache invalidation are decided in one place; crud.run
+carries the steps out on a Session and crud_async.run on an AsyncSession. A
+step that raises (an IntegrityError, say) is thrown back into the operation
+where it yielded, so its try/except blocks work as in plain code.
+
+Sub-operations compose with yield from, e.g.
+
+    departments = yield from employee_departments_steps(employee_ids)
+"""
+from typing import Any, NamedTuple, Optional
+
+
+class Execute(NamedTuple):
+    """session.execute(statement, params); the result is the Result."""
+    statement: Any
+    params: Any = None
+
+
+class Get(NamedTuple):
+    """session.get(model, key); the result is the instance or None."""
+    model: Any
+    key: Any
+
+
+class Commit(NamedTuple):
+    pass
+
+
+class Rollback(NamedTuple):
+    pass
+
+
+class Refresh(NamedTuple):
+    instance: Any
+
+
+class HashPasswords(NamedTuple):
+    """Hashes of the passwords from the hashing pool, in order."""
+    passwords: list
+
+
+class Departments(NamedTuple):
+    """The cached department list (see crud.list_departments)."""
+
+
+class DepartmentId(NamedTuple):
+    """crud.department_id_for the department name."""
+    department_name: Optional[str]
+
+
+class StageEvents(NamedTuple):
+    """events.stage on the session, published when it commits."""
+    changes: list
+    departments: dict
+
+
+class Operation:
+    """Drives one operation generator: resume it with each step's result or error."""
+
+    def __init__(self, generator):
+        self.generator = generator
+        self.done = False
+        self.result = None
+
+    def resume(self, value=None, error: BaseException = None):
+        """The next step, or None once the operation has returned (its value is in result)."""
+        try:
+            if error is not None:
+                return self.generator.throw(error)
+            return self.generator.send(value)
+        except StopIteration as stop:
+            self.done, self.result = True, stop.value
+            return None
@@ -0,0 +1,85 @@
+# tests/conftest.py
+"""Fixtures for the backend tests.
+
+Every test runs against an empty SQLite database created from the models, with
+empty caches. Run from the Backend directory:
+
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+
+DATABASE_DIR = tempfile.mkdtemp(prefix="trackify-tests-")
+# Set before the app modules read them (load_dotenv does not override existing variables)
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_DIR}/test.db"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{DATABASE_DIR}/test.db"
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["PASSWORD_HASH_ROUNDS"] = "1000"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import cache
+import crud
+import main
+import schemas
+import security
+from database import Base, SessionLocal, engine
+
+PASSWORD = "secret-password"
+
+
+@pytest.fixture(autouse=True)
+def database(monkeypatch):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    backend = cache.MemoryBackend()
+    monkeypatch.setattr(cache.cache, "backend", backend)
+    monkeypatch.setattr(security.principal_cache, "backend", backend)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def add_employee(db):
+    def add_employee(employee_id, role="employee", department_name=None):
+        return crud.create_employee(db, schemas.EmployeeCreate(
+            employee_id=employee_id, email=f"{employee_id.lower()}@example.com", password=PASSWORD,
+            name=employee_id, surname="Test", role=role, department_name=department_name,
+        ))
+    return add_employee
+
+
+@pytest.fixture
+def add_department(db):
+    def add_department(name):
+        return crud.create_department(db, schemas.DepartmentCreate(name=name))
+    return add_department
+
+
+@pytest.fixture
+def auth(client):
+    """Authorization headers of an employee added with add_employee."""
+    def auth(employee_id):
+        response = client.post("/login", json={"email": f"{employee_id.lower()}@example.com", "password": PASSWORD})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return auth
+
+
+def timesheet(day, clock_in="08:00", clock_out="16:00", description="work"):
+    return schemas.TimesheetCreate(date=day, clock_in=clock_in, clock_out=clock_out, description=description)
@@ -0,0 +1,53 @@
+from datetime import date
+
+import archive
+import crud
+import models
+import schemas
+import versions
+from conftest import timesheet
+
+DAY = date(2024, 3, 4)
+
+
+def archive_approved(db, *employee_ids):
+    crud.bulk_update_timesheet_status(db, "approved", employee_ids=list(employee_ids))
+    return archive.archive_timesheets(db, cutoff=date(2025, 1, 1))
+
+
+def test_moving_an_employee_moves_archived_timesheets(db, client, auth, add_department, add_employee):
+    add_department("Eng")
+    add_department("Ops")
+    add_employee("E2", department_name="Eng")
+    add_employee("M2", role="manager", department_name="Ops")
+    crud.submit_timesheet(db, "E2", timesheet(DAY))
+    assert archive_approved(db, "E2") == 1
+    eng, ops = versions.department_scope("Eng"), versions.department_scope("Ops")
+    before = crud.get_scope_version(db, eng), crud.get_scope_version(db, ops)
+
+    crud.update_employee(db, "E2", schemas.EmployeeUpdate(
+        name="E2", surname="Test", email="e2@example.com", role="employee", department_name="Ops",
+    ))
+
+    assert crud.get_mentor_department_timesheets(db, "Eng") == []
+    [row] = crud.get_mentor_department_timesheets(db, "Ops")
+    assert (row.employee_id, row.date) == ("E2", DAY)
+    assert db.query(models.TimesheetArchive.department_id).scalar() == crud.department_id_for(db, "Ops")
+    assert crud.get_scope_version(db, eng) > before[0] and crud.get_scope_version(db, ops) > before[1]
+
+    response = client.get("/timesheets/", headers=auth("M2"))
+    assert response.status_code == 200
+    assert [t["date"] for t in response.json()] == [DAY.isoformat()]
+
+
+def test_new_department_attaches_archived_timesheets(db, add_department, add_employee):
+    add_employee("E3", department_name="Support")
+    crud.submit_timesheet(db, "E3", timesheet(DAY))
+    archive_approved(db, "E3")
+
+    add_department("Support")
+
+    department_id = crud.department_id_for(db, "Support")
+    assert department_id is not None
+    assert db.query(models.TimesheetArchive.department_id).scalar() == department_id
+    assert [row.employee_id for row in crud.get_mentor_department_timesheets(db, "Support")] == ["E3"]
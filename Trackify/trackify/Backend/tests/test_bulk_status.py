@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+
+import pytest
+
+import crud
+import models
+from conftest import timesheet
+from database import async_engine, engine
+
+DAYS = [date(2024, 3, 4) + timedelta(days=i) for i in range(3)]
+
+
+@pytest.fixture
+def pending(db, add_department, add_employee):
+    add_department("Eng")
+    add_employee("E1", department_name="Eng")
+    add_employee("E2", department_name="Eng")
+    add_employee("M1", role="manager", department_name="Eng")
+    for employee_id in ("E1", "E2"):
+        for day in DAYS:
+            crud.submit_timesheet(db, employee_id, timesheet(day))
+    return {row.timesheet_id: row.employee_id for row in db.query(models.Timesheet)}
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_bulk_update(db, pending, returning, monkeypatch):
+    monkeypatch.setattr(engine.dialect, "update_returning", returning)
+
+    result = crud.bulk_update_timesheet_status(db, "approved", employee_ids=["E1"])
+
+    e1_ids = sorted(i for i, employee_id in pending.items() if employee_id == "E1")
+    assert result["updated"] == 3
+    assert (sorted(result["timesheet_ids"]) if returning else result["timesheet_ids"]) == (e1_ids if returning else None)
+    assert result["counts"] == {"pending": 0, "approved": 3, "rejected": 0}
+    statuses = dict(db.query(models.Timesheet.timesheet_id, models.Timesheet.status))
+    assert {i for i, s in statuses.items() if s == models.StatusEnum.approved} == set(e1_ids)
+
+
+def test_bulk_update_skips_rows_already_in_the_status(db, pending):
+    crud.bulk_update_timesheet_status(db, "approved", employee_ids=["E1"])
+    again = crud.bulk_update_timesheet_status(db, "approved", employee_ids=["E1", "E2"], from_statuses=["pending"])
+    assert again["updated"] == 3 and again["counts"]["approved"] == 6
+
+
+def test_bulk_update_needs_a_scope(db):
+    with pytest.raises(ValueError):
+        crud.bulk_update_timesheet_status(db, "approved")
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_manager_bulk_update(db, pending, client, auth, add_employee, returning, monkeypatch):
+    monkeypatch.setattr(async_engine.dialect, "update_returning", returning)
+    add_employee("E9", department_name="Ops")
+    crud.submit_timesheet(db, "E9", timesheet(DAYS[0]))
+
+    # E9 is outside the manager's department and stays pending
+    body = {"status": "rejected", "employee_ids": ["E2", "E9"]}
+    response = client.put("/manager/timesheets/status", json=body, headers=auth("M1"))
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["updated"] == 3 and result["status"] == "rejected"
+    assert result["counts"] == {"pending": 0, "approved": 0, "rejected": 3}
+    assert (result["timesheet_ids"] is None) is not returning
+    assert db.query(models.Timesheet).filter_by(employee_id="E9").one().status == models.StatusEnum.pending
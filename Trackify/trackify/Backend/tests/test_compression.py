@@ -0,0 +1,71 @@
+import gzip
+
+import brotli
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from compression import CompressionMiddleware, choose_encoding
+
+BODY = "timesheet," * 500
+
+
+def stream(request):
+    async def chunks():
+        for _ in range(3):
+            yield BODY
+
+    return StreamingResponse(chunks(), media_type=request.query_params.get("type", "text/csv"))
+
+
+app = Starlette(routes=[
+    Route("/large", lambda request: PlainTextResponse(BODY)),
+    Route("/small", lambda request: PlainTextResponse("ok")),
+    Route("/encoded", lambda request: PlainTextResponse(BODY, headers={"Content-Encoding": "identity"})),
+    Route("/stream", stream),
+])
+app.add_middleware(CompressionMiddleware, minimum_size=100)
+client = TestClient(app)
+
+
+def raw(path, accept_encoding):
+    # stream=True keeps httpx from decoding the body
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("accept_encoding, encoding, decode", [
+    ("gzip, br", "br", brotli.decompress),
+    ("gzip", "gzip", gzip.decompress),
+    ("br;q=0.5, gzip", "gzip", gzip.decompress),
+])
+def test_compresses_with_the_preferred_coding(accept_encoding, encoding, decode):
+    for path, expected in (("/large", BODY), ("/stream", BODY * 3)):
+        response, body = raw(path, accept_encoding)
+        assert response.headers["content-encoding"] == encoding
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert decode(body).decode() == expected
+        if path == "/large":
+            assert response.headers["content-length"] == str(len(body))
+        else:
+            assert "content-length" not in response.headers
+
+
+@pytest.mark.parametrize("path, accept_encoding", [
+    ("/small", "gzip, br"),
+    ("/encoded", "gzip, br"),
+    ("/stream?type=text/event-stream", "gzip, br"),
+    ("/large", "identity"),
+])
+def test_passes_through(path, accept_encoding):
+    response, body = raw(path, accept_encoding)
+    assert "content-encoding" not in response.headers or response.headers["content-encoding"] == "identity"
+    assert body.decode() in ("ok", BODY, BODY * 3)
+
+
+def test_choose_encoding():
+    assert choose_encoding("") is None
+    assert choose_encoding("*") == "br"
+    assert choose_encoding("br;q=0, *;q=0.1") == "gzip"
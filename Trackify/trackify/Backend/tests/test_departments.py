@@ -0,0 +1,49 @@
+from datetime import date
+
+import crud
+import models
+from conftest import timesheet
+
+DAY = date(2024, 3, 4)
+
+
+def sql(statement):
+    return str(statement.compile(compile_kwargs={"literal_binds": True}))
+
+
+def test_department_reads_use_the_department_id():
+    scope = crud.bulk_status_scope(department_name="Eng", department_id=7)
+    assert "timesheet.department_id = 7" in sql(models.Timesheet.__table__.select().where(*scope))
+    rollups = sql(crud.hours_rollup_query(period="week", department_name="Eng", department_id=7))
+    assert "employee.department_id = 7" in rollups and "department_name" not in rollups
+
+
+def test_bulk_status_update_by_department(db, add_department, add_employee):
+    add_department("Eng")
+    add_employee("E1", department_name="Eng")
+    add_employee("M1", role="manager", department_name="Eng")
+    add_employee("E2", department_name="Ops")  # no department row: matched by name
+    for employee_id in ("E1", "M1", "E2"):
+        crud.submit_timesheet(db, employee_id, timesheet(DAY))
+
+    result = crud.bulk_update_timesheet_status(db, "approved", department_name="Eng", employee_role="employee")
+    assert result["updated"] == 1 and result["counts"] == {"pending": 0, "approved": 1, "rejected": 0}
+    assert crud.bulk_update_timesheet_status(db, "approved", department_name="Ops")["updated"] == 1
+
+    statuses = dict(db.query(models.Timesheet.employee_id, models.Timesheet.status))
+    assert statuses == {"E1": models.StatusEnum.approved, "M1": models.StatusEnum.pending, "E2": models.StatusEnum.approved}
+
+
+def test_department_hours_report(db, client, auth, add_department, add_employee):
+    add_department("Eng")
+    add_department("Ops")
+    add_employee("E1", department_name="Eng")
+    add_employee("E2", department_name="Ops")
+    add_employee("M1", role="manager", department_name="Eng")
+    for employee_id in ("E1", "E2"):
+        crud.submit_timesheet(db, employee_id, timesheet(DAY))
+
+    response = client.get("/reports/hours", params={"period": "month"}, headers=auth("M1"))
+
+    assert response.status_code == 200
+    assert [(row["employee_id"], row["total_hours"]) for row in response.json()] == [("E1", 8.0)]
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+import crud
+import schemas
+from conftest import PASSWORD
+
+
+def test_login_ignores_case_and_surrounding_spaces(client, add_employee):
+    add_employee("E1")
+    response = client.post("/login", json={"email": "  E1@Example.COM ", "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    assert client.post("/login", json={"email": "E1@Example.COM", "password": "wrong"}).status_code == 401
+
+
+def test_lookup_ignores_case(db, add_employee):
+    add_employee("E1")
+    assert crud.get_user_by_email(db, "E1@EXAMPLE.COM").employee_id == "E1"
+    assert crud.get_user_by_email(db, "e2@example.com") is None
+
+
+def test_admin_create_rejects_email_in_another_case(client, auth, add_employee):
+    add_employee("A1", role="admin")
+    add_employee("E1")
+    body = {"employee_id": None, "email": "E1@Example.com", "password": "secret", "name": "New", "surname": "Test", "role": "employee",
+            "department_name": None}
+    response = client.post("/admin/employees", json=body, headers=auth("A1"))
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Email already in use"
+
+
+def test_unique_index_covers_case(db, add_employee):
+    add_employee("E1")
+    with pytest.raises(IntegrityError):
+        crud.create_employee(db, schemas.EmployeeCreate(
+            employee_id="E2", email="E1@EXAMPLE.com", password=PASSWORD, name="E2", surname="Test", role="employee",
+            department_name=None,
+        ))
+
+
+def test_update_keeps_normalized_email(db, add_employee):
+    add_employee("E1")
+    crud.update_employee(db, "E1", schemas.EmployeeUpdate(
+        name="E1", surname="Test", email="Renamed@Example.com", role="employee", department_name=None,
+    ))
+    assert crud.get_user_by_email(db, "renamed@example.com").employee_id == "E1"
+    assert crud.get_user_by_email(db, "e1@example.com") is None
@@ -0,0 +1,62 @@
+import models
+
+
+def row(employee_id, email, password="secret", **fields):
+    return {"employee_id": employee_id, "email": email, "password": password, "name": "New",
+            "surname": "Test", **fields}
+
+
+def imported(db):
+    return {e.employee_id: e for e in db.query(models.Employee).filter(models.Employee.surname == "Test")}
+
+
+def test_import_reports_every_row(db, client, auth, add_employee, add_department):
+    add_department("Eng")
+    add_employee("A1", role="admin")
+    add_employee("E1")
+    rows = [
+        row("N1", "N1@Example.com", department_name="Eng"),
+        row("N2", " n1@example.COM "),
+        row("N3", "E1@EXAMPLE.com"),
+        row("E1", "other@example.com"),
+        row("N4", "n4@example.com", password=None),
+        row("N5", "n5@example.com", role="owner"),
+        row("N1", "n6@example.com"),
+        row(None, "n7@example.com"),
+    ]
+    response = client.post("/admin/employees/import", json=rows, headers=auth("A1"))
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    results = [(item["result"], item["detail"]) for item in body["items"]]
+    assert [result for result, _ in results] == [
+        "created", "invalid", "duplicate", "duplicate", "invalid", "invalid", "invalid", "created",
+    ]
+    assert results[2][1] == "Email already in use" and results[3][1] == "Employee ID already exists"
+    assert "password" in results[4][1]
+    assert (body["created"], body["failed"]) == (2, 6)
+
+    generated_id = body["items"][7]["employee_id"]
+    employees = imported(db)
+    assert set(employees) == {"A1", "E1", "N1", generated_id}
+    assert employees["N1"].email_normalized == "n1@example.com"
+    assert employees["N1"].department_id is not None
+    login = client.post("/login", json={"email": "n1@example.com", "password": "secret"})
+    assert login.status_code == 200, login.text
+
+
+def test_import_csv(db, client, auth, add_employee):
+    add_employee("A1", role="admin")
+    body = "employee_id,email,password,name,surname,role\nC1,c1@example.com,secret,C,Test,\nC2,,secret,C,Test,manager\n"
+    response = client.post("/admin/employees/import", content=body,
+                           headers={**auth("A1"), "Content-Type": "text/csv"})
+
+    assert response.status_code == 200, response.text
+    assert [item["result"] for item in response.json()["items"]] == ["created", "invalid"]
+    assert imported(db)["C1"].role == models.RoleEnum.employee
+
+
+def test_import_is_for_admins(client, auth, add_employee):
+    add_employee("M1", role="manager")
+    response = client.post("/admin/employees/import", json=[row("N1", "n1@example.com")], headers=auth("M1"))
+    assert response.status_code == 403
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+import events
+import models
+from routers.events import event_stream, timesheet_events
+from security import Principal
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = events.InMemoryBroker()
+    monkeypatch.setattr(events, "broker", broker)
+    return broker
+
+
+def test_subscribes_only_while_streaming(broker):
+    async def run():
+        principal = Principal(employee_id="E1", role=models.RoleEnum.employee, department_name=None)
+        response = await timesheet_events(principal)
+        # A client that disconnects before the body is sent leaves nothing behind
+        assert broker._channels == {}
+
+        stream = response.body_iterator
+        assert b"event: ready" in await stream.__anext__()
+        assert set(broker._channels) == {events.employee_channel("E1")}
+
+        events.broker.publish([events.employee_channel("E1")], {"type": "timesheet.status", "id": 1})
+        assert b"event: timesheet.status" in await stream.__anext__()
+
+        await stream.aclose()
+        assert broker._channels == {}
+
+    asyncio.run(run())
+
+
+def test_unsubscribes_when_closed_before_the_first_event(broker):
+    async def run():
+        stream = event_stream([events.ALL_CHANNEL])
+        await stream.__anext__()
+        await stream.aclose()
+        assert broker._channels == {}
+
+    asyncio.run(run())
@@ -0,0 +1,39 @@
+import asyncio
+import threading
+
+import pytest
+
+from hashing import HasherBusy, PasswordHasher
+
+
+def test_inline_hasher_is_bounded():
+    hasher = PasswordHasher(workers=0, max_pending=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    async def run():
+        first = asyncio.ensure_future(hasher.arun(slow))
+        await asyncio.to_thread(started.wait, 5)
+        with pytest.raises(HasherBusy):
+            await hasher.arun(str, "x")
+        with pytest.raises(HasherBusy):
+            hasher.run(str, "x")
+        release.set()
+        assert await first == "done"
+        # The slot is free again once the first job is done
+        assert await hasher.arun(str, "x") == "x"
+        assert hasher.run(str, "x") == "x"
+
+    asyncio.run(run())
+
+
+def test_inline_chunks_stay_within_the_slots():
+    hasher = PasswordHasher(workers=0, max_pending=2)
+    assert hasher.parallelism <= 2
+    items = list(range(50))
+    assert hasher.run_chunked(lambda chunk: [i * 2 for i in chunk], items, 3) == [i * 2 for i in items]
+    assert asyncio.run(hasher.arun_chunked(lambda chunk: [i * 2 for i in chunk], items, 3)) == [i * 2 for i in items]
@@ -0,0 +1,57 @@
+from datetime import date
+
+import archive
+import crud
+import models
+
+PAYLOAD = {"date": "2024-03-04", "clock_in": "08:00:00", "clock_out": "16:00:00", "description": "work"}
+
+
+def submit(client, headers, key, payload=PAYLOAD):
+    return client.post("/timesheets/", json=payload, headers={**headers, "Idempotency-Key": key})
+
+
+def test_replay_returns_the_original_timesheet(client, auth, add_employee):
+    add_employee("E1")
+    headers = auth("E1")
+    first = submit(client, headers, "k1")
+    replay = submit(client, headers, "k1")
+    assert first.status_code == replay.status_code == 200
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == first.json()
+
+
+def test_replay_after_archiving(db, client, auth, add_employee):
+    add_employee("E1")
+    headers = auth("E1")
+    first = submit(client, headers, "old")
+    crud.bulk_update_timesheet_status(db, "approved", employee_ids=["E1"])
+    assert archive.archive_timesheets(db, cutoff=date(2025, 1, 1)) == 1
+    assert db.query(models.Timesheet).count() == 0
+
+    replay = submit(client, headers, "old")
+
+    assert replay.status_code == 200, replay.text
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == {**first.json(), "status": "approved"}
+
+
+def test_reused_key_with_other_fields_is_rejected(client, auth, add_employee):
+    add_employee("E1")
+    headers = auth("E1")
+    submit(client, headers, "k1")
+    response = submit(client, headers, "k1", {**PAYLOAD, "description": "other"})
+    assert response.status_code == 422
+
+
+def test_archived_date_cannot_be_submitted_again(db, client, auth, add_employee):
+    add_employee("E1")
+    headers = auth("E1")
+    submit(client, headers, "k1")
+    crud.bulk_update_timesheet_status(db, "approved", employee_ids=["E1"])
+    archive.archive_timesheets(db, cutoff=date(2025, 1, 1))
+
+    response = client.post("/timesheets/", json=PAYLOAD, headers=headers)
+
+    assert response.status_code == 400
+    assert db.query(models.Timesheet).count() == 0
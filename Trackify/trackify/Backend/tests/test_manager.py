@@ -0,0 +1,73 @@
+from datetime import date
+
+import crud
+from conftest import timesheet
+
+DAY = date(2024, 3, 4)
+
+
+def test_manager_without_department_sees_no_timesheets(db, client, auth, add_department, add_employee):
+    add_department("Eng")
+    add_employee("E1", department_name="Eng")
+    add_employee("M0", role="manager")
+    crud.submit_timesheet(db, "E1", timesheet(DAY))
+
+    response = client.get("/manager/timesheets", headers=auth("M0"))
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Manager has no department assigned"
+
+
+def test_manager_sees_own_department_only(db, client, auth, add_department, add_employee):
+    add_department("Eng")
+    add_department("Ops")
+    add_employee("E1", department_name="Eng")
+    add_employee("E2", department_name="Ops")
+    add_employee("M1", role="manager", department_name="Eng")
+    for employee_id in ("E1", "E2"):
+        crud.submit_timesheet(db, employee_id, timesheet(DAY))
+
+    response = client.get("/manager/timesheets", headers=auth("M1"))
+
+    assert response.status_code == 200
+    assert [t["employee_id"] for t in response.json()] == ["E1"]
+
+
+def test_manager_timesheets_are_paginated(db, client, auth, add_department, add_employee):
+    add_department("Eng")
+    add_employee("E1", department_name="Eng")
+    add_employee("M1", role="manager", department_name="Eng")
+    days = [date(2024, 3, day) for day in range(1, 6)]
+    for day in days:
+        crud.submit_timesheet(db, "E1", timesheet(day))
+    headers = auth("M1")
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/manager/timesheets", params=params, headers=headers)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        seen += [t["date"] for t in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == [day.isoformat() for day in reversed(days)]
+
+
+def test_invalid_status_is_rejected_before_revalidation(client, auth, add_employee):
+    add_employee("M1", role="manager", department_name="Eng")
+    # If-None-Match: * matches any tag, so only validation can stop a 304
+    headers = {**auth("M1"), "If-None-Match": "*"}
+
+    response = client.get("/manager/timesheets", params={"status": "bogus"}, headers=headers)
+
+    assert response.status_code == 400
+
+
+def test_timesheet_routes_are_served_by_the_router(client, auth, add_employee):
+    # Only routers/timesheet.py tags listings with an ETag
+    add_employee("E1", department_name="Eng")
+    response = client.get("/timesheets/", headers=auth("E1"))
+    assert response.status_code == 200 and "ETag" in response.headers
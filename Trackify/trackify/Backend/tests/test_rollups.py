@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+import archive
+import crud
+import models
+import rollups
+import schemas
+from conftest import timesheet
+
+# Crosses a week and a month boundary
+DAYS = [date(2024, 1, 29) + timedelta(days=i) for i in range(8)]
+
+
+def recomputed_rollups(db):
+    """The rollup rows as a full recount of live and archived timesheets would produce them."""
+    deltas = rollups.RollupDeltas()
+    for source in (models.Timesheet, models.TimesheetArchive):
+        for row in db.execute(select(source.employee_id, source.date, source.status, source.total_hours)):
+            deltas.add(*row)
+    return sorted(
+        (p["employee_id"], p["period"], p["period_start"], p["status"], p["total_hours"], p["entry_count"])
+        for p in deltas.params()
+    )
+
+
+def stored_rollups(db):
+    rollup = models.TimesheetHoursRollup
+    rows = db.execute(select(
+        rollup.employee_id, rollup.period, rollup.period_start, rollup.status, rollup.total_hours, rollup.entry_count,
+    ).where(rollup.entry_count > 0))
+    return sorted((e, p, s, st, rollups.to_hours(h), c) for e, p, s, st, h, c in rows)
+
+
+def assert_rollups_match(db):
+    expected = recomputed_rollups(db)
+    assert expected and stored_rollups(db) == expected
+
+
+def test_rollups_follow_every_timesheet_write(db, client, auth, add_employee):
+    add_employee("E1", department_name="IT")
+    add_employee("E2", department_name="IT")
+    add_employee("M1", role="manager", department_name="IT")
+
+    for day in DAYS[:5]:
+        crud.submit_timesheet(db, "E1", timesheet(day))
+    batch = [{"date": day.isoformat(), "clock_in": "09:00:00", "clock_out": "17:30:00", "description": "work"} for day in DAYS]
+    assert client.post("/timesheets/batch", json={"entries": batch}, headers=auth("E2")).status_code == 200
+    assert_rollups_match(db)
+
+    response = client.put("/manager/employees/E1/timesheets/status", json={"status": "approved"}, headers=auth("M1"))
+    assert response.status_code == 200 and response.json()["updated"] == 5
+    crud.bulk_update_timesheet_status(db, "rejected", employee_ids=["E2"])
+    assert_rollups_match(db)
+
+    # Re-opening rejected days with other hours, singly and in a batch
+    crud.submit_timesheet(db, "E2", timesheet(DAYS[0], clock_out="12:00"))
+    crud.create_timesheets_batch(db, "E2", [timesheet(day, clock_in="07:00") for day in DAYS[1:4]])
+    crud.update_timesheet(db, "E2", DAYS[5], schemas.TimesheetUpdate(
+        clock_in="09:00", clock_out="17:30", description="work", status="approved",
+    ))
+    assert_rollups_match(db)
+
+    assert archive.archive_timesheets(db, cutoff=DAYS[3], batch_size=2) == 3
+    assert_rollups_match(db)
+
+
+def test_rejected_duplicate_submission_leaves_rollups_alone(db, add_employee):
+    add_employee("E1", department_name="IT")
+    crud.submit_timesheet(db, "E1", timesheet(DAYS[0]))
+    before = stored_rollups(db)
+
+    with pytest.raises(crud.TimesheetExists):
+        crud.submit_timesheet(db, "E1", timesheet(DAYS[0], clock_out="18:00"))
+
+    assert stored_rollups(db) == before
+    assert_rollups_match(db)
@@ -0,0 +1,37 @@
+import cache
+import crud
+import schemas
+import security
+
+
+def demote(db, employee_id):
+    crud.update_employee(db, employee_id, schemas.EmployeeUpdate(
+        name=employee_id, surname="Test", email=f"{employee_id.lower()}@example.com",
+        role="employee", department_name="IT",
+    ))
+
+
+def test_demoted_manager_is_signed_out(db, client, auth, add_employee):
+    add_employee("M1", role="manager", department_name="IT")
+    headers = auth("M1")
+    assert client.get("/reports/hours", headers=headers).status_code == 200
+
+    demote(db, "M1")
+
+    assert client.get("/reports/hours", headers=headers).status_code == 401
+
+
+def test_invalidation_reaches_other_workers(db, client, auth, add_employee, monkeypatch, tmp_path):
+    # Two workers sharing one cache file, each with its own connection
+    worker_a, worker_b = (cache.SqliteBackend(str(tmp_path / "cache.db")) for _ in range(2))
+    add_employee("M1", role="manager", department_name="IT")
+    headers = auth("M1")
+    monkeypatch.setattr(security.principal_cache, "backend", worker_a)
+    assert client.get("/reports/hours", headers=headers).status_code == 200
+    assert worker_b.get(cache.principal_key("M1")) is not None
+
+    monkeypatch.setattr(security.principal_cache, "backend", worker_b)
+    demote(db, "M1")
+
+    monkeypatch.setattr(security.principal_cache, "backend", worker_a)
+    assert client.get("/reports/hours", headers=headers).status_code == 401
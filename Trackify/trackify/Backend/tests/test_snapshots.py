@@ -0,0 +1,157 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import select, update
+
+import archive
+import crud
+import models
+import snapshots
+from conftest import timesheet
+
+TODAY = date(2024, 3, 15)
+DAYS = [date(2024, 1, 20) + timedelta(days=i) for i in range(25)]  # Jan 20 - Feb 13
+
+
+@pytest.fixture
+def history(db, add_department, add_employee):
+    """Eng (E1) approved, Ops (E2) half rejected, E3 without a department; some late, some of unknown lag."""
+    add_department("Eng")
+    add_department("Ops")
+    add_employee("E1", department_name="Eng")
+    add_employee("E2", department_name="Ops")
+    add_employee("E3")
+    for employee_id in ("E1", "E2", "E3"):
+        crud.create_timesheets_batch(db, employee_id, [timesheet(day, clock_out=f"{12 + day.day % 5}:15") for day in DAYS])
+    crud.submit_timesheet(db, "E1", timesheet(date(2024, 3, 1)))  # current month: never snapshotted
+    crud.bulk_update_timesheet_status(db, "approved", employee_ids=["E1"])
+    crud.bulk_update_timesheet_status(db, "rejected", employee_ids=["E2"])
+    crud.submit_timesheet(db, "E2", timesheet(DAYS[0]))  # re-opened, pending again
+
+    ts = models.Timesheet
+    for offset, day in enumerate(DAYS):
+        submitted = None if offset % 7 == 0 else datetime.combine(day, datetime.min.time()) + timedelta(days=offset % 12)
+        db.execute(update(ts).where(ts.date == day).values(submitted_at=submitted))
+    db.commit()
+
+
+def recount(db, date_from=None, date_to=None, group_by="department_month", department_name=None, late_after_days=7):
+    """analytics() rows recounted straight from the live and archived timesheets."""
+    groups = defaultdict(lambda: defaultdict(int))
+    for source in (models.Timesheet, models.TimesheetArchive):
+        query = select(source.date, source.status, source.total_hours, source.submitted_at, models.Employee.department_name).outerjoin(
+            models.Employee, models.Employee.employee_id == source.employee_id
+        ).where(source.date < TODAY.replace(day=1))
+        for day, status, hours, submitted_at, department in db.execute(query):
+            if (date_from and day < date_from) or (date_to and day > date_to):
+                continue
+            if department_name is not None and department != department_name:
+                continue
+            key = (f"{day:%Y-%m}" if group_by != "department" else None, department if group_by != "month" else None)
+            row = groups[key]
+            row["hours"] += round(hours * 100)
+            row["entries"] += 1
+            row[models.StatusEnum(status).value] += 1
+            if submitted_at is None:
+                row["unknown"] += 1
+            elif (submitted_at.date() - day).days > late_after_days:
+                row["late"] += 1
+    rows = []
+    for (month, department), row in sorted(groups.items(), key=lambda item: (item[0][0] or "", item[0][1] or "")):
+        reviewed = row["approved"] + row["rejected"]
+        rows.append({
+            "month": month, "department_name": department, "total_hours": row["hours"] / 100,
+            "entry_count": row["entries"], "approved": row["approved"], "rejected": row["rejected"],
+            "pending": row["pending"], "approval_rate": round(row["approved"] / reviewed, 4) if reviewed else None,
+            "late_submissions": row["late"], "unknown_submission_time": row["unknown"],
+        })
+    return rows
+
+
+QUERIES = [
+    {},
+    {"group_by": "department"},
+    {"group_by": "month"},
+    {"date_from": date(2024, 1, 25), "date_to": date(2024, 2, 3)},  # partial months at both ends
+    {"date_from": date(2024, 2, 1)},
+    {"department_name": "Ops", "group_by": "month"},
+    {"late_after_days": 0},
+    {"date_to": date(2024, 1, 31), "late_after_days": 3},
+]
+
+
+def assert_matches_recount(db, directory):
+    for query in QUERIES:
+        months, rows = snapshots.analytics(str(directory), **query)
+        assert rows == recount(db, **query), query
+
+
+def test_snapshots_match_a_recount(db, history, tmp_path):
+    assert snapshots.write_snapshots(db, str(tmp_path), today=TODAY) == ["2024-01", "2024-02"]
+    assert_matches_recount(db, tmp_path)
+    months, rows = snapshots.analytics(str(tmp_path), group_by="department")
+    assert months == ["2024-01", "2024-02"]
+    assert {row["department_name"]: row["approval_rate"] for row in rows} == {None: None, "Eng": 1.0, "Ops": 0.0}
+
+
+def test_only_changed_months_are_rewritten(db, history, tmp_path):
+    directory = str(tmp_path)
+    snapshots.write_snapshots(db, directory, today=TODAY)
+    assert snapshots.write_snapshots(db, directory, today=TODAY) == []
+
+    # A status change in a closed month rewrites that month only
+    crud.bulk_update_timesheet_status(db, "approved", employee_ids=["E3"], from_statuses=["pending"])
+    assert snapshots.write_snapshots(db, directory, today=TODAY) == ["2024-01", "2024-02"]
+    crud.submit_timesheet(db, "E2", timesheet(DAYS[-1]))  # Feb 13, rejected -> pending
+    assert snapshots.write_snapshots(db, directory, today=TODAY) == ["2024-02"]
+    assert_matches_recount(db, tmp_path)
+
+    # Archiving moves rows without changing any month
+    assert archive.archive_timesheets(db, cutoff=date(2024, 2, 1)) > 0
+    assert snapshots.write_snapshots(db, directory, today=TODAY) == []
+    assert_matches_recount(db, tmp_path)
+
+    # Replaced month directories are removed
+    assert len([p for p in tmp_path.iterdir() if p.is_dir()]) == 2
+
+
+def test_unknown_department_and_empty_directory(db, history, tmp_path):
+    snapshots.write_snapshots(db, str(tmp_path), today=TODAY)
+    assert snapshots.analytics(str(tmp_path), department_name="Sales")[1] == []
+    assert snapshots.analytics(str(tmp_path / "missing")) == ([], [])
+
+
+def test_encode_rows():
+    rows = [
+        (date(2024, 1, 5), models.StatusEnum.approved, 7.5, datetime(2024, 1, 20, 9), "Eng"),
+        (date(2024, 1, 6), models.StatusEnum.pending, None, None, None),
+        (date(2024, 1, 7), models.StatusEnum.rejected, 8, datetime(2024, 1, 6, 9), "Ops"),
+        (date(2024, 1, 8), models.StatusEnum.approved, 1.25, datetime(2200, 1, 1), "Eng"),
+    ]
+    columns, departments = snapshots.encode_rows(rows)
+    assert departments == ["Eng", "Ops"]
+    assert {name: values.dtype.name for name, values in columns.items()} == snapshots.COLUMNS
+    assert columns["department"].tolist() == [0, -1, 1, 0]
+    assert columns["status"].tolist() == [1, 0, 2, 1]
+    assert columns["hours"].tolist() == [750, 0, 800, 125]
+    assert columns["day"].tolist() == [5, 6, 7, 8]
+    # Unknown is -1, submissions before the date count as on time, huge lags saturate
+    assert columns["lag_days"].tolist() == [15, -1, 0, np.iinfo(np.int16).max]
+
+
+def test_analytics_endpoint(db, history, client, auth, add_employee, tmp_path, monkeypatch):
+    import routers.reports
+    monkeypatch.setattr(routers.reports, "ANALYTICS_SNAPSHOT_DIR", str(tmp_path))
+    snapshots.write_snapshots(db, str(tmp_path), today=TODAY)
+    add_employee("A1", role="admin")
+    add_employee("M2", role="manager", department_name="Ops")
+
+    response = client.get("/reports/analytics", params={"group_by": "month"}, headers=auth("A1"))
+    assert response.status_code == 200
+    assert response.json()["rows"] == recount(db, group_by="month")
+
+    response = client.get("/reports/analytics", headers=auth("M2"))
+    assert response.json()["rows"] == recount(db, department_name="Ops")
+    assert client.get("/reports/analytics", params={"department_name": "Eng"}, headers=auth("M2")).status_code == 403
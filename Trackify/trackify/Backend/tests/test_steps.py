@@ -0,0 +1,45 @@
+import asyncio
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+import crud
+import crud_async
+import models
+import steps
+from database import AsyncSessionLocal
+
+
+def insert_twice_steps(dialect, employee_id):
+    """Inserts a department twice; the second insert fails and is handled inside the operation."""
+    yield steps.Execute(insert(models.Department).values(name=employee_id))
+    try:
+        yield steps.Execute(insert(models.Department).values(name=employee_id))
+    except IntegrityError:
+        yield steps.Rollback()
+        return "rolled back"
+    return "inserted twice"
+
+
+def test_errors_are_thrown_back_into_the_operation(db):
+    assert crud.run(db, insert_twice_steps, "Eng") == "rolled back"
+    assert db.execute(select(models.Department)).all() == []
+
+
+def test_async_run_matches_sync(db):
+    async def run():
+        async with AsyncSessionLocal() as session:
+            return await crud_async.run(session, insert_twice_steps, "Ops")
+
+    assert asyncio.run(run()) == "rolled back"
+    assert db.execute(select(models.Department)).all() == []
+
+
+def test_sync_import_shares_the_operation(db, add_employee):
+    add_employee("E1")
+    rows = [
+        {"employee_id": "N1", "email": "n1@example.com", "password": "secret", "name": "New", "surname": "Test"},
+        {"employee_id": "N2", "email": "E1@example.com", "password": "secret", "name": "New", "surname": "Test"},
+    ]
+    assert [item["result"] for item in crud.import_employees(db, rows)] == ["created", "duplicate"]
+    assert crud.get_user_by_email(db, "n1@example.com").employee_id == "N1"
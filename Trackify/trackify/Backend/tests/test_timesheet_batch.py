@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+import crud
+import models
+from conftest import timesheet
+
+DAYS = [date(2024, 3, 4) + timedelta(days=i) for i in range(4)]
+
+
+def entry(day, clock_in="08:00", clock_out="16:00"):
+    return {"date": day.isoformat(), "clock_in": clock_in, "clock_out": clock_out, "description": "work"}
+
+
+def stored(db, employee_id="E1"):
+    return {ts.date: ts.status for ts in db.query(models.Timesheet).filter_by(employee_id=employee_id)}
+
+
+def test_batch_results(db, client, auth, add_employee):
+    add_employee("E1")
+    crud.submit_timesheet(db, "E1", timesheet(DAYS[1]))
+    crud.bulk_update_timesheet_status(db, "rejected", employee_ids=["E1"], from_statuses=["pending"])
+    crud.submit_timesheet(db, "E1", timesheet(DAYS[0]))
+
+    entries = [
+        entry(DAYS[0]),
+        entry(DAYS[1]),
+        entry(DAYS[2]),
+        entry(DAYS[3], clock_in="16:00", clock_out="08:00"),
+        entry(DAYS[2]),
+        entry(date.today() + timedelta(days=1)),
+    ]
+    response = client.post("/timesheets/batch", json={"entries": entries}, headers=auth("E1"))
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [item["result"] for item in body["items"]] == ["duplicate", "reopened", "created", "invalid", "invalid", "invalid"]
+    assert (body["created"], body["reopened"], body["failed"]) == (1, 1, 4)
+    assert body["items"][2]["timesheet"]["date"] == DAYS[2].isoformat()
+    db.expire_all()
+    assert stored(db) == {day: models.StatusEnum.pending for day in DAYS[:3]}
+
+
+def test_batch_conflict_stores_nothing(db, client, auth, add_employee, monkeypatch):
+    add_employee("E1")
+    crud.submit_timesheet(db, "E1", timesheet(DAYS[1]))
+    existing_timesheets_query = crud.existing_timesheets_query
+    # The row for DAYS[1] is not seen by the batch, as if stored concurrently after the check
+    monkeypatch.setattr(crud, "existing_timesheets_query",
+                        lambda employee_id, dates: existing_timesheets_query(employee_id, []))
+
+    response = client.post("/timesheets/batch", json={"entries": [entry(d) for d in DAYS[:3]]}, headers=auth("E1"))
+
+    assert response.status_code == 409, response.text
+    db.expire_all()
+    assert stored(db) == {DAYS[1]: models.StatusEnum.pending}
+
+
+def test_batch_is_for_employees(client, auth, add_employee):
+    add_employee("M1", role="manager")
+    response = client.post("/timesheets/batch", json={"entries": [entry(DAYS[0])]}, headers=auth("M1"))
+    assert response.status_code == 403
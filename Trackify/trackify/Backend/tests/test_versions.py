@@ -0,0 +1,60 @@
+from datetime import date
+
+import archive
+import crud
+import versions
+from conftest import timesheet
+
+DAY = date(2024, 3, 4)
+
+
+def scope_versions(db, *scopes):
+    return [crud.get_scope_version(db, scope) for scope in scopes]
+
+
+def test_timesheet_writes_bump_their_scopes_only(db, add_employee):
+    add_employee("E1", department_name="IT")
+    add_employee("E2", department_name="HR")
+    scopes = (versions.employee_scope("E1"), versions.department_scope("IT"), "timesheets:all",
+              versions.employee_scope("E2"), versions.department_scope("HR"))
+    before = scope_versions(db, *scopes)
+
+    crud.submit_timesheet(db, "E1", timesheet(DAY))
+
+    after = scope_versions(db, *scopes)
+    assert [a > b for a, b in zip(after, before)] == [True, True, True, False, False]
+
+    crud.bulk_update_timesheet_status(db, "approved", department_name="IT")
+    assert scope_versions(db, *scopes[:3]) > after[:3]
+    assert scope_versions(db, *scopes[3:]) == after[3:]
+
+
+def test_listing_etag_changes_with_its_scope(db, client, auth, add_employee):
+    add_employee("E1", department_name="IT")
+    add_employee("E2", department_name="HR")
+    headers = auth("E1")
+    crud.submit_timesheet(db, "E1", timesheet(DAY))
+
+    first = client.get("/timesheets/", headers=headers)
+    etag = first.headers["ETag"]
+    assert client.get("/timesheets/", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    # Another employee's write leaves this listing's tag valid
+    crud.submit_timesheet(db, "E2", timesheet(DAY))
+    assert client.get("/timesheets/", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    crud.bulk_update_timesheet_status(db, "approved", employee_ids=["E1"])
+    changed = client.get("/timesheets/", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    etag = changed.headers["ETag"]
+
+    # Archival changes no listing, so it bumps no scope and the tag stays valid
+    assert archive.archive_timesheets(db, cutoff=date(2025, 1, 1)) == 1
+    assert client.get("/timesheets/", headers={**headers, "If-None-Match": etag}).status_code == 304
+    assert client.get("/timesheets/", headers=headers).json() == changed.json()
+
+
+def test_bump_params_are_sorted_and_unique():
+    # A fixed order keeps overlapping bumps from deadlocking each other
+    params = versions.bump_params({"b", "a", "c", "a"})
+    assert [p["scope"] for p in params] == ["a", "b", "c"]
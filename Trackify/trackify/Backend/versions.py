@@ -0,0 +1,102 @@
+# versions.py
+"""Version tokens for conditional GETs (ETag / If-None-Match).
+
+Every listing scope has a counter in scope_version, bumped in the same
+transaction as the writes that change what the scope lists:
+- timesheets:employee:<id> and timesheets:department:<name> for timesheet
+  writes of that employee / department
+- timesheets:all for any timesheet write, spread over ALL_SHARDS rows so
+  concurrent writers do not all queue on one row lock
+- employees for employee creates and updates
+
+Scopes name listings, not tables: archived timesheets are listed under the
+same scopes as live ones, so the archive job (which changes no listing) bumps
+nothing, and a department move bumps both departments for either table.
+
+A GET reads its scope's counter (one primary key lookup) and answers 304 when
+the client already holds that version, before running the listing query.
+"""
+import hashlib
+import zlib
+
+from fastapi import Response
+from sqlalchemy import func, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+import models
+
+ALL_SHARDS = 16
+EMPLOYEES = "employees"
+
+
+def employee_scope(employee_id: str) -> str:
+    return f"timesheets:employee:{employee_id}"
+
+
+def department_scope(department_name) -> str:
+    return f"timesheets:department:{department_name}"
+
+
+def all_shard(employee_id: str) -> str:
+    return f"timesheets:all:{zlib.crc32(employee_id.encode()) % ALL_SHARDS}"
+
+
+ALL_SHARD_SCOPES = [f"timesheets:all:{shard}" for shard in range(ALL_SHARDS)]
+
+
+def timesheet_scopes(employee_ids, department_names) -> set:
+    """Scopes to bump when timesheets of these employees (in these departments) change."""
+    scopes = {employee_scope(e) for e in employee_ids}
+    scopes |= {all_shard(e) for e in employee_ids}
+    scopes |= {department_scope(d) for d in department_names if d}
+    return scopes
+
+
+def employee_departments_query(employee_ids):
+    """(employee_id, department_name) of the given employees."""
+    return select(models.Employee.employee_id, models.Employee.department_name).where(
+        models.Employee.employee_id.in_(list(employee_ids))
+    )
+
+
+def bump_statement(dialect_name: str):
+    """INSERT of version 1 that increments an existing row instead."""
+    table = models.ScopeVersion.__table__
+    if dialect_name == "mysql":
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(version=table.c.version + 1)
+    # sqlite or postgresql; database.check_dialect refuses anything else at startup
+    stmt = (sqlite if dialect_name == "sqlite" else postgresql).insert(table)
+    return stmt.on_conflict_do_update(index_elements=["scope"], set_={"version": table.c.version + 1})
+
+
+def bump_params(scopes) -> list:
+    # A fixed order keeps concurrent bumps of overlapping scopes from deadlocking
+    return [{"scope": scope, "version": 1} for scope in sorted(set(scopes))]
+
+
+def version_query(scope: str):
+    """Counter of one scope; timesheets:all sums its shards."""
+    scopes = ALL_SHARD_SCOPES if scope == "timesheets:all" else [scope]
+    return select(func.coalesce(func.sum(models.ScopeVersion.version), 0)).where(
+        models.ScopeVersion.scope.in_(scopes)
+    )
+
+
+def make_etag(scope: str, version: int, query_string: str = "") -> str:
+    # The query string is part of the tag: the same scope serves different pages and filters
+    digest = hashlib.sha1(f"{scope}|{version}|{query_string}".encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    weak = lambda tag: tag.strip().removeprefix("W/")
+    return weak(etag) in {weak(tag) for tag in if_none_match.split(",")}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})